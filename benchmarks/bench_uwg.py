@@ -0,0 +1,303 @@
+"""Benchmarks of the uwg simulation core.
+
+Each case runs the sections of uwg.run() on the checked-in synthetic inputs of data/
+(see make_inputs.py) and times each of them: one day, one month or one year of a city
+with 1, 5 or 20 building typologies, at a dtSim of 300 s or 60 s. The components called
+at each time step (Element.Conduction, RSMDef.VDM, urbflux, UCMDef.UCModel and
+UBLDef.UBLModel) are also timed on their own, from the state of the city at the end of
+a simulated day. Results are written as JSON, to be compared between commits:
+
+    python benchmarks/bench_uwg.py -o before.json
+    python benchmarks/bench_uwg.py -o after.json --durations day,month
+    python benchmarks/bench_uwg.py --compare before.json after.json
+
+The one year cases take several minutes each, see --durations, --dt & --typologies to
+run a part of the cases, and --set to benchmark non-default uwg inputs (i.e.
+--set bem_kernel=array).
+"""
+from __future__ import division, print_function
+
+import argparse
+import ast
+import copy
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from uwg import uwg                             # noqa: E402
+from uwg.urbflux import urbflux                 # noqa: E402
+
+from make_inputs import DATA_DIR, EPW_FILE, UWG_FILE, TYPOLOGIES    # noqa: E402
+
+# (Month, Day, nDay) of each simulated period
+DURATIONS = {
+    "day": (7, 1, 1),
+    "month": (7, 1, 31),
+    "year": (1, 1, 365),
+    }
+DURATION_ORDER = ("day", "month", "year")
+TIME_STEPS = (300, 60)
+
+# Sections of uwg.run(), in order
+SECTIONS = ("read_epw", "set_input", "init_BEM_obj", "init_input_obj", "hvac_autosize",
+            "simulate", "write_epw")
+
+# Components called at each time step, timed from the state of the city after MICRO_DAY
+MICRO = ("Element.Conduction", "RSMDef.VDM", "urbflux", "UCMDef.UCModel", "UBLDef.UBLModel")
+MICRO_DAY = (7, 1, 1)
+MICRO_CALLS = 200
+
+
+class _Silent(object):
+    """ Context that drops what uwg prints to stdout """
+
+    def write(self, s):
+        pass
+
+    def flush(self):
+        pass
+
+    def __enter__(self):
+        self.stdout = sys.stdout
+        sys.stdout = self
+        return self
+
+    def __exit__(self, *exc):
+        sys.stdout = self.stdout
+
+
+def case_name(duration, dt, ntyp):
+    return "{}_dt{}_bld{}".format(duration, dt, ntyp)
+
+
+def new_model(ntyp, period, dt, destinationDir, overrides=None):
+    """ uwg of the synthetic city of ntyp typologies, for a (Month, Day, nDay) period """
+    model = uwg(EPW_FILE, UWG_FILE.format(ntyp), DATA_DIR, DATA_DIR, destinationDir,
+                "bench.epw")
+    # Inputs set before set_input override the .uwg file
+    model.Month, model.Day, model.nDay = period
+    model.dtSim = float(dt)
+    for name, value in (overrides or {}).items():
+        setattr(model, name, value)
+    return model
+
+
+def run_sections(model):
+    """ Time of each section of uwg.run() (s) """
+    times = {}
+    for section in SECTIONS:
+        start = timeit.default_timer()
+        getattr(model, section)()
+        times[section] = timeit.default_timer() - start
+    return times
+
+
+def bench_case(duration, dt, ntyp, repeat, tmp, overrides):
+    """ Best time of each section of a case, and its total, over repeat runs """
+    runs = []
+    for r in range(repeat):
+        with _Silent():
+            model = new_model(ntyp, DURATIONS[duration], dt, tmp, overrides)
+            runs.append(run_sections(model))
+
+    sections = dict((s, min(run[s] for run in runs)) for s in SECTIONS)
+    return {
+        "duration": duration,
+        "dtSim": dt,
+        "typologies": ntyp,
+        "nDay": DURATIONS[duration][2],
+        "steps": model.simTime.nt - 1,
+        "sections": sections,
+        "total": min(sum(run.values()) for run in runs),
+        "runs": runs,
+        }
+
+
+def micro_targets(model):
+    """ Function of each component that runs it once on (a copy of) the model state """
+    dt = model.simTime.dt
+
+    def conduction(m):
+        wall = m.BEM[0].wall
+        wall.Conduction(dt, wall.flux, 1., m.forc.deepTemp, m.BEM[0].building.fluxWall)
+
+    def vdm(m):
+        m.RSM.VDM(m.forc, m.rural, m.geoParam, m.simTime)
+
+    def flux(m):
+        urbflux(m.UCM, m.UBL, m.BEM, m.forc, m.geoParam, m.simTime, m.RSM, m.bemBatch)
+
+    def ucm(m):
+        m.UCM.UCModel(m.BEM, m.UBL.ublTemp, m.forc, m.geoParam)
+
+    def ubl(m):
+        m.UBL.UBLModel(m.UCM, m.RSM, m.rural, m.forc, m.geoParam, m.simTime)
+
+    return dict(zip(MICRO, (conduction, vdm, flux, ucm, ubl)))
+
+
+class _State(object):
+    """ Objects of a uwg simulation state, copied together for each microbenchmark """
+
+    ATTRIBUTES = ("UCM", "UBL", "BEM", "RSM", "rural", "forc", "geoParam", "simTime",
+                  "bemBatch")
+
+    def __init__(self, model):
+        for name in self.ATTRIBUTES:
+            setattr(self, name, getattr(model, name))
+
+
+def bench_micro(ntyp, repeat, tmp, overrides):
+    """ Best time per call (s) of each component, for a city of ntyp typologies """
+    with _Silent():
+        model = new_model(ntyp, MICRO_DAY, TIME_STEPS[0], tmp, overrides)
+        for section in SECTIONS[:-1]:
+            getattr(model, section)()
+
+    state = _State(model)
+    results = {}
+    for name, target in sorted(micro_targets(model).items()):
+        best = None
+        for r in range(repeat):
+            # Each repeat starts from the same state, as the components update it
+            m = copy.deepcopy(state)
+            start = timeit.default_timer()
+            for i in range(MICRO_CALLS):
+                target(m)
+            t = (timeit.default_timer() - start) / MICRO_CALLS
+            best = t if best is None else min(best, t)
+        results[name] = {"per_call": best, "calls": MICRO_CALLS}
+    return results
+
+
+def git_commit():
+    try:
+        out = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=BENCHMARK_DIR,
+                                      stderr=subprocess.STDOUT)
+        return out.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(durations, time_steps, typologies, repeat=1, micro=True, overrides=None, log=None):
+    """ Run the benchmark cases and microbenchmarks, and return their results as a dict """
+    tmp = tempfile.mkdtemp(prefix="uwg_bench_")
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.datetime.now().isoformat(),
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "overrides": overrides or {},
+            },
+        "cases": {},
+        "micro": {},
+        }
+    try:
+        for duration in durations:
+            for dt in time_steps:
+                for ntyp in typologies:
+                    name = case_name(duration, dt, ntyp)
+                    case = bench_case(duration, dt, ntyp, repeat, tmp, overrides)
+                    results["cases"][name] = case
+                    if log:
+                        log("{:<20} {:>9.3f}s  (simulate {:.3f}s)".format(
+                            name, case["total"], case["sections"]["simulate"]))
+        if micro:
+            for ntyp in typologies:
+                name = "bld{}".format(ntyp)
+                results["micro"][name] = bench_micro(ntyp, max(repeat, 3), tmp, overrides)
+                if log:
+                    log("{:<20} ".format(name) + "  ".join(
+                        "{} {:.1f}us".format(k, v["per_call"] * 1e6)
+                        for k, v in sorted(results["micro"][name].items())))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return results
+
+
+def compare(before, after):
+    """ Lines of the relative change of each time of after with respect to before """
+
+    def line(name, t0, t1):
+        return "{:<44} {:>11.4f} {:>11.4f} {:>+8.1f}%".format(name, t0, t1, (t1 / t0 - 1.) * 100.)
+
+    lines = ["{:<44} {:>11} {:>11} {:>9}".format("", "before (s)", "after (s)", "change")]
+    for name in sorted(set(before["cases"]) & set(after["cases"])):
+        b, a = before["cases"][name], after["cases"][name]
+        lines.append(line(name, b["total"], a["total"]))
+        for section in SECTIONS:
+            lines.append(line("  " + section, b["sections"][section], a["sections"][section]))
+    for name in sorted(set(before["micro"]) & set(after["micro"])):
+        for target in MICRO:
+            lines.append(line("{} {}".format(name, target), before["micro"][name][target]["per_call"],
+                              after["micro"][name][target]["per_call"]))
+    return lines
+
+
+def _value(text):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the uwg simulation core.")
+    parser.add_argument("-o", "--output", help="JSON file of the results (default: stdout)")
+    parser.add_argument("--durations", default=",".join(DURATION_ORDER),
+                        help="simulated periods, among day, month & year")
+    parser.add_argument("--dt", default=",".join(str(dt) for dt in TIME_STEPS),
+                        help="simulation time steps (s)")
+    parser.add_argument("--typologies", default=",".join(str(n) for n in TYPOLOGIES),
+                        help="number of building typologies of the city, among 1, 5 & 20")
+    parser.add_argument("--repeat", type=int, default=1, help="runs of each case, the best is kept")
+    parser.add_argument("--no-micro", action="store_true", help="skip the microbenchmarks")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="uwg input of all cases, i.e. bem_kernel=array")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="compare two JSON files of results instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f0, open(args.compare[1]) as f1:
+            print("\n".join(compare(json.load(f0), json.load(f1))))
+        return
+
+    durations = [d for d in args.durations.split(",") if d]
+    for d in durations:
+        if d not in DURATIONS:
+            parser.error("unknown duration '{}'".format(d))
+    typologies = [int(n) for n in args.typologies.split(",") if n]
+    for n in typologies:
+        if n not in TYPOLOGIES:
+            parser.error("no synthetic city of {} typologies".format(n))
+    overrides = dict((s.split("=", 1)[0], _value(s.split("=", 1)[1])) for s in args.set)
+
+    def log(message):
+        sys.stderr.write(message + "\n")
+
+    results = run(durations, [int(dt) for dt in args.dt.split(",") if dt], typologies,
+                  args.repeat, not args.no_micro, overrides, log)
+
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
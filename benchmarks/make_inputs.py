@@ -0,0 +1,146 @@
+"""Generate the synthetic inputs of the uwg benchmarks (see bench_uwg.py).
+
+The inputs are checked in, so that every commit is benchmarked on the same files. This
+script documents how they were made and only needs to be run to change them:
+
+    python benchmarks/make_inputs.py
+"""
+from __future__ import division, print_function
+
+import math
+import os
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+EPW_FILE = "synthetic.epw"
+UWG_FILE = "city_{}.uwg"            # by number of building typologies
+TYPOLOGIES = (1, 5, 20)
+
+EPW_HEADER = [
+    "LOCATION,Synthetic City,MA,USA,Synthetic,999999,42.37,-71.02,-5.0,6.0",
+    "DESIGN CONDITIONS,0",
+    "TYPICAL/EXTREME PERIODS,0",
+    "GROUND TEMPERATURES,3,.5,,,,-0.6,-1.8,0.0,2.6,8.4,13.9,18.0,19.8,19.0,15.8,10.7,5.1,"
+    "2,,,,2.1,0.4,1.0,2.6,6.9,11.2,14.8,17.0,17.3,15.5,12.0,7.7,"
+    "4,,,,4.6,2.9,2.8,3.6,6.1,9.0,11.9,14.0,14.9,14.3,12.3,9.4",
+    "HOLIDAYS/DAYLIGHT SAVINGS,No,0,0,0",
+    "COMMENTS 1,Synthetic weather of the uwg benchmarks (benchmarks/make_inputs.py)",
+    "COMMENTS 2,",
+    "DATA PERIODS,1,1,Data,Sunday, 1/ 1,12/31",
+    ]
+
+MONTH_DAYS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+UWG_TEMPLATE = """# Synthetic city of the uwg benchmarks, with {ntyp} building typologies
+# (benchmarks/make_inputs.py). Month, Day, nDay & dtSim are set by bench_uwg.py.
+Month,1,
+Day,1,
+nDay,1,
+dtSim,300,
+dtWeather,3600,
+autosize,0,
+sensOcc,100,
+LatFOcc,0.3,
+RadFOcc,0.2,
+RadFEquip,0.5,
+RadFLight,0.7,
+h_ubl1,1000,
+h_ubl2,80,
+h_ref,150,
+h_temp,2,
+h_wind,10,
+c_circ,1.2,
+c_exch,1,
+maxDay,150,
+maxNight,20,
+windMin,1,
+h_obs,0.1,
+bldHeight,10,
+h_mix,1,
+bldDensity,0.5,
+verToHor,0.8,
+charLength,1000,
+albRoad,0.1,
+dRoad,0.5,
+kRoad,1,
+cRoad,1600000,
+sensAnth,20,
+latAnth,2,
+zone,1,
+vegCover,0.2,
+treeCoverage,0.1,
+vegStart,4,
+vegEnd,10,
+albVeg,0.25,
+latGrss,0.4,
+latTree,0.6,
+rurVegCover,0.9,
+SchTraffic,
+{traffic}
+bld,
+{bld}
+albRoof,,
+vegRoof,,
+glzR,,
+albWall,,
+SHGC,,
+"""
+
+TRAFFIC = "0.2,0.2,0.2,0.2,0.2,0.4,0.7,0.9,0.9,0.6,0.6,0.6,0.6,0.6,0.7,0.8,0.9,0.9,0.8,0.8,0.7,0.3,0.2,0.2,"
+
+
+def weather_row(month, day, hour, doy):
+    """ Fields of the epw row of an hour (1 to 24) of a day of the year (doy, from 0) """
+    season = -math.cos(2 * math.pi * (doy + 0.5) / 365.)
+    diurnal = -math.cos(2 * math.pi * (hour - 3) / 24.)
+    temp = 10 + 12 * season + 5 * diurnal
+    rhum = 70 - 15 * diurnal
+    es = 6.112 * math.exp(17.62 * temp / (243.12 + temp))
+    dew = 243.12 * math.log(rhum / 100 * es / 6.112) / (17.62 - math.log(rhum / 100 * es / 6.112))
+    sun = max(0., math.sin(math.pi * (hour - 6) / 12.)) if 6 < hour < 18 else 0.
+    sun *= 0.7 + 0.3 * season
+    direct = 700 * sun
+    diffuse = 120 * sun
+    glob = direct * 0.6 + diffuse
+    wind = 3 + 2 * math.sin(doy * 0.7 + hour * 0.3)
+    rain = 0.5 if doy % 5 == 0 and hour in (3, 4) else 0.0
+
+    return [1991, month, day, hour, 60, "?9?9?9?9E0?9?9?9?9?9?9?9?9?9?9?9?9?9?9?9*9*9?9*9*9",
+            "%.1f" % temp, "%.1f" % dew, "%d" % rhum, "%d" % (101300 + 300 * math.sin(doy * 0.3)),
+            9999, 9999, "%d" % (300 + 2 * temp), "%d" % glob, "%d" % direct, "%d" % diffuse,
+            "%d" % glob, "%d" % direct, "%d" % diffuse, 9999, "%d" % ((doy * 37 + hour * 11) % 360),
+            "%.1f" % wind, 5, 5, 16.1, 77777, 9, 999999999, 0, 0.0, 0, 88, 0.0, 0.0, "%.1f" % rain]
+
+
+def make_epw(path):
+    """ Hourly synthetic weather of a whole year, with seasonal & diurnal cycles """
+    lines = list(EPW_HEADER)
+    doy = 0
+    for month in range(1, 13):
+        for day in range(1, MONTH_DAYS[month-1] + 1):
+            for hour in range(1, 25):
+                lines.append(",".join(str(x) for x in weather_row(month, day, hour, doy)))
+            doy += 1
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def make_uwg(path, ntyp):
+    """ .uwg file of a city of ntyp DOE building typologies (type & era) of equal fraction """
+    cells = [(i, j) for i in range(16) for j in range(3)]
+    bld = [[0.] * 3 for i in range(16)]
+    for k in range(ntyp):
+        i, j = cells[(k * 7) % len(cells)]
+        bld[i][j] = round(1. / ntyp, 6)
+    rows = "\n".join(",".join(repr(v) for v in row) + "," for row in bld)
+    with open(path, "w") as f:
+        f.write(UWG_TEMPLATE.format(ntyp=ntyp, traffic="\n".join([TRAFFIC] * 3), bld=rows))
+
+
+if __name__ == "__main__":
+    if not os.path.isdir(DATA_DIR):
+        os.makedirs(DATA_DIR)
+    make_epw(os.path.join(DATA_DIR, EPW_FILE))
+    for ntyp in TYPOLOGIES:
+        make_uwg(os.path.join(DATA_DIR, UWG_FILE.format(ntyp)), ntyp)
+    print("Benchmark inputs written to {}".format(DATA_DIR))
@@ -62,7 +62,6 @@ import os
 import System
 import datetime
 import zipfile
-import cPickle
 from copy import deepcopy
 
 System.Net.ServicePointManager.SecurityProtocol = System.Net.SecurityProtocolType.Tls12
@@ -509,15 +508,30 @@ class Geometry(object):
         if len(floorBreps) == 0:
             return 0, None
 
-        # grab all unique breps
-        uniqueBreps = [floorBreps[0]]
-        for brep1 in floorBreps[1:]:
-            matchFound = False
-            for brep2 in uniqueBreps:
-                if self.isGeoEquivalent(brep1, brep2):
-                    matchFound = True
-            if matchFound == False:
-                uniqueBreps.append(brep1)
+        # grab all unique breps (same criteria as isGeoEquivalent). With the uwg, the area mass
+        # properties of each brep are computed once and it is only compared to the nearby unique
+        # breps. The geometry does not need the uwg otherwise, so compare all of them without it.
+        try:
+            from uwg.geometry import FootprintIndex
+        except ImportError:
+            FootprintIndex = None
+
+        if FootprintIndex is not None:
+            footprintIndex = FootprintIndex(sc.doc.ModelAbsoluteTolerance)
+            for brep in floorBreps:
+                brepAm = rc.Geometry.AreaMassProperties.Compute(brep)
+                pt = brep.Edges[0].PointAtStart
+                footprintIndex.add((brepAm.Centroid.X, brepAm.Centroid.Y), brepAm.Area, (pt.X, pt.Y), brep)
+            uniqueBreps = footprintIndex.items
+        else:
+            uniqueBreps = [floorBreps[0]]
+            for brep1 in floorBreps[1:]:
+                matchFound = False
+                for brep2 in uniqueBreps:
+                    if self.isGeoEquivalent(brep1, brep2):
+                        matchFound = True
+                if matchFound == False:
+                    uniqueBreps.append(brep1)
 
         # check to be sure all unique breps are facing up (necessary for a clean boolean union).
         for brep in uniqueBreps:
@@ -744,12 +758,9 @@ class BuildingTypes(object):
         """Class that contains all of the accepted building typologies and contruction years"""
 
         # load up all of the building characteristcs from the urban weather generator pickle file.
-        if not os.path.exists(readDOE_file_path):
-            raise Exception("readDOE.pkl file: '{}' does not exist.".format(readDOE_file_path))
-        readDOE_file = open(readDOE_file_path, 'rb') # open pickle file in binary form
-        self.refDOE = cPickle.load(readDOE_file)
-        self.refBEM = cPickle.load(readDOE_file)
-        readDOE_file.close()
+        # the uwg keeps it in memory, so it is only read once per Rhino session.
+        from uwg.readDOE import DOELibrary
+        self.refLibrary = DOELibrary.load(readDOE_file_path)
 
         # dictionary to go from building programs to numbers understood by the uwg.
         self.bldgtype = {
@@ -1253,7 +1264,7 @@ class Typology(DFObject):
             assert isinstance(x, (float, int)), 'glz_ratio must be a number got {}'.format(type(x))
             self._glz_ratio = self.genChecks.in_range(x, 0, 1, 'glz_ratio')
         else:
-            self._glz_ratio = float(self.bldgTypes.refBEM[self.bldgTypes.bldgtype[self.bldg_program]][self.bldgTypes.builtera[self.bldg_age]][0].building.glazingRatio)
+            self._glz_ratio = float(self.bldgTypes.refLibrary.bem(self.bldgTypes.bldgtype[self.bldg_program], self.bldgTypes.builtera[self.bldg_age], 0).building.glazingRatio)
 
     @property
     def shgc(self):
@@ -1270,7 +1281,7 @@ class Typology(DFObject):
     def get_default_shgc(self, climate_zone):
         """Get the solar heat gain coefficient of the buildings in the typology given the climate climate_zone."""
         zoneIndex = self.bldgTypes.check_cimate_zone(climate_zone)
-        return float(self.bldgTypes.refBEM[self.bldgTypes.bldgtype[self.bldg_program]][self.bldgTypes.builtera[self.bldg_age]][zoneIndex].building.shgc)
+        return float(self.bldgTypes.refLibrary.bem(self.bldgTypes.bldgtype[self.bldg_program], self.bldgTypes.builtera[self.bldg_age], zoneIndex).building.shgc)
 
     @property
     def wall_albedo(self):
@@ -1283,7 +1294,7 @@ class Typology(DFObject):
             assert isinstance(x, (float, int)), 'wall_albedo must be a number got {}'.format(type(x))
             self._wall_albedo = self.genChecks.in_range(x, 0, 1, 'wall_albedo')
         else:
-            self._wall_albedo = float(self.bldgTypes.refBEM[self.bldgTypes.bldgtype[self.bldg_program]][self.bldgTypes.builtera[self.bldg_age]][0].wall.albedo)
+            self._wall_albedo = float(self.bldgTypes.refLibrary.bem(self.bldgTypes.bldgtype[self.bldg_program], self.bldgTypes.builtera[self.bldg_age], 0).wall.albedo)
 
     @property
     def roof_albedo(self):
@@ -1296,7 +1307,7 @@ class Typology(DFObject):
             assert isinstance(x, (float, int)), 'roof_albedo must be a number got {}'.format(type(x))
             self._roof_albedo = self.genChecks.in_range(x, 0, 1, 'roof_albedo')
         else:
-            self._roof_albedo = float(self.bldgTypes.refBEM[self.bldgTypes.bldgtype[self.bldg_program]][self.bldgTypes.builtera[self.bldg_age]][0].roof.albedo)
+            self._roof_albedo = float(self.bldgTypes.refLibrary.bem(self.bldgTypes.bldgtype[self.bldg_program], self.bldgTypes.builtera[self.bldg_age], 0).roof.albedo)
 
     @property
     def roof_veg_fraction(self):
@@ -7,6 +7,9 @@ except NameError:
 
 import os
 import math
+from bisect import bisect_left, bisect_right
+
+from .verticalgrid import VerticalGrid
 from pprint import pprint
 
 ppr = pprint
@@ -25,6 +28,7 @@ class RSMDef(object):
         height         % average obstacle height (m)
         z0r;           % rural roughness length (m)
         disp;          % rural displacement length (m)
+        grid;          % vertical grid (VerticalGrid)
         z;             % vertical height (m)
         dz;            % vertical discretization (m)
         nz0;           % layer number at zmt (m)
@@ -39,15 +43,33 @@ class RSMDef(object):
         densityProfS;  % density profile at the sides of layers (kg m-3)
         windProf;      % wind profile at the rural site (m s-1)
         ublPres;       % Average pressure at UBL (Pa)
+        kernel;        % VDM implementation, 'loop' or 'array' (see VDM_array)
     end
     """
 
     Z_MESO_FILE_NAME = "z_meso.txt"
+    KERNELS = ("loop", "array")
+    KERNEL_MSG = "RSM kernel must be one of {}. Got '{}'."
+
+    # Grid constants & tridiagonal matrix reused by VDM_array, set on its first call
+    _work = None
+
+    def __init__(self,lat,lon,GMT,height,T_init,P_init,parameter,z_meso_path,kernel="loop"):
+        """
+        z_meso_path is the directory of the z_meso.txt file that defines the vertical
+        grid, or a VerticalGrid.
+        """
 
-    def __init__(self,lat,lon,GMT,height,T_init,P_init,parameter,z_meso_path):
+        if kernel not in self.KERNELS:
+            raise Exception(self.KERNEL_MSG.format(self.KERNELS, kernel))
+        self.kernel = kernel
 
-        # defines self.z_meso property
-        self.load_z_meso(z_meso_path)
+        # defines self.grid & self.z_meso properties
+        if isinstance(z_meso_path, VerticalGrid):
+            self.grid = z_meso_path
+            self.z_meso = self.grid.z_meso
+        else:
+            self.load_z_meso(z_meso_path)
 
         self.lat = lat                  # latitude (deg)
         self.lon = lon                  # longitude (deg)
@@ -57,50 +79,14 @@ class RSMDef(object):
         self.disp = 0.5 * height        # rural displacement lenght (m)
 
         # vertical grid at the rural site
-        self.z  = [0 for x in range(len(self.z_meso)-1)] # Midht btwn each distance interval
-        self.dz = [0 for x in range(len(self.z_meso)-1)] # Distance betweeen each interval
-
-        for zi in range(len(self.z_meso)-1):
-            self.z[zi] = 0.5 * (self.z_meso[zi] + self.z_meso[zi+1])
-            self.dz[zi] = self.z_meso[zi+1] - self.z_meso[zi]
-
-        # Define initial booleans
-        ll = True
-        mm = True
-        nn = True
-        oo = True
-        pp = True
-
-        # Define self.nz0, self.nzref, self.nzfor, self.nz10, self.nzi
-        for iz in range(len(self.z_meso)-1):
-            # self.nz0: self.z index >= reference height for weather station
-            eq_th = self.is_near_zero(self.z[iz] - parameter.tempHeight)
-            if (eq_th == True or self.z[iz] > parameter.tempHeight) and ll==True:
-                self.nz0 = iz+1   # layer number at zmt (m)
-                ll = False
-
-            # self.nzref: self.z index >= reference inversion height
-            eq_rh = self.is_near_zero(self.z[iz] - parameter.refHeight)
-            if (eq_rh == True or self.z[iz] > parameter.refHeight) and mm==True:
-              self.nzref = iz+1   # layer number at zref (m)
-              mm = False
-
-            # self.nzfor: self.z index >= nighttime boundary layer height
-            eq_nh = self.is_near_zero(self.z[iz] - parameter.nightBLHeight)
-            if (eq_nh == True or self.z[iz] > parameter.nightBLHeight) and nn==True:
-              self.nzfor = iz+1   # layer number at zfor (m)
-              nn = False
-
-            # self.nz10: self.z index >= wind height
-            eq_wh = self.is_near_zero(self.z[iz] - parameter.windHeight)
-            if (eq_wh == True or self.z[iz] > parameter.windHeight) and oo==True:
-              self.nz10 = iz+1    # layer number at zmu (m)
-              oo = False
-
-            eq_dh = self.is_near_zero(self.z[iz] - parameter.dayBLHeight)
-            if (eq_dh == True or self.z[iz] > parameter.dayBLHeight) and pp==True:
-              self.nzi = iz+1     # layer number at zi_d (m)
-              pp = False
+        self.z  = self.grid.z   # Midht btwn each distance interval
+        self.dz = self.grid.dz  # Distance betweeen each interval
+
+        self.nz0 = self.grid.layer(parameter.tempHeight)        # layer number at zmt (m)
+        self.nzref = self.grid.layer(parameter.refHeight)       # layer number at zref (m)
+        self.nzfor = self.grid.layer(parameter.nightBLHeight)   # layer number at zfor (m)
+        self.nz10 = self.grid.layer(parameter.windHeight)       # layer number at zmu (m)
+        self.nzi = self.grid.layer(parameter.dayBLHeight)       # layer number at zi_d (m)
 
         # Define temperature, pressure and density vertical profiles
         self.tempProf = [T_init for x in range(self.nzref)]
@@ -138,25 +124,18 @@ class RSMDef(object):
         return abs(float(num)) < eps
 
     def load_z_meso(self,z_meso_path):
-        """ Open the z_meso.txt file and return heights as list """
-
-        self.z_meso = []
-        z_meso_file_path = os.path.join(z_meso_path, self.Z_MESO_FILE_NAME)
-
-        # Check if exists
-        if not os.path.exists(z_meso_file_path):
-            raise Exception("z_meso.txt file: '{}' does not exist.".format(uwg_param_file))
+        """ Read the vertical grid of the z_meso.txt file (once per process, see VerticalGrid) """
 
-        f = open(z_meso_file_path,'r')
-        for txtline in f:
-            z_ = float("".join(txtline.split())) # Strip all white spaces and change to float
-            self.z_meso.append(z_)
-        f.close()
+        self.grid = VerticalGrid.from_file(os.path.join(z_meso_path, self.Z_MESO_FILE_NAME))
+        self.z_meso = self.grid.z_meso
 
 
     # Ref: The uwg (2012), Eq. (4)
     def VDM(self,forc,rural,parameter,simTime):
 
+        if self.kernel == "array":
+            return self.VDM_array(forc,rural,parameter,simTime)
+
         self.tempProf[0] = forc.temp    # Lower boundary condition
 
         # compute pressure profile
@@ -209,6 +188,229 @@ class RSMDef(object):
             self.ublPres = self.ublPres + \
                 self.presProf[iz]*self.dz[iz]/(self.z[self.nzref-1]+self.dz[self.nzref-1]/2.)
 
+    def VDM_array(self,forc,rural,parameter,simTime):
+        """
+        VDM with the profiles updated as whole lists, the Bougeault length scales found
+        from cumulative sums (see DissipationBougeault_array) and the diffusion equation
+        solved in a tridiagonal matrix that is kept between time steps.
+
+        The numerics are the same as VDM. The pressure, density and temperature profiles
+        match it exactly, the length scales within rounding of the cumulative sums.
+        """
+        nz = self.nzref
+        if self._work is None:
+            self._init_work()
+        work = self._work
+        dz = self.dz
+        rcp = parameter.r/parameter.cp
+
+        tempProf = self.tempProf
+        presProf = self.presProf
+        tempProf[0] = forc.temp         # Lower boundary condition
+
+        # compute pressure profile
+        gp = parameter.g/parameter.cp*(math.pow(forc.pres,rcp))
+        for iz in range(nz-1,0,-1):
+            presProf[iz-1] = (math.pow(presProf[iz],rcp) + \
+                gp*(1./tempProf[iz] + 1./tempProf[iz-1])*0.5*dz[iz])**(1./rcp)
+
+        # compute the real temperature and density profiles
+        self.tempRealProf = [t*(p/forc.pres)**rcp for t, p in zip(tempProf, presProf)]
+        self.densityProfC = [p/parameter.r/t for p, t in zip(presProf, self.tempRealProf)]
+        dC = self.densityProfC
+        self.densityProfS = [dC[0]] + \
+            [(dC[iz]*dz[iz-1] + dC[iz-1]*dz[iz])/work["dzs"][iz] for iz in range(1,nz)] + \
+            [dC[nz-1]]
+
+        # Ref: The uwg (2012), Eq. (5)
+        # compute diffusion coefficient
+        cd,ustarRur = self.DiffusionCoefficient_array(dC[0],rural.sens,forc.wind,parameter)
+
+        # solve diffusion equation
+        self.tempProf = self.DiffusionEquation_array(simTime.dt,cd)
+
+        # compute wind profile
+        self.windProf = [ustarRur/parameter.vk*lz for lz in work["logz"]]
+
+        # Average pressure
+        self.ublPres = 0.
+        for iz in range(self.nzfor):
+            self.ublPres = self.ublPres + \
+                presProf[iz]*dz[iz]/(self.z[nz-1]+dz[nz-1]/2.)
+
+    def _init_work(self):
+        """ Constants of the vertical grid and tridiagonal matrix used by VDM_array """
+        nz = self.nzref
+        z, dz = self.z, self.dz
+
+        dzt = [(dz[iz+1]+dz[iz])/2. for iz in range(nz-1)]  # distance between layer centers
+        dcum = [0.]                                         # cumulative sum of dzt
+        for d in dzt:
+            dcum.append(dcum[-1] + d)
+
+        self._work = {
+            "dzt": dzt,
+            "dcum": dcum,
+            "dzs": [None] + [dz[iz-1]+dz[iz] for iz in range(1,nz)],
+            "dlg": [(z[iz]+z[iz+1])/2. for iz in range(nz)],
+            # N.B. log of a negative value for obstacle heights ~4m (see VDM)
+            "logz": [math.log((z[iz]-self.disp)/self.z0r) for iz in range(nz)],
+            "cddz": [0. for iz in range(nz+1)],
+            "lower": [0. for iz in range(nz)],
+            "diag": [0. for iz in range(nz)],
+            "upper": [0. for iz in range(nz)],
+            "rhs": [0. for iz in range(nz)],
+            }
+
+    def DiffusionCoefficient_array(self,rho,heatRur,uref,parameter):
+        """ DiffusionCoefficient of the RSM profiles, with the length scales of
+        DissipationBougeault_array """
+        nz = self.nzref
+        tempRur = self.tempProf[0]
+
+        # Friction velocity (Louis 1979)
+        ustar = parameter.vk * uref/math.log((10.-self.disp)/self.z0r)
+
+        # Monin-Obukhov length
+        lengthRur = max(-rho*parameter.cp*ustar**3*tempRur/parameter.vk/parameter.g/heatRur,-50.)
+
+        # Unstable conditions
+        if heatRur > 1e-2:
+            # Convective velocity scale
+            wstar = (parameter.g*heatRur*parameter.dayBLHeight/rho/parameter.cp/tempRur)**(1/3.)
+            # Wind profile function
+            phi_m = (1-8.*0.1*parameter.dayBLHeight/lengthRur)**(-1./3.)
+            # Mixed-layer velocity scale & TKE approximation
+            ws = [(ustar**3 + phi_m*parameter.vk*wstar**3*zi/parameter.dayBLHeight)**(1/3.)
+                  for zi in self.z[:nz]]
+            te = [max(w**2., 0.01) for w in ws]
+        else: # Stable and neutral conditions
+            te = [max(ustar**2.,0.01)] * nz
+
+        # lenght scales (l_up, l_down, l_k)
+        self.dlu, self.dld = self.DissipationBougeault_array(parameter.g,te,self.tempProf)
+        self.dld = [min(d, g) for d, g in zip(self.dld, self._work["dlg"])]
+        dlk = [min(u, d) for u, d in zip(self.dlu, self.dld)]
+
+        # Boundary-layer diffusion coefficient
+        Kt = [0.4*l*math.sqrt(t) for l, t in zip(dlk, te)]
+        Kt.append(Kt[nz-1])
+
+        return Kt, ustar
+
+    def DissipationBougeault_array(self,g,te,pt):
+        """
+        Upward & downward length scales of DissipationBougeault.
+
+        The buoyancy integral from level iz to level k is
+            beta*((scum[k] - scum[iz]) - (pt[iz] - pt[0])*(dcum[k] - dcum[iz]))
+        with the cumulative sums scum of the mean potential temperature anomaly (from
+        pt[0]) times the distance between layer centers, and dcum of the distance.
+
+        Only the last crossing of te by the integral (the one that DissipationBougeault
+        keeps) is resolved, see _last_crossing. The integral cannot decrease beyond the
+        last layer cooler (upward) or warmer (downward) than level iz, which is found by
+        bisection of the running min & max of the layer temperatures.
+        """
+        nz = self.nzref
+        z, dz = self.z, self.dz
+        dzt, dcum = self._work["dzt"], self._work["dcum"]
+
+        pt0 = pt[0]
+        pm = [(pt[iz+1]+pt[iz])/2. for iz in range(nz-1)]   # mean potential temperature
+        scum = [0.]
+        for iz in range(nz-1):
+            scum.append(scum[-1] + (pm[iz]-pt0)*dzt[iz])
+
+        # Coolest layer above & warmest layer below each layer (both non-decreasing)
+        pmin_up = pm[:]
+        for iz in range(nz-3,-1,-1):
+            pmin_up[iz] = min(pm[iz], pmin_up[iz+1])
+        pmax_do = pm[:]
+        for iz in range(1,nz-1):
+            pmax_do[iz] = max(pm[iz], pmax_do[iz-1])
+
+        dlu = [0. for x in range(nz)]
+        dld = [0. for x in range(nz)]
+
+        for iz in range(nz):
+            beta = g/pt[iz]
+            tei = te[iz]
+            s0 = scum[iz]
+            d0 = dcum[iz]
+            p0 = pt[iz]
+            q0 = p0 - pt0
+
+            # upward: integral to the top of layer izz = iz+j, for j = 0 ... nz-2-iz
+            dlu[iz] = z[nz] - z[iz] - dz[iz]/2.
+            if iz < nz-1:
+                hit = _last_crossing(tei, nz-1-iz, bisect_left(pmin_up, p0, iz, nz-1) - iz,
+                    lambda j: beta*((scum[iz+1+j]-s0) - q0*(dcum[iz+1+j]-d0)),
+                    lambda n: [beta*((s-s0) - q0*(d-d0))
+                               for s, d in zip(scum[iz+1:iz+1+n], dcum[iz+1:iz+1+n])])
+                if hit is not None:
+                    izz = iz + hit[0]
+                    zup_inf = hit[1]
+                    bbb = (pt[izz+1]-pt[izz])/dzt[izz]
+                    if not self.is_near_zero(bbb-0.):
+                        tl = (-beta*(pt[izz]-p0) + \
+                            math.sqrt(max(0.,(beta*(pt[izz]-p0))**2.+ \
+                            2.*bbb*beta*(tei-zup_inf))))/bbb/beta
+                    else:
+                        tl = (tei-zup_inf)/(beta*(pt[izz]-p0))
+                    dlu[iz] = max(1.,dcum[izz+1]-d0-dzt[izz]+tl)
+
+            # downward: integral to the bottom of layer izz = iz-j, for j = 0 ... iz-1
+            dld[iz] = z[iz] + dz[iz]/2.
+            if iz > 0:
+                hit = _last_crossing(tei, iz, iz - bisect_right(pmax_do, p0, 0, iz),
+                    lambda j: beta*(q0*(d0-dcum[iz-1-j]) - (s0-scum[iz-1-j])),
+                    lambda n: [beta*(q0*(d0-d) - (s0-s))
+                               for s, d in zip(scum[iz-n:iz][::-1], dcum[iz-n:iz][::-1])])
+                if hit is not None:
+                    izz = iz - hit[0]
+                    zdo_sup = hit[1]
+                    bbb = (pt[izz]-pt[izz-1])/dzt[izz-1]
+                    if not self.is_near_zero(bbb-0.):
+                        tl = (beta*(pt[izz]-p0) + \
+                            math.sqrt(max(0.,(beta*(pt[izz]-p0))**2.+ \
+                            2.*bbb*beta*(tei-zdo_sup))))/bbb/beta
+                    else:
+                        tl = (tei-zdo_sup)/(beta*(pt[izz]-p0))
+                    dld[iz] = max(1.,d0-dcum[izz-1]-dzt[izz-1]+tl)
+
+        return dlu,dld
+
+    def DiffusionEquation_array(self,dt,cd):
+        """ DiffusionEquation of the RSM profiles, solved in the reused tridiagonal matrix """
+        nz = self.nzref
+        work = self._work
+        dz, da, daz = self.dz, self.densityProfC, self.densityProfS
+        cddz, a0, a1, a2, c = work["cddz"], work["lower"], work["diag"], work["upper"], work["rhs"]
+
+        cddz[0] = daz[0]*cd[0]/dz[0]
+        for iz in range(1,nz):
+            cddz[iz] = 2.*daz[iz]*cd[iz]/work["dzs"][iz]
+        cddz[nz] = daz[nz]*cd[nz]/dz[nz]
+
+        a0[0], a1[0], a2[0], c[0] = 0., 1., 0., self.tempProf[0]
+        for iz in range(1,nz-1):
+            dzv = dz[iz]
+            a0[iz] = -cddz[iz]*dt/dzv/da[iz]
+            a1[iz] = 1+dt*(cddz[iz]+cddz[iz+1])/dzv/da[iz]
+            a2[iz] = -cddz[iz+1]*dt/dzv/da[iz]
+            c[iz] = self.tempProf[iz]
+        a0[nz-1], a1[nz-1], a2[nz-1], c[nz-1] = -1., 1., 0., 0.
+
+        # Same elimination as invert
+        for i in range(nz-2,-1,-1):
+            c[i] = c[i] - a2[i] * c[i+1]/a1[i+1]
+            a1[i] = a1[i] - a2[i] * a0[i+1]/a1[i+1]
+        for i in range(1,nz):
+            c[i] = c[i] - a0[i] * c[i-1]/a1[i-1]
+
+        return [c[i]/a1[i] for i in range(nz)]
+
     def DiffusionEquation(self,nz,dt,co,da,daz,cd,dz):
 
         cddz = [0 for i in range(nz+2)]
@@ -385,3 +587,42 @@ class RSMDef(object):
             X[i] = C[i]/A[i][1]
 
         return X
+
+
+def _last_crossing(te, n, j0, integral, integrals):
+    """
+    Last step j of a buoyancy integral that goes from below te to above it, as tested
+    by DissipationBougeault.
+
+    args:
+        te          # turbulent kinetic energy
+        n           # number of steps
+        j0          # first step from which the integral does not decrease
+        integral    # function of the integral at the end of step j (0 before step 0)
+        integrals   # function of the list of integrals at the end of the first j steps
+    returns:
+        (j, integral before step j), None if te is never crossed
+    """
+    if j0 < n and integral(n-1) > te:
+        # In the non-decreasing part only the end of the last step below te can cross it
+        lo, hi = j0, n
+        while lo < hi:
+            mid = (lo+hi)//2
+            if te-integral(mid) > -1e-16:
+                lo = mid+1
+            else:
+                hi = mid
+        j = min(lo, n-1)
+        before = integral(j-1) if j else 0.
+        if te < integral(j) and te-before > -1e-16:
+            return j, before
+
+    values = integrals(min(j0, n))
+    if not values or max(values) <= te:
+        return None
+    hits = [j for j, lo, hi in zip(range(len(values)), [0.]+values, values)
+            if te < hi and te-lo > -1e-16]
+    if not hits:
+        return None
+    j = hits[-1]
+    return j, values[j-1] if j else 0.
@@ -27,10 +27,19 @@ class UBLDef(object):
         sensHeat;       % sensible heat flux (W m-2)
         dayBLHeight;    % daytime mixing height, orig = 700
         nightBLHeight;  % Sing: 80, Bub-Cap: 50, nighttime boundary-layer height (m); orig 80
+        kernel;         % UBLModel implementation, 'loop' or 'array' (see UBLModel_array)
     end
     """
 
-    def __init__(self,location,charLength,initialTemp,maxdx,dayBLHeight,nightBLHeight):
+    KERNELS = ("loop", "array")
+    KERNEL_MSG = "UBL kernel must be one of {}. Got '{}'."
+    CELLS_MSG = "ublTempdx has {} cells, the night advection sweeps {}."
+
+    def __init__(self,location,charLength,initialTemp,maxdx,dayBLHeight,nightBLHeight,kernel="loop"):
+        if kernel not in self.KERNELS:
+            raise Exception(self.KERNEL_MSG.format(self.KERNELS, kernel))
+        self.kernel = kernel
+
         self.location = location                                    # relative location within a city (N,NE,E,SE,S,SW,W,NW,C)
         self.charLength = charLength                                # characteristic length of the urban area (m)
         self.perimeter = 4. * charLength
@@ -48,6 +57,11 @@ class UBLDef(object):
         # Logger will be disabled by default unless explicitly called in tests
         self.logger = logging.getLogger(__name__)
 
+        # UBLModel_array: grid constants of the density averages, and index of the first
+        # cell of the uniform end of ublTempdx
+        self._work = None
+        self._uniform = 0
+
     def __repr__(self):
         return "UBL: urbArea {}m2, charLength {}m".format(
             self.urbArea,
@@ -59,6 +73,9 @@ class UBLDef(object):
 
     def UBLModel(self,UCM,RSM,rural,forc,parameter,simTime):
         # Note that only one urban canyon area is considered
+        if self.kernel == "array":
+            return self.UBLModel_array(UCM,RSM,rural,forc,parameter,simTime)
+
         self.sensHeat = UCM.sensHeat
         heatDif = max(self.sensHeat - rural.sens,0)
         Cp = parameter.cp                           # Heat capacity of air (J/kg.K)
@@ -89,7 +106,7 @@ class UBLDef(object):
                 or (sunlight > nightlimit) and (time > noon) or (self.sensHeat > 150.0)
         if is_day:
             # Circulation velocity per Bueno 'the uwg', eq 8
-            self.logger.debug("{} Day ubl calcs".format(__name__))
+            self.logger.debug("%s Day ubl calcs", __name__)
             h_UBL = self.dayBLHeight            # Day boundary layer height
             eqTemp = RSM.tempProf[RSM.nzref-1]
             eqWind = RSM.windProf[RSM.nzref-1]
@@ -112,13 +129,13 @@ class UBLDef(object):
         # Night
         # ---------------------------------------------------------------------
         else:
-            self.logger.debug("{} Night ubl calcs".format(__name__))
+            self.logger.debug("%s Night ubl calcs", __name__)
             h_UBL = self.nightBLHeight      # Night boundary layer height
             Csurf = UCM.Q_ubl*simTime.dt/(h_UBL*refDens*Cp)
             self.ublTemp, self.ublTempdx = self.NightForc(self.ublTempdx,simTime.dt, \
                 h_UBL,self.paralLength,self.charLength,RSM,Csurf)
 
-        self.logger.debug("ublTemp = {}".format(self.ublTemp))
+        self.logger.debug("ublTemp = %s", self.ublTemp)
 
     def NightForc(self,ublTempdx,dt,h_UBL,paralLength,charLength,RSM,Csurf):
         # Night forcing (RSM.nzfor = number of layers of forcing)
@@ -147,3 +164,108 @@ class UBLDef(object):
         ublTemp = ublTemp/float(charLength)*float(paralLength)
 
         return ublTemp, ublTempdx
+
+    def UBLModel_array(self,UCM,RSM,rural,forc,parameter,simTime):
+        """
+        UBLModel with the density averages & night advection integrals summed over lists
+        of the profiles, ublTempdx updated in place, and the night advection only swept
+        over the cells of ublTempdx until it reaches its uniform end (see NightForc_array).
+        The results are those of UBLModel.
+        """
+        self.sensHeat = UCM.sensHeat
+        heatDif = max(self.sensHeat - rural.sens,0)
+        Cp = parameter.cp                           # Heat capacity of air (J/kg.K)
+        k_w = parameter.circCoeff                   # k_w per Bueno 'the uwg', eq 8
+        g = parameter.g                             # Gravity
+        v_wind = max(forc.wind,parameter.windMin)   # wind velocity
+
+        # Layer thicknesses & height of the average over the reference layers (forDens of
+        # UBLModel is not used)
+        if self._work is None or self._work[0] is not RSM.dz:
+            nzref = RSM.nzref
+            self._work = (RSM.dz, RSM.dz[:nzref], RSM.z[nzref-1] + RSM.dz[nzref-1]/2.)
+        _dz, dzref, href = self._work
+
+        # Air density
+        refDens = sum([d * dz / href for d, dz in zip(RSM.densityProfC, dzref)])
+
+        time = simTime.secDay/3600.
+        noon = 12.
+        daylimit = parameter.dayThreshold      # sunlight threshold for day (~150W/m^2)
+        nightlimit = parameter.dayThreshold    # sunlight threshold for night (~50W/m^2)
+        sunlight = forc.dir + forc.dif
+
+        is_day = (sunlight > daylimit) and (time < noon or self.is_near_zero(time-noon)) \
+                or (sunlight > nightlimit) and (time > noon) or (self.sensHeat > 150.0)
+        if is_day:
+            self.logger.debug("%s Day ubl calcs", __name__)
+            h_UBL = self.dayBLHeight            # Day boundary layer height
+            eqTemp = RSM.tempProf[RSM.nzref-1]
+            eqWind = RSM.windProf[RSM.nzref-1]
+
+            Csurf = UCM.Q_ubl*simTime.dt/(h_UBL*refDens*Cp)
+            u_circ = k_w*(g*heatDif/Cp/refDens/eqTemp*h_UBL)**(1./3.)
+
+            if v_wind > u_circ:   # Forced problem (usually this)
+                advCoef  = self.orthLength*eqWind*simTime.dt/self.urbArea*1.4
+                self.ublTemp = (Csurf + advCoef * eqTemp + self.ublTemp)/(1. + advCoef)
+            else:                   # Convective problem
+                advCoef  = self.perimeter*u_circ*simTime.dt/self.urbArea*1.4
+                self.ublTemp = (Csurf+advCoef*eqTemp + self.ublTemp)/(1 + advCoef)
+
+            # Well mixed boundary layer
+            self.ublTempdx[:] = [self.ublTemp] * len(self.ublTempdx)
+            self._uniform = 0
+        else:
+            self.logger.debug("%s Night ubl calcs", __name__)
+            h_UBL = self.nightBLHeight      # Night boundary layer height
+            Csurf = UCM.Q_ubl*simTime.dt/(h_UBL*refDens*Cp)
+            self.ublTemp = self.NightForc_array(simTime.dt,h_UBL,RSM,Csurf)
+
+        self.logger.debug("ublTemp = %s", self.ublTemp)
+
+    def NightForc_array(self,dt,h_UBL,RSM,Csurf):
+        """
+        NightForc of ublTempdx in place, built as a new list of the cells. Each cell relaxes
+        towards the one upwind of it, so once a cell of the uniform end of ublTempdx (from
+        self._uniform) has the value of the cell before it, so have all the following cells,
+        and they are set at once.
+        """
+        ublTempdx = self.ublTempdx
+        paralLength = self.paralLength
+        nzfor = RSM.nzfor
+        windProf = RSM.windProf[:nzfor]
+        dz = RSM.dz[:nzfor]
+
+        intAdv1 = sum([w * t * d for w, t, d in zip(windProf, RSM.tempProf, dz)])
+        advCoef1 = 1.4*dt/paralLength/h_UBL*intAdv1
+        intAdv2 = sum([w * d for w, d in zip(windProf, dz)])
+        advCoef2 = 1.4*dt/paralLength/h_UBL*intAdv2
+        denom = 1 + advCoef2
+
+        prev = (Csurf + advCoef1 + ublTempdx[0])/denom
+        cells = [prev]
+        append = cells.append
+
+        # As NightForc, which indexes the cells of ublTempdx, fail rather than grow it
+        n = int(self.charLength)//int(paralLength)
+        if n > len(ublTempdx):
+            raise IndexError(self.CELLS_MSG.format(len(ublTempdx), n))
+        uniform = max(self._uniform, 0)
+        for x in ublTempdx[1:uniform+1]:
+            prev = (Csurf + advCoef2*prev + x)/denom
+            append(prev)
+        for x in ublTempdx[uniform+1:n]:
+            x = (Csurf + advCoef2*prev + x)/denom
+            if x == prev:
+                break
+            append(x)
+            prev = x
+
+        # ublTempdx is uniform from the last cell computed
+        self._uniform = len(cells) - 1
+        cells.extend([prev] * (n - len(cells)))
+        ublTempdx[:n] = cells
+
+        # Summed in the order of NightForc
+        return sum(cells)/float(self.charLength)*float(paralLength)
@@ -61,7 +61,7 @@ class UCMDef(object):
         treeSensHeat;  % sensible heat from trees (W m-2)
         sensHeat;      % urban sensible heat (W m-2)
         latHeat;       % urban latent heat (W m-2)
-        windProf;      % urban wind profile
+        windProf;      % urban wind profile at the RSM levels of the current time step (m s-1)
         Q_roof;        % sensible heat flux from building roof (convective)
         Q_wall;        % sensible heat flux from building wall (convective)
         Q_window;      % sensible heat flux from building window (via U-factor)
@@ -133,7 +133,7 @@ class UCMDef(object):
         self.sensHeat = 0.0                                         # urban sensible heat [W m-2]
         # Variables set in urbflux()
         self.latHeat = None                                         # urban latent heat [W m-2]
-        self.windProf = []                                          # wind profile
+        self.windProf = []                                          # wind profile, one value per RSM level
         self.canRHum = None
         self.Tdp = None
 
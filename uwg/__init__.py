@@ -4,28 +4,40 @@ __version__ = '5.3.2'
 
 from .simparam import SimParam
 from .weather import Weather
+from .epw import EPW
 from .building import Building
 from .material import Material
 from .element import Element
 from .BEMDef import BEMDef
 from .schdef import SchDef
+from .schtable import SchTable
 from .param import Param
 from .UCMDef import UCMDef
 from .forcing import Forcing
 from .UBLDef import UBLDef
+from .verticalgrid import VerticalGrid
 from .RSMDef import RSMDef
 from .solarcalcs import SolarCalcs
 
 from .readDOE import readDOE
+from .readDOE import DOELibrary
 from .infracalcs import infracalcs
 from .urbflux import urbflux
+from .recorder import Recorder
+from .profiler import Profiler
+from .geometry import Footprints
+from .trace import set_trace_level
 
 from .uwg import uwg
 from .uwg import procMat
+from .batch import uwgBatch
+from .ensemble import run_ensemble
 
 
 __all__ = [
     "uwg",
+    "batch",
+    "ensemble",
     "utilities",
     "material",
     "element",
@@ -35,9 +47,17 @@ __all__ = [
     "param",
     "psychrometrics",
     "schdef",
+    "schtable",
     "simparam",
     "UCMDef",
     "urbflux",
+    "recorder",
+    "profiler",
+    "checkpoint",
+    "geometry",
+    "trace",
     "weather",
+    "epw",
     "RSMDef",
+    "verticalgrid",
     ]
@@ -0,0 +1,207 @@
+"""Morph one rural EPW file for many sets of urban parameters in lock-step."""
+from __future__ import division, print_function
+
+try:
+    range = xrange
+except NameError:
+    pass
+
+import os
+
+from .uwg import uwg
+
+
+def new_case(epwFileName, params, index, uwgParamFileName=None, epwDir=None,
+             uwgParamDir=None, destinationDir=None):
+    """Create a uwg object with the inputs of the .uwg file overridden by params.
+
+    args:
+        params: A dictionary of uwg attribute names and values. It can also carry a
+            'destinationFileName' for the morphed EPW, which defaults to
+            "<epw name>_UWG_<index>.epw".
+        index: The position of the case in its batch or ensemble.
+    """
+    params = dict(params)
+    epw_name = os.path.splitext(os.path.basename(epwFileName))[0]
+    destinationFileName = params.pop(
+        'destinationFileName', '{}_UWG_{}.epw'.format(epw_name, index))
+    case = uwg(epwFileName, uwgParamFileName, epwDir, uwgParamDir,
+               destinationDir, destinationFileName)
+
+    for key, val in params.items():
+        if not hasattr(case, key):
+            raise AttributeError("uwg has no input parameter '{}'.".format(key))
+        setattr(case, key, val)
+    return case
+
+
+class uwgBatch(object):
+    """Run many uwg cases that share one rural EPW file together, one time step at a time.
+
+    Each case keeps its own urban canyon (UCM), urban boundary layer (UBL) and building
+    (BEM) objects. Everything that does not depend on the urban parameters is calculated
+    once per time step and shared between the cases:
+
+        simTime     # one simulation calendar for all cases
+        weather     # rural weather data and hourly forcing lists (weather, forcIP)
+        forc        # time step forcing, rural road element and rural site model (RSM),
+        rural       # shared by all cases with equal RURAL_PARAMETERS. The rural surface
+        RSM         # flux and vertical diffusion model run once per group of cases.
+
+    The shared calculations receive exactly the same inputs as in a single uwg.simulate()
+    run, so the output of every case matches uwg.simulate() within TOLERANCE (it is
+    identical in practice). Wall time grows sub-linearly with the number of cases since
+    the rural model, which is the most expensive part of a time step for small cities,
+    is only solved once per group.
+
+    Each case is spun up on its own (spinup_days, see uwg.warm_start) before the rural
+    models are shared, and writes its own checkpoints (checkpoint_days), which uwg.resume
+    continues as a single case.
+
+    args:
+        epwFileName: The name of the rural epw file that will be morphed.
+        param_sets: A list of cases. Each case is either a dictionary of uwg attribute
+            names and values (i.e. {'bldDensity': 0.4, 'verToHor': 0.8}) that override
+            the inputs of the .uwg file, or a uwg object that has not been initialized.
+            A dictionary can also carry a 'destinationFileName' for the morphed EPW.
+        uwgParamFileName: The name of the uwg Parameter File (.uwg) used by all cases.
+        epwDir: The directory in which the rural EPW file sits.
+        uwgParamDir: The directory in which the uwg Parameter File (.uwg) sits.
+        destinationDir: Optional destination directory for the morphed EPW files.
+
+    properties:
+        cases       # list of uwg objects, in the order of param_sets
+        groups      # list of lists of uwg objects that share their rural model
+    """
+
+    TOLERANCE = 1e-8   # max absolute difference (K) between batch & single case canyon temperature
+
+    # Parameters that must be equal for all cases
+    SIMULATION_PARAMETERS = ('Month', 'Day', 'nDay', 'dtSim', 'dtWeather')
+
+    # Parameters that define the forcing, rural road element and rural site model
+    RURAL_PARAMETERS = ('alb_road', 'd_road', 'kRoad', 'cRoad', 'rurVegCover', 'h_obs',
+                        'h_ubl1', 'h_ubl2', 'h_ref', 'h_temp', 'h_wind', 'windMin',
+                        'vegStart', 'vegEnd', 'albVeg', 'latGrss', 'vdm_kernel',
+                        'z_meso_dir_path', 'vertical_grid', 'forcing_mode', 'spinup_days')
+
+    PARAMETER_CONFLICT_MSG = "All cases of a uwgBatch must have the same {}. Got {} and {}."
+    EPW_CONFLICT_MSG = "All cases of a uwgBatch must have the same rural EPW weather. Got '{}' and '{}'."
+
+    def __init__(self, epwFileName, param_sets, uwgParamFileName=None, epwDir=None,
+                 uwgParamDir=None, destinationDir=None):
+
+        self.cases = [params if isinstance(params, uwg) else
+                      new_case(epwFileName, params, i, uwgParamFileName, epwDir,
+                               uwgParamDir, destinationDir)
+                      for i, params in enumerate(param_sets)]
+
+        self.groups = []
+
+    def __repr__(self):
+        return "uwgBatch: {} cases, {} rural groups".format(len(self.cases), len(self.groups))
+
+    def setup(self):
+        """ Initialize all cases and share the calendar, weather and rural models between them. """
+
+        epw = None
+        for case in self.cases:
+            # Cases of the same EPW file share its EPW object, the weather of any other
+            # file must be the same as the shared one
+            path = os.path.abspath(os.path.join(case.epwDir, case.epwFileName))
+            if case.epw is None and epw is not None and epw.epw_file_path is not None and \
+                    os.path.abspath(epw.epw_file_path) == path:
+                case.epw = epw
+            case.read_epw()
+            if epw is None:
+                epw = case.epw
+            elif case.epw is not epw and case.epw.digest() != epw.digest():
+                raise Exception(self.EPW_CONFLICT_MSG.format(epw.epw_file_path or "<epw lines>",
+                                                             case.epw.epw_file_path or "<epw lines>"))
+            case.set_input()
+            case.init_BEM_obj()
+            case.init_input_obj()
+            case.hvac_autosize()
+            # The spin-up of each case (see uwg.warm_start), before its rural models are
+            # shared with the other cases of its group, which are spun up the same way
+            case.warm_start()
+
+        first = self.cases[0]
+        for case in self.cases[1:]:
+            for key in self.SIMULATION_PARAMETERS:
+                if getattr(case, key) != getattr(first, key):
+                    raise Exception(self.PARAMETER_CONFLICT_MSG.format(
+                        key, getattr(first, key), getattr(case, key)))
+
+        self.simTime = first.simTime
+        self.groups = []
+        leaders = {}
+
+        for case in self.cases:
+            case.simTime = self.simTime
+            case.weather = first.weather
+            case.forcIP = first.forcIP
+
+            key = tuple(getattr(case, p) for p in self.RURAL_PARAMETERS)
+            if key not in leaders:
+                leaders[key] = case
+                self.groups.append([case])
+                continue
+
+            leader = leaders[key]
+            case.forc = leader.forc
+            case.rural = leader.rural
+            case.RSM = leader.RSM
+            self.groups[[g[0] for g in self.groups].index(leader)].append(case)
+
+    def simulate(self):
+        """ Advance all cases together through every simulation time step. """
+
+        leaders = [group[0] for group in self.groups]
+
+        for case in self.cases:
+            case.init_simulation()
+
+        nt = self.simTime.nt
+        checkpoint_steps = [int(round(case.checkpoint_days * 86400. / self.simTime.dt))
+                            for case in self.cases]
+
+        for it in range(1, nt, 1):
+            for leader in leaders:
+                leader.update_ground_temperature()
+
+            self.simTime.UpdateDate()
+
+            for leader in leaders:
+                leader.update_forcing(it)
+
+            for case in self.cases:
+                case.update_solar_and_schedules()
+
+            for leader in leaders:
+                leader.update_rural()
+
+            for case in self.cases:
+                case.update_urban()
+                case.record_output()
+
+            # Checkpoints of the cases, as uwg.simulate_steps writes them, once all cases
+            # are at the same time step. Each can be resumed on its own (see uwg.resume).
+            for case, steps in zip(self.cases, checkpoint_steps):
+                if steps > 0 and it % steps == 0 and it < nt - 1:
+                    case.write_checkpoint(it + 1)
+
+        for case in self.cases:
+            case.end_simulation()
+
+    def write_epw(self):
+        """ Write the morphed EPW file of every case. """
+
+        for case in self.cases:
+            case.write_epw()
+
+    def run(self):
+
+        self.setup()
+        self.simulate()
+        self.write_epw()
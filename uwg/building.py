@@ -1,10 +1,20 @@
 from __future__ import division, print_function
 
 from .psychrometrics import psychrometrics, moist_air_density
+from .psychrometrics import relative_humidity_array, moist_air_density_array
 import logging
 from math import isnan
 import sys
 
+try:
+    range = xrange
+except NameError:
+    pass
+
+# Indoor heat convection coefficients of the walls & mass (W m-2 K-1), of both BEM kernels
+ZAC_IN_WALL = 3.076
+ZAC_IN_MASS = 3.076
+
 
 class Building(object):
     """
@@ -122,12 +132,23 @@ class Building(object):
             c=self.Zone
             )
 
+    def __getstate__(self):
+        # The logger is not pickled or copied, __setstate__ gets the module logger back.
+        # The loggers pickled in readDOE.pkl are not registered, so can't be copied.
+        state = self.__dict__.copy()
+        state.pop('logger', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.logger = logging.getLogger(__name__)
+
     def is_near_zero(self,val,tol=1e-14):
         return abs(float(val)) < tol
 
     def BEMCalc(self,UCM,BEM,forc,parameter,simTime):
 
-        self.logger.debug("Logging at {} {}".format(__name__, self.__repr__()))
+        self.logger.debug("Logging at %s %r", __name__, self)
 
         # Building Energy Model
         self.ElecTotal = 0.0                            # total electricity consumption - (W/m^2) of floor
@@ -161,21 +182,21 @@ class Building(object):
         # Set temperature set points according to night/day setpoints in building schedule & simTime hr
         isEqualNightStart = self.is_near_zero((simTime.secDay/3600.) - parameter.nightSetStart)
         if simTime.secDay/3600. < parameter.nightSetEnd or (simTime.secDay/3600. > parameter.nightSetStart or isEqualNightStart):
-            self.logger.debug("{} Night setpoints @{}".format(__name__,simTime.secDay/3600.))
+            self.logger.debug("%s Night setpoints @%s", __name__, simTime.secDay/3600.)
 
             T_cool = self.coolSetpointNight
             T_heat = self.heatSetpointNight
             self.intHeat = self.intHeatNight * self.nFloor
         else:
-            self.logger.debug("{} Day setpoints @{}".format(__name__,simTime.secDay/3600.))
+            self.logger.debug("%s Day setpoints @%s", __name__, simTime.secDay/3600.)
 
             T_cool = self.coolSetpointDay
             T_heat = self.heatSetpointDay
             self.intHeat = self.intHeatDay*self.nFloor
 
         # Indoor convection heat transfer coefficients
-        zac_in_wall = 3.076                             # wall heat convection coefficeint
-        zac_in_mass = 3.076                             # mass heat convection coefficeint
+        zac_in_wall = ZAC_IN_WALL
+        zac_in_mass = ZAC_IN_MASS
 
         # Check that T_ceil and T_indoor within reasonable bounds
         converge_hi = 100.0 + 273.15
@@ -343,6 +364,273 @@ class Building(object):
         self.GasTotal = BEM.Gas + volSWH*CpH20*(T_hot - forc.waterTemp)/self.nFloor/self.heatEff + self.heatConsump
 
 
+class BuildingBatch(object):
+    """
+    Struct-of-arrays version of Building.BEMCalc for all the building types (BEM) of a city.
+
+    The parameters of the buildings are held in lists (one item per building type), together
+    with the areas that only depend on the urban geometry, so that BEMCalc is evaluated for
+    all the buildings at once, the cooling & heating branches with masks. Each value is
+    computed with the same expressions as Building.BEMCalc, so the results are identical.
+    The parameters are read when the batch is created (i.e. after the HVAC autosize), the
+    schedules & temperatures at each time step, and the results are set back on each Building.
+
+    args:
+        BEM         # list of BEMDef objects
+
+    properties
+        BEM         # list of BEMDef objects
+        buildings   # list of their Building objects
+        params      # dictionary of PARAMETERS name & list of the value of each building
+    """
+
+    KERNELS = ("loop", "array")
+    KERNEL_MSG = "BEM kernel must be one of {}. Got '{}'."
+
+    # Building parameters that are constant during a simulation
+    PARAMETERS = ('floorHeight', 'glazingRatio', 'uValue', 'shgc', 'infil', 'coolCap',
+                  'heatCap', 'heatEff', 'copAdj', 'condType')
+
+    # Results set on each Building by BEMCalc
+    RESULTS = ('ElecTotal', 'nFloor', 'Qheat', 'sensCoolDemand', 'sensHeatDemand',
+               'coolConsump', 'heatConsump', 'sensWaste', 'dehumDemand', 'Qhvac', 'intHeat',
+               'indoorTemp', 'indoorHum', 'fluxWall', 'fluxRoof', 'fluxMass', 'fluxSolar',
+               'fluxWindow', 'fluxInterior', 'fluxInfil', 'fluxVent', 'GasTotal')
+
+    def __init__(self, BEM):
+        self.BEM = BEM
+        self.buildings = [bem.building for bem in BEM]
+        self.params = dict((name, [getattr(b, name) for b in self.buildings])
+                           for name in self.PARAMETERS)
+        self.params['floorHeight'] = [float(h) for h in self.params['floorHeight']]
+        self._geometry = None   # (UCM geometry, areas of each building) of the last call
+        self.logger = logging.getLogger(__name__)
+
+    def __repr__(self):
+        return "BuildingBatch: {} buildings".format(len(self.buildings))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('logger', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.logger = logging.getLogger(__name__)
+
+    def areas(self, UCM):
+        """
+        nFloor, wallArea, winArea, massArea, volInfil & the products of the areas and their
+        coefficients of each building, for the geometry of UCM (computed when it changes)
+        """
+        key = (UCM.bldHeight, UCM.verToHor, UCM.bldDensity)
+        if self._geometry is None or self._geometry[0] != key:
+            p = self.params
+            zac_in_wall = ZAC_IN_WALL
+            zac_in_mass = ZAC_IN_MASS
+
+            nFloor = [max(UCM.bldHeight/h, 1) for h in p['floorHeight']]
+            facArea = UCM.verToHor/UCM.bldDensity           # [m2(facade)/m2(bld)]
+            wallArea = [facArea*(1.-g) for g in p['glazingRatio']]
+            winArea = [facArea*g for g in p['glazingRatio']]
+            massArea = [2*n-1 for n in nFloor]
+            volInfil = [i * UCM.bldHeight / 3600. for i in p['infil']]
+            wallZac = [a*zac_in_wall for a in wallArea]
+            massZac = [a*zac_in_mass for a in massArea]
+            winU = [a*u for a, u in zip(winArea, p['uValue'])]
+            coolCap = [c * n for c, n in zip(p['coolCap'], nFloor)]
+            heatCap = [c*n for c, n in zip(p['heatCap'], nFloor)]
+            self._geometry = (key, (nFloor, wallArea, winArea, massArea, volInfil, wallZac,
+                                    massZac, winU, coolCap, heatCap))
+        return self._geometry[1]
+
+    def BEMCalc(self, UCM, forc, parameter, simTime):
+        """ Building.BEMCalc of every building """
+
+        p = self.params
+        buildings = self.buildings
+        BEM = self.BEM
+        (nFloor, wallArea, winArea, massArea, volInfil, wallZac, massZac, winU,
+         coolCap, heatCap) = self.areas(UCM)
+
+        cp = parameter.cp
+        lv = parameter.lv
+        pres = forc.pres
+        T_can = UCM.canTemp
+        canHum = UCM.canHum
+        humDt = simTime.dt
+        bldHeight = UCM.bldHeight
+        zac_in_wall = ZAC_IN_WALL
+        zac_in_mass = ZAC_IN_MASS
+        evapEff = 1.                                    # evaporation efficiency in the condenser
+        CpH20 = 4200.                                   # heat capacity of water
+        T_hot = 49 + 273.15                             # Service water temp (assume no storage)
+
+        # Check that T_ceil and T_indoor within reasonable bounds
+        converge_hi = 100.0 + 273.15
+        converge_lo = -50.0 + 273.15
+
+        # Temperatures, humidity & schedules of the time step
+        T_indoor = [b.indoorTemp for b in buildings]
+        indoorHum = [b.indoorHum for b in buildings]
+        T_wall = [bem.wall.layerTemp[-1] for bem in BEM]
+        T_ceil = [bem.roof.layerTemp[-1] for bem in BEM]
+        T_mass = [bem.mass.layerTemp[0] for bem in BEM]
+        solRec = [bem.wall.solRec for bem in BEM]
+        dens = moist_air_density_array(pres, T_indoor, indoorHum)
+
+        for i in range(len(buildings)):
+            if not (converge_lo <= T_indoor[i] <= converge_hi and converge_lo <= T_ceil[i] <= converge_hi):
+                raise Exception("{}.\n Error at {}/{} {}s for bld {}.".format(
+                    Building.TEMPERATURE_COEFFICIENT_CONFLICT_MSG, simTime.month, simTime.day,
+                    simTime.secDay, BEM[i]))
+
+        # Day or night set points, the same for all buildings
+        isEqualNightStart = abs(float((simTime.secDay/3600.) - parameter.nightSetStart)) < 1e-14
+        if simTime.secDay/3600. < parameter.nightSetEnd or (simTime.secDay/3600. > parameter.nightSetStart or isEqualNightStart):
+            self.logger.debug("%s Night setpoints @%s", __name__, simTime.secDay/3600.)
+            T_cool = [b.coolSetpointNight for b in buildings]
+            T_heat = [b.heatSetpointNight for b in buildings]
+            intHeat = [b.intHeatNight * nf for b, nf in zip(buildings, nFloor)]
+        else:
+            self.logger.debug("%s Day setpoints @%s", __name__, simTime.secDay/3600.)
+            T_cool = [b.coolSetpointDay for b in buildings]
+            T_heat = [b.heatSetpointDay for b in buildings]
+            intHeat = [b.intHeatDay*nf for b, nf in zip(buildings, nFloor)]
+
+        # Heat fluxes (per m^2 of bld footprint): ceiling convection coefficient, solar
+        # heat gain through windows, infiltration & ventilation
+        zac_in_ceil = [0.948 if tc > ti else 4.040 for tc, ti in zip(T_ceil, T_indoor)]
+        winTrans = [(r * s * a) for r, s, a in zip(solRec, p['shgc'], winArea)]
+        volVent = [b.vent * nf for b, nf in zip(buildings, nFloor)]
+        infilDens = [v * d * cp for v, d in zip(volInfil, dens)]
+        ventDens = [v * d * cp for v, d in zip(volVent, dens)]
+
+        # Heat/Cooling load (W/m^2 of bld footprint) before the HVAC system, per building
+        def load(T_set):
+            return [wallZac[i]*(T_wall[i] - T_set[i]) +     # wall load
+                    massZac[i]*(T_mass[i]-T_set[i]) +       # mass load
+                    winU[i]*(T_can-T_set[i]) +              # window load due to temp delta
+                    zac_in_ceil[i] *(T_ceil[i]-T_set[i]) +  # ceiling load
+                    intHeat[i] +                            # internal load
+                    infilDens[i]*(T_can-T_set[i]) +         # infiltration load
+                    ventDens[i]*(T_can-T_set[i]) +          # ventilation load
+                    winTrans[i]                             # solar load through window
+                    for i in range(len(buildings))]
+
+        sensCoolDemand = [max(q, 0.) for q in load(T_cool)]
+        sensHeatDemand = [max(-q, 0.) for q in load(T_heat)]
+
+        n = len(buildings)
+        Qheat = [0.0] * n
+        coolConsump = [0.0] * n
+        heatConsump = [0.0] * n
+        sensWaste = [0.0] * n
+        dehumDemand = [0.0] * n
+        Qhvac = [0.0] * n
+        Qdehum = [0.0] * n
+
+        # HVAC system (cooling demand = W/m^2 bld footprint) of the buildings of the mask
+        cool = [i for i in range(n) if sensCoolDemand[i] > 0.] if T_can > 288. else []
+        for i in cool:
+            VolCool = sensCoolDemand[i] / (dens[i]*cp*(T_indoor[i]-283.15))
+            dehumDemand[i] = max(VolCool * dens[i] * (indoorHum[i] - 0.9*0.0078)*lv, 0.)
+            if (dehumDemand[i] + sensCoolDemand[i]) > coolCap[i]:
+                Qhvac[i] = coolCap[i]
+                VolCool = VolCool / (dehumDemand[i] + sensCoolDemand[i]) * coolCap[i]
+                sensCoolDemand[i] = sensCoolDemand[i] * coolCap[i] / (dehumDemand[i] + sensCoolDemand[i])
+                dehumDemand[i] = dehumDemand[i] * coolCap[i] / (dehumDemand[i] + sensCoolDemand[i])
+            else:
+                Qhvac[i] = dehumDemand[i] + sensCoolDemand[i]
+
+            Qdehum[i] = VolCool * dens[i] * lv * (indoorHum[i] - 0.9*0.0078)
+            coolConsump[i] = (max(sensCoolDemand[i]+dehumDemand[i],0.0))/p['copAdj'][i]
+
+            # Waste heat from HVAC (per m^2 building foot print)
+            if p['condType'][i] == 'AIR':
+                sensWaste[i] = max(sensCoolDemand[i]+dehumDemand[i],0)+coolConsump[i]
+                buildings[i].latWaste = 0.0
+            elif p['condType'][i] == 'WAT':
+                sensWaste[i] = max(sensCoolDemand[i]+dehumDemand[i],0)+coolConsump[i]*(1.-evapEff)
+                buildings[i].latWaste = max(sensCoolDemand[i]+dehumDemand[i],0)+coolConsump[i]*evapEff
+
+            sensHeatDemand[i] = 0.
+
+        # HVAC system (heating demand = W/m^2 bld footprint) of the buildings of the mask
+        heat = [i for i in range(n) if sensHeatDemand[i] > 0.] if T_can < 288. else []
+        for i in heat:
+            Qheat[i] = min(sensHeatDemand[i], heatCap[i])
+            heatConsump[i] = Qheat[i] / p['heatEff'][i]
+            sensWaste[i] = heatConsump[i] - Qheat[i]
+            heatConsump[i] = heatConsump[i]/nFloor[i]
+            sensHeatDemand[i] = Qheat[i]/nFloor[i]
+            sensCoolDemand[i] = 0.0
+
+        # Evolution of the internal temperature and humidity, fluxes & consumptions
+        results = []
+        for i in range(n):
+            b = buildings[i]
+            bem = BEM[i]
+            nf = nFloor[i]
+            ti = T_indoor[i]
+            heatEff = p['heatEff'][i]
+            volSWH = bem.SWH * nf/3600.
+
+            Q = intHeat[i] + winTrans[i] + Qheat[i] - sensCoolDemand[i]
+
+            H1 = (T_wall[i]*wallArea[i]*zac_in_wall +
+                T_mass[i]*massArea[i]*zac_in_mass +
+                T_ceil[i]*zac_in_ceil[i] +
+                T_can*winArea[i]*p['uValue'][i] +
+                T_can*volInfil[i] * dens[i] * cp +
+                T_can*volVent[i] * dens[i] * cp)
+
+            H2 = (wallZac[i] +
+                massZac[i] +
+                zac_in_ceil[i] +
+                winU[i] +
+                infilDens[i] +
+                ventDens[i])
+
+            QLinfil = volInfil[i] * dens[i] * lv * (canHum - indoorHum[i])
+            QLvent = volVent[i] * dens[i] * lv * (canHum - indoorHum[i])
+            QLintload = intHeat[i] * b.intHeatFLat
+
+            coolConsump_i = coolConsump[i]/nf
+            results.append((
+                coolConsump_i + bem.Elec + bem.Light,                       # ElecTotal
+                nf,                                                         # nFloor
+                Qheat[i],
+                sensCoolDemand[i]/nf,
+                sensHeatDemand[i],
+                coolConsump_i,
+                heatConsump[i],
+                sensWaste[i] + (1/heatEff-1.)*(volSWH*CpH20*(T_hot - forc.waterTemp)) + bem.Gas*(1-heatEff)*nf,
+                dehumDemand[i],
+                Qhvac[i],
+                intHeat[i],
+                (H1 + Q)/H2,                                                # indoorTemp
+                indoorHum[i] + (humDt/(dens[i] * lv * bldHeight)) *
+                    (QLintload + QLinfil + QLvent - Qdehum[i]),             # indoorHum
+                zac_in_wall * (ti - T_wall[i]),                             # fluxWall
+                zac_in_ceil[i] * (ti - T_ceil[i]),                          # fluxRoof
+                zac_in_mass * (ti - T_mass[i]) + intHeat[i] * b.intHeatFRad/massArea[i],
+                winTrans[i]/nf,                                             # fluxSolar
+                winU[i] *(T_can - ti)/nf,                                   # fluxWindow
+                intHeat[i] * b.intHeatFRad *(1.-b.intHeatFLat)/nf,          # fluxInterior
+                infilDens[i] *(T_can - ti)/nf,                              # fluxInfil
+                ventDens[i] *(T_can - ti)/nf,                               # fluxVent
+                bem.Gas + volSWH*CpH20*(T_hot - forc.waterTemp)/nf/heatEff + heatConsump[i]))    # GasTotal
+
+        # Relative humidity (Pw/Pws*100) of the new indoor temperature & humidity
+        indoorRhum = relative_humidity_array([r[11] for r in results], [r[12] for r in results], pres)
+
+        for i in range(n):
+            b = buildings[i]
+            b.__dict__.update(zip(self.RESULTS, results[i]))
+            b.indoorRhum = indoorRhum[i]
+
+
 """
 % Not used for this release but saved for possible future use
 function Twb = wet_bulb(Tdb,Tdp,pres)
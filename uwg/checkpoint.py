@@ -0,0 +1,165 @@
+"""
+Checkpoints of a uwg simulation.
+
+A checkpoint is the whole state of a uwg object during its simulation (the calendar, the
+forcing, the UCM, UBL, RSM & rural models, the layer temperatures of the elements, the
+indoor state of the buildings and the outputs recorded so far), pickled & compressed into
+a binary file. It is written between two time steps, so that loading it and simulating
+the remaining time steps gives the same results as an uninterrupted simulation.
+
+The EPW file is not stored in the checkpoint but read again when it is loaded, and the
+loggers are stored by name.
+
+A state file only stores the state of the physical models (STATE), i.e. at the end of the
+spin-up of a simulation, to warm start the later simulations of the same site from the
+same date (see uwg.warm_start). It is named after a key of the EPW content, the inputs
+that the state depends on (STATE_PARAMETERS), the date & the length of the spin-up.
+"""
+from __future__ import division, print_function
+
+import io
+import os
+import hashlib
+import logging
+import tempfile
+import zlib
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from .epw import EPW
+from .profiler import Profiler
+
+MAGIC = b"UWGCHK1\n"
+STATE_MAGIC = b"UWGSTA1\n"
+COMPRESSION = 1     # zlib level, the state is mostly arrays of floats
+
+# Objects of the state of the physical models of a uwg simulation
+STATE = ('road', 'rural', 'UCM', 'UBL', 'RSM', 'USM', 'BEM')
+
+# Inputs of a uwg object the state of a simulation depends on, besides its dates
+STATE_PARAMETERS = (
+    'dtSim', 'dtWeather', 'autosize', 'sensOcc', 'LatFOcc', 'RadFOcc', 'RadFEquip',
+    'RadFLight', 'h_ubl1', 'h_ubl2', 'h_ref', 'h_temp', 'h_wind', 'c_circ', 'c_exch',
+    'maxDay', 'maxNight', 'windMin', 'h_obs', 'bldHeight', 'h_mix', 'bldDensity',
+    'verToHor', 'charLength', 'alb_road', 'd_road', 'sensAnth', 'zone', 'vegCover',
+    'treeCoverage', 'vegStart', 'vegEnd', 'albVeg', 'rurVegCover', 'latGrss', 'latTree',
+    'SchTraffic', 'bld', 'kRoad', 'cRoad', 'flr_h', 'albRoof', 'vegRoof', 'glzR', 'albWall',
+    'SHGC', 'holidays', 'schedule_overrides', 'readDOE_file_path', 'z_meso_dir_path',
+    'vertical_grid', 'vdm_kernel', 'bem_kernel', 'ubl_kernel', 'forcing_mode')
+
+
+def _persistent_id(obj):
+    """ Id of an object that is not pickled with the state, None for the others """
+    if isinstance(obj, logging.Logger):
+        return ("logger", obj.name)
+    if isinstance(obj, EPW) and obj.epw_file_path and os.path.exists(obj.epw_file_path):
+        return ("epw", os.path.abspath(obj.epw_file_path))
+    if isinstance(obj, Profiler):
+        return ("profiler",)
+    return None
+
+
+def _key_value(value):
+    """ repr of a value that does not depend on the order of dictionaries or object ids """
+    if isinstance(value, dict):
+        return "{" + ", ".join("{}: {}".format(_key_value(k), _key_value(v))
+                               for k, v in sorted(value.items())) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(_key_value(v) for v in value) + "]"
+    if hasattr(value, "__dict__"):
+        return type(value).__name__ + _key_value(value.__dict__)
+    return repr(value)
+
+
+def _dump(obj, path, magic):
+    """ Pickle obj to a compressed file (replaced if it exists) """
+    buf = io.BytesIO()
+    pickler = pickle.Pickler(buf, pickle.HIGHEST_PROTOCOL)
+    pickler.persistent_id = _persistent_id
+    pickler.dump(obj)
+
+    # Write a new file of a unique name and only then replace the previous one, so that a
+    # crash while writing does not lose it, and processes writing the same file at once
+    # (i.e. the workers of an ensemble that share a warm_start_dir) do not mix their writes
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", prefix=os.path.basename(path) + ".",
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    f = os.fdopen(fd, "wb")
+    try:
+        f.write(magic)
+        f.write(zlib.compress(buf.getvalue(), COMPRESSION))
+    finally:
+        f.close()
+    _replace(tmp_path, path)
+
+
+def _replace(src, dst):
+    """ Rename src to dst, replacing dst atomically where os.replace exists (Python 3) """
+    if hasattr(os, "replace"):
+        os.replace(src, dst)
+        return
+    if os.path.exists(dst):
+        os.remove(dst)
+    os.rename(src, dst)
+
+
+def _load(path, magic, kind):
+    """ Object pickled to a compressed file by _dump """
+    if not os.path.exists(path):
+        raise Exception("{} file: '{}' does not exist.".format(kind.capitalize(), path))
+
+    f = open(path, "rb")
+    try:
+        data = f.read()
+    finally:
+        f.close()
+    if not data.startswith(magic):
+        raise Exception("'{}' is not a uwg {} file.".format(path, kind))
+
+    epws = {}
+
+    def persistent_load(pid):
+        if pid[0] == "logger":
+            return logging.getLogger(pid[1])
+        if pid[0] == "epw":
+            if pid[1] not in epws:
+                epws[pid[1]] = EPW(pid[1])
+            return epws[pid[1]]
+        if pid[0] == "profiler":
+            return None
+        raise pickle.UnpicklingError("Unknown object '{}' in {} file".format(pid, kind))
+
+    unpickler = pickle.Unpickler(io.BytesIO(zlib.decompress(data[len(magic):])))
+    unpickler.persistent_load = persistent_load
+    return unpickler.load()
+
+
+def write_checkpoint(model, path):
+    """ Write the state of a uwg object to a checkpoint file (replaced if it exists) """
+    _dump(model, path, MAGIC)
+
+
+def read_checkpoint(path):
+    """ uwg object of a checkpoint file """
+    return _load(path, MAGIC, "checkpoint")
+
+
+def state_key(model, month, day, days):
+    """ Key of the state of a uwg object after a spin-up of days days to month/day """
+    key = hashlib.sha1(model.epw.digest().encode("ascii"))
+    for name in STATE_PARAMETERS:
+        key.update("{}={};".format(name, _key_value(getattr(model, name))).encode("utf-8"))
+    key.update("{}/{}+{}".format(int(month), int(day), int(days)).encode("ascii"))
+    return key.hexdigest()
+
+
+def write_state(model, path):
+    """ Write the STATE objects of a uwg object to a state file (replaced if it exists) """
+    _dump(dict((name, getattr(model, name)) for name in STATE), path, STATE_MAGIC)
+
+
+def read_state(path):
+    """ Dictionary of the STATE objects of a state file """
+    return _load(path, STATE_MAGIC, "state")
@@ -43,6 +43,10 @@ class Element(object):
     "-----------------------------------------"
     CONDUCTION_INPUT_MSG = 'ERROR: check input parameters in the Conduction routine'
 
+    # Cached time-invariant coefficients of the Conduction routine (see ConductionFactor).
+    # Defined on the class so that elements unpickled from readDOE.pkl also have it.
+    _conductionFactor = None
+
     def __init__(self, alb, emis, thicknessLst, materialLst, vegCoverage, T_init, horizontal,name=None):
         if len(thicknessLst) != len(materialLst):
             raise Exception(self.THICKNESSLST_EQ_MATERIALLST_MSG)
@@ -98,6 +102,16 @@ class Element(object):
         """ Calculate net heat flux, and update element layer temperatures
         """
 
+        self.SurfHeatBalance(forc,parameter,simTime,humRef,tempRef,windRef)
+
+        self.layerTemp = self.Conduction(simTime.dt, self.flux, boundCond, forc.deepTemp, intFlux)
+        self.T_ext = self.layerTemp[0]
+        self.T_int = self.layerTemp[-1]
+
+    def SurfHeatBalance(self,forc,parameter,simTime,humRef,tempRef,windRef):
+        """ Calculate the net heat flux on the element surface (self.flux)
+        """
+
         # Calculated per unit area (m^2)
         dens = forc.pres/(1000*0.287042*tempRef*(1.+1.607858*humRef)) # air density (kgd m-3)
         self.aeroCond = 5.8 + 3.7 * windRef         # Convection coef (ref: uwg, eq. 12))
@@ -140,10 +154,6 @@ class Element(object):
             self.sens = self.aeroCond*(self.layerTemp[0]-tempRef)
             self.flux = -self.sens + self.solAbs + self.infra - self.lat # (W m-2)
 
-        self.layerTemp = self.Conduction(simTime.dt, self.flux, boundCond, forc.deepTemp, intFlux)
-        self.T_ext = self.layerTemp[0]
-        self.T_int = self.layerTemp[-1]
-
     def Conduction(self, dt, flx1, bc, temp2, flx2):
         """
         Solve the conductance of heat based on of the element layers.
@@ -153,6 +163,18 @@ class Element(object):
             temp2 : deep soil temperature (ave of air temperature)
             flx2  : surface flux (sum of absorbed, emitted, etc.)
 
+        The tridiagonal matrix of the implicit scheme only depends on dt, bc and the
+        layer properties, so it is factorized once (see ConductionFactor) and only the
+        right hand side is rebuilt for each time step.
+        """
+        return _solve_conduction(self.ConductionFactor(dt, bc), self.layerTemp, flx1, temp2, flx2)
+
+    def ConductionFactor(self, dt, bc):
+        """
+        Time-invariant coefficients of the Conduction routine for time step dt and
+        boundary condition bc. They are computed on the first call and cached on the
+        element, so reset self._conductionFactor to None if the layer properties change.
+
         key prop:
             za = [[ x00, x01, x02 ... x0w ]
                   [ x10, x11, x12 ... x1w ]
@@ -162,20 +184,25 @@ class Element(object):
             where h = matrix row index    = element layer number
                   w = matrix column index = 3
 
+        returns:
+            (dt, bc, num, hcpdt, tcp, lower, diag, upper)
+
+            where hcpdt = layer heat capacity / dt,
+                  tcp   = mean thermal conductivity between layers,
+                  lower, upper = lower and upper diagonals of za and
+                  diag  = main diagonal of za after the upward elimination
+                          of the upper diagonal (see invert)
         """
-        t = self.layerTemp          # vector of layer temperatures (K)
+        factor = self._conductionFactor
+        if factor is not None and factor[0] == dt and factor[1] == bc:
+            return factor
+
         hc = self.layerVolHeat      # vector of layer volumetric heat (J m-3 K-1)
         tc = self.layerThermalCond  # vector of layer thermal conductivities (W m-1 K-1)
         d = self.layerThickness     # vector of layer thicknesses (m)
 
-        # flx1                      : net heat flux on surface
-        # bc                        : boundary condition parameter (1 or 2)
-        # temp2                     : deep soil temperature (avg of air temperature)
-        # flx2                      : surface flux (sum of absorbed, emitted, etc.)
-
         fimp = 0.5                  # implicit coefficient
-        fexp = 0.5                  # explicit coefficient
-        num = len(t)                # number of layers
+        num = len(d)                # number of layers
 
         # Mean thermal conductivity over distance between 2 layers (W/mK)
         tcp = [0 for x in range(num)]
@@ -183,8 +210,6 @@ class Element(object):
         hcp = [0 for x in range(num)]
         # lower, main, and upper diagonals
         za = [[0 for y in range(3)] for x in range(num)]
-        # RHS
-        zy = [0 for x in range(num)]
 
         #--------------------------------------------------------------------------
         # Define the column vectors for heat capactiy and conductivity
@@ -194,11 +219,10 @@ class Element(object):
             hcp[j] = hc[j] * d[j]
 
         #--------------------------------------------------------------------------
-        # Define the first row of za matrix, and RHS column vector
+        # Define the first row of za matrix
         za[0][0] = 0.
         za[0][1] = hcp[0]/dt + fimp*tcp[1]
         za[0][2] = -fimp*tcp[1]
-        zy[0] = hcp[0]/dt*t[0] - fexp*tcp[1]*(t[0]-t[1]) + flx1
 
         #--------------------------------------------------------------------------
         # Define other rows
@@ -206,8 +230,6 @@ class Element(object):
           za[j][0] = fimp*(-tcp[j])
           za[j][1] = hcp[j]/dt + fimp*(tcp[j]+tcp[j+1])
           za[j][2] = fimp*(-tcp[j+1])
-          zy[j] = hcp[j]/dt * t[j] + fexp * \
-            (tcp[j]*t[j-1] - tcp[j]*t[j] - tcp[j+1]*t[j] + tcp[j+1]*t[j+1])
 
         #--------------------------------------------------------------------------
         # Boundary conditions
@@ -215,20 +237,23 @@ class Element(object):
             za[num-1][0] = fimp * (-tcp[num-1])
             za[num-1][1] = hcp[num-1]/dt + fimp*tcp[num-1]
             za[num-1][2] = 0.
-            zy[num-1] = hcp[num-1]/dt*t[num-1] + fexp*tcp[num-1]*(t[num-2]-t[num-1]) + flx2
         elif self.is_near_zero(bc-2.): # deep-temperature
             za[num-1][0] = 0.
             za[num-1][1] = 1.
             za[num-1][2] = 0.
-            zy[num-1] = temp2
         else:
             raise Exception(self.CONDUCTION_INPUT_MSG)
 
         #--------------------------------------------------------------------------
+        # Upward elimination of the upper diagonal (same order as in invert)
+        diag = [za[j][1] for j in range(num)]
+        for i in reversed(range(num-1)):
+            diag[i] = diag[i] - za[i][2] * za[i+1][0]/diag[i+1]
 
-        zx = self.invert(num,za,zy)
-        #t(:) = zx(:);
-        return zx # return zx as 1d vector of templayers
+        factor = (dt, bc, num, [h/dt for h in hcp], tcp,
+            [za[j][0] for j in range(num)], diag, [za[j][2] for j in range(num)])
+        self._conductionFactor = factor
+        return factor
 
     def qsat(self,temp,pres,parameter):
         """
@@ -281,3 +306,54 @@ class Element(object):
             X[i] = C[i]/A[i][1]
 
         return X
+
+
+def conduction_batch(elements, dt, flx1, bc, temp2, flx2):
+    """
+    Solve the conductance of heat for a list of elements (the mass, roof & wall of the building
+    types, that share dt, bc & temp2), one element after the other, each with its cached
+    factorized matrix (see Element.ConductionFactor). The road & rural elements are solved
+    by Element.SurfFlux, after their surface heat balance.
+    arg:
+        elements : list of Element objects
+        dt       : simulation time step (s)
+        flx1     : list of net heat flux on the surface of each element
+        bc       : boundary condition parameter (1 or 2) of all elements
+        temp2    : deep soil temperature of all elements
+        flx2     : list of surface flux (sum of absorbed, emitted, etc.) of each element
+
+    returns:
+        list of layer temperature vectors, one per element
+    """
+    return [_solve_conduction(elements[i].ConductionFactor(dt, bc), elements[i].layerTemp,
+        flx1[i], temp2, flx2[i]) for i in range(len(elements))]
+
+
+def _solve_conduction(factor, t, flx1, temp2, flx2):
+    """
+    Build the right hand side of the Conduction routine for layer temperatures t
+    and solve it with the factorized tridiagonal matrix (see Element.invert).
+    """
+    dt, bc, num, hcpdt, tcp, lower, diag, upper = factor
+    fexp = 0.5                  # explicit coefficient
+
+    # RHS
+    zy = [0 for x in range(num)]
+    zy[0] = hcpdt[0]*t[0] - fexp*tcp[1]*(t[0]-t[1]) + flx1
+
+    for j in range(1,num-1):
+        zy[j] = hcpdt[j] * t[j] + fexp * \
+          (tcp[j]*t[j-1] - tcp[j]*t[j] - tcp[j+1]*t[j] + tcp[j+1]*t[j+1])
+
+    if abs(bc-1.) < 1e-10: # heat flux
+        zy[num-1] = hcpdt[num-1]*t[num-1] + fexp*tcp[num-1]*(t[num-2]-t[num-1]) + flx2
+    else: # deep-temperature
+        zy[num-1] = temp2
+
+    for i in reversed(range(num-1)):
+        zy[i] = zy[i] - upper[i] * zy[i+1]/diag[i+1]
+
+    for i in range(1,num,1):
+        zy[i] = zy[i] - lower[i] * zy[i-1]/diag[i-1]
+
+    return [zy[i]/diag[i] for i in range(num)]
@@ -0,0 +1,166 @@
+"""Run a sweep of uwg parameter sets on one rural EPW file in a pool of processes."""
+from __future__ import division, print_function
+
+try:
+    range = xrange
+except NameError:
+    pass
+
+import os
+import itertools
+import traceback
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None  # i.e. IronPython
+
+from .uwg import uwg
+from .batch import new_case
+from .readDOE import DOELibrary
+from .epw import EPW
+
+
+# Data shared read-only by all cases run in a process (see _init_worker)
+_shared = {}
+
+
+class EnsembleResult(object):
+    """Outputs of one case of an ensemble.
+
+    properties:
+        index       # position of the case in the expanded param_grid
+        params      # dictionary of uwg input parameters of the case
+        newPathName # path of the morphed EPW file
+        canTemp     # hourly urban canyon dry bulb temperature (K)
+        Tdp         # hourly urban canyon dew point temperature (C)
+        canRHum     # hourly urban canyon relative humidity (%)
+        wind        # hourly wind speed (m/s)
+        outputs     # dictionary of column name and hourly values of the uwg outputs set in
+                    # the parameter set or the .uwg file (see Recorder)
+        error       # traceback of the exception raised by the case, None if it succeeded
+    """
+
+    def __init__(self, index, params):
+        self.index = index
+        self.params = params
+        self.newPathName = None
+        self.canTemp = None
+        self.Tdp = None
+        self.canRHum = None
+        self.wind = None
+        self.outputs = None
+        self.error = None
+
+    def __repr__(self):
+        return "EnsembleResult: case {}, {}".format(
+            self.index, "failed" if self.error else self.newPathName)
+
+
+def expand_grid(param_grid):
+    """Expand a parameter grid into a list of parameter sets.
+
+    args:
+        param_grid: Either a dictionary of uwg attribute names and lists of values,
+            which is expanded into every combination of the values (in sorted order
+            of the names), or a list of dictionaries that is used as is.
+    returns:
+        list of dictionaries of uwg attribute names and values
+    """
+    if isinstance(param_grid, dict):
+        keys = sorted(param_grid.keys())
+        return [dict(zip(keys, values))
+                for values in itertools.product(*[param_grid[key] for key in keys])]
+    return [dict(params) for params in param_grid]
+
+
+def run_ensemble(epwFileName, param_grid, uwgParamFileName=None, epwDir=None,
+                 uwgParamDir=None, destinationDir=None, workers=None):
+    """Morph one rural EPW file for every parameter set of a grid.
+
+    The EPW file and the DOE reference data (readDOE.pkl) are read once and shared
+    read-only with a pool of worker processes. Results are yielded as the cases
+    complete, in the order of the expanded param_grid. A case that raises an
+    exception does not stop the others; its traceback is stored in the error
+    property of its result.
+
+    args:
+        epwFileName: The name of the rural epw file that will be morphed.
+        param_grid: The uwg inputs that override the .uwg file (see expand_grid). A
+            parameter set can also carry a 'destinationFileName' for its morphed EPW.
+        uwgParamFileName: The name of the uwg Parameter File (.uwg) used by all cases.
+        epwDir: The directory in which the rural EPW file sits.
+        uwgParamDir: The directory in which the uwg Parameter File (.uwg) sits.
+        destinationDir: Optional destination directory for the morphed EPW files.
+        workers: Number of worker processes. Defaults to the number of CPUs. The cases
+            are run in this process if workers is 1 or multiprocessing is unavailable.
+    yields:
+        EnsembleResult for each parameter set
+    """
+    param_sets = expand_grid(param_grid)
+
+    reference = uwg(epwFileName, uwgParamFileName, epwDir, uwgParamDir, destinationDir)
+    epw = EPW(os.path.join(reference.epwDir, reference.epwFileName))
+
+    # Read the DOE reference library once, and pass it to the worker processes with the
+    # EPW file, as spawned processes (i.e. on Windows) do not inherit it
+    library = DOELibrary.load(reference.readDOE_file_path)
+
+    tasks = [(i, params, epwFileName, uwgParamFileName, epwDir, uwgParamDir, destinationDir)
+             for i, params in enumerate(param_sets)]
+
+    if workers is None:
+        workers = multiprocessing.cpu_count() if multiprocessing else 1
+    workers = min(workers, len(tasks))
+
+    if workers <= 1 or multiprocessing is None:
+        _init_worker(epw, library)
+        for task in tasks:
+            yield _run_case(task)
+        return
+
+    pool = multiprocessing.Pool(workers, _init_worker, (epw, library))
+    try:
+        for result in pool.imap(_run_case, tasks):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _init_worker(epw, library):
+    """Keep the data shared by all cases of a worker process."""
+    _shared['epw'] = epw
+    DOELibrary.register(library)
+
+
+def _run_case(task):
+    """Run one case of the ensemble and collect its outputs."""
+    index, params = task[0], task[1]
+    result = EnsembleResult(index, params)
+
+    try:
+        model = new_case(task[2], params, index, *task[3:])
+        model.epw = _shared['epw']
+
+        model.read_epw()
+        model.set_input()
+        model.init_BEM_obj()
+        model.init_input_obj()
+        model.hvac_autosize()
+        model.simulate()
+        model.write_epw()
+
+        result.newPathName = model.newPathName
+        result.canTemp = list(model.results['UCM.canTemp'])
+        result.Tdp = list(model.results['UCM.Tdp'])
+        result.canRHum = list(model.results['UCM.canRHum'])
+        result.wind = list(model.results['forc.wind'])
+        requests = [v for v in model.outputs if v in model.results.requests]
+        result.outputs = dict((name, list(model.results[name]))
+                              for name in model.results.columns(requests))
+    except Exception:
+        result.error = traceback.format_exc()
+
+    return result
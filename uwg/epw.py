@@ -0,0 +1,205 @@
+from .utilities import zeros
+from csv import reader as csv_reader
+from array import array
+import hashlib
+import os
+import sys
+
+try:
+    range = xrange
+except NameError:
+    pass
+
+
+class EPW(object):
+    """
+    EPW
+    EnergyPlus weather file, read once and shared by uwg, Weather and Forcing.
+    http://bigladdersoftware.com/epx/docs/8-2/auxiliary-programs/epw-csv-format-inout.html
+
+    The numeric fields of the weather data are parsed straight into one array of floats
+    per column. Missing or non-numeric values are NaN. Data lines are kept as raw strings
+    (one per weather time step) so that the morphed EPW reproduces the original fields.
+
+    args:
+        epw_file_path   # path of the epw file
+        epw_lines       # lines of an epw file, used instead of reading a file
+
+    properties
+        header_lines    # list of the 8 raw header lines
+        data_lines      # list of the raw weather data lines, one per weather time step
+        header          # list of the 8 header rows (lists of strings)
+        data            # list of weather rows (lists of strings), split on demand
+        location        # location name
+        lat             # latitude
+        lon             # longitude
+        GMT             # GMT
+        nSoil           # Number of soil depths
+        Tsoil           # nSoil x 12 matrix for soil temperture (K)
+        depth_soil      # nSoil x 1 matrix for soil depth (m)
+    """
+
+    HEADER_LENGTH = 8       # number of header lines
+    CHUNK_LENGTH = 4096     # number of data lines converted to columns at once
+    STRING_COLUMNS = (5,)   # data source and uncertainty flags
+
+    def __init__(self, epw_file_path=None, epw_lines=None):
+
+        self.epw_file_path = epw_file_path
+
+        if epw_lines is None:
+            if not os.path.exists(epw_file_path):
+                raise Exception("File name: '{}' does not exist.".format(epw_file_path))
+            if sys.version_info[0] >= 3:
+                epw_file = open(epw_file_path, "r", errors='ignore')
+            else:
+                epw_file = open(epw_file_path, "r")
+            try:
+                self._read(epw_file.read().splitlines())
+            except Exception as e:
+                raise Exception("Failed to read epw file! {}".format(e))
+            finally:
+                epw_file.close()
+        else:
+            self._read(list(epw_lines))
+
+        # Read header lines (1 to 8) from EPW and ensure TMY2 format.
+        self.header = [r for r in csv_reader(self.header_lines, delimiter=",")]
+
+        # Read location, Lat, Long (line 1 of EPW)
+        self.location = self.header[0][1]
+        self.lat = float(self.header[0][6])
+        self.lon = float(self.header[0][7])
+        self.GMT = float(self.header[0][8])
+
+        # Read in soil temperature data (assumes this is always there)
+        soilData = self.header[3]
+        self.nSoil = int(soilData[1])           # Number of ground temperature depths
+        self.Tsoil = zeros(self.nSoil, 12)      # nSoil x 12 matrix for soil temperture (K)
+        self.depth_soil = zeros(self.nSoil, 1)  # nSoil x 1 matrix for soil depth (m)
+
+        # Read monthly data for each layer of soil from EPW file
+        for i in range(self.nSoil):
+            self.depth_soil[i][0] = float(soilData[2 + (i*16)])  # get soil depth for each nSoil
+            # Monthly data
+            for j in range(12):
+                # 12 months of soil T for specific depth
+                self.Tsoil[i][j] = float(soilData[6 + (i*16) + j]) + 273.15
+
+    @classmethod
+    def from_string(cls, epw_string):
+        """Create an EPW object from the content of an epw file."""
+        return cls(epw_lines=epw_string.splitlines())
+
+    def __repr__(self):
+        return "EPW: City = {}, lat = {}, lon = {}, {} weather time steps".format(
+            self.location,
+            self.lat,
+            self.lon,
+            len(self.data_lines)
+            )
+
+    def digest(self):
+        """SHA-1 hex digest of the lines of the epw, that identifies its content."""
+        if self._digest is None:
+            text = "\n".join(self.header_lines + self.data_lines)
+            if not isinstance(text, bytes):
+                text = text.encode('utf-8', 'replace')
+            self._digest = hashlib.sha1(text).hexdigest()
+        return self._digest
+
+    @property
+    def data(self):
+        """List of weather rows (lists of strings)."""
+        return [line.split(',') for line in self.data_lines]
+
+    def column(self, index):
+        """Array of the floats of a column of the weather data.
+
+        The array is shared, so it must not be mutated.
+        """
+        if self._columns[index] is None:
+            raise Exception("EPW column {} is not numeric.".format(index))
+        return self._columns[index]
+
+    def write(self, epw_file, columns=None, start=0, precision=1):
+        """Write the epw file with some of its weather data columns replaced.
+
+        Only the replaced columns are formatted, the other fields are written as read.
+
+        args:
+            epw_file: Path of the new epw file, or a file object to stream it to.
+            columns: Dictionary of column index and list of floats that replace the
+                column from weather data row start.
+            start: Index of the first weather data row replaced by the columns.
+            precision: Number of decimals of the replaced values.
+        """
+        columns = columns or {}
+        fmt = "%.{}f".format(precision)
+        nrow = max([len(values) for values in columns.values()] + [0])
+        stop = start + nrow
+
+        if hasattr(epw_file, "write"):
+            new_epw = epw_file
+        else:
+            new_epw = open(epw_file, "w")
+
+        try:
+            new_epw.write("\n".join(self.header_lines) + "\n")
+
+            for i in range(0, len(self.data_lines), self.CHUNK_LENGTH):
+                chunk = []
+                for j in range(i, min(i + self.CHUNK_LENGTH, len(self.data_lines))):
+                    fields = self.data_lines[j].split(',')
+                    if start <= j < stop:
+                        for index, values in columns.items():
+                            if j - start < len(values):
+                                fields[index] = fmt % values[j - start]
+                    # Write 35 fields, the last one is a copy of field 33 (as uwg always did)
+                    fields[34:] = fields[33:34]
+                    chunk.append(",".join(fields))
+                new_epw.write("\n".join(chunk) + "\n")
+        finally:
+            if new_epw is not epw_file:
+                new_epw.close()
+
+    def _read(self, lines):
+        """Read the header lines and parse the weather data lines into columns."""
+        self.header_lines = [line.rstrip('\r\n') for line in lines[:self.HEADER_LENGTH]]
+        self.data_lines = [line.rstrip('\r\n') for line in lines[self.HEADER_LENGTH:]]
+        self.data_lines = [line for line in self.data_lines if line]
+        self._digest = None
+        self._columns = []
+
+        for i in range(0, len(self.data_lines), self.CHUNK_LENGTH):
+            self._parse(self.data_lines[i:i+self.CHUNK_LENGTH])
+
+    def _parse(self, chunk):
+        """Append the fields of a chunk of data lines to the columns."""
+        rows = [line.split(',') for line in chunk]
+
+        if not self._columns:
+            self._columns = [None if i in self.STRING_COLUMNS else array('d')
+                             for i in range(len(rows[0]))]
+        ncol = len(self._columns)
+
+        # Pad short rows so that the columns stay aligned with the data lines
+        if min(map(len, rows)) < ncol:
+            rows = [row + [''] * (ncol - len(row)) for row in rows]
+
+        for i, values in enumerate(zip(*rows)):
+            if i >= ncol or self._columns[i] is None:
+                continue
+            try:
+                values = list(map(float, values))
+            except ValueError:
+                values = [_to_float(v) for v in values]
+            self._columns[i].extend(values)
+
+
+def _to_float(value):
+    """Convert an EPW field to a float, NaN if it is missing or not a number."""
+    try:
+        return float(value)
+    except ValueError:
+        return float('nan')
@@ -1,5 +1,13 @@
 from __future__ import division
 
+try:
+    range = xrange
+except NameError:
+    pass
+
+import math
+from array import array
+
 
 class Forcing (object):
     """
@@ -59,3 +67,90 @@ class Forcing (object):
             a=int(self.deepTemp) if self.deepTemp else None,
             b=int(self.waterTemp) if self.waterTemp else None
             )
+
+
+def _column_property(name):
+    """ Attribute of a ForcingStream that reads the column of name at the current position """
+    def fget(self):
+        return self._columns[name][self._pos]
+    return property(fget, doc="{} of the current time step".format(name))
+
+
+class ForcingStream(Forcing):
+    """
+    Forcing of the current time step of a simulation, read from columns of the hourly
+    forcing (the lists of a Forcing of the simulation period) rather than copied into it at
+    each time step. The weather record of every time step is mapped up front, and seek(it)
+    only moves the position of the time step it in the columns.
+
+    In 'step' mode, a time step takes the values of the next weather record, as uwg always
+    did (the wind speed is clamped to windMin). In 'linear' mode, for a dtSim shorter than
+    the weather time step, the values are interpolated between the weather records before
+    & after the time step, into columns of all the time steps. The wind direction is not
+    interpolated (350 and 10 degrees are not 180 degrees apart), it is held as in 'step' mode.
+
+    args:
+        forcIP      # Forcing of the hourly weather of the simulation period
+        simTime     # SimParam of the simulation
+        windMin     # minimum wind speed (m s-1)
+        mode        # 'step' or 'linear'
+
+    properties
+        index       # weather record (index of the forcIP lists) of each time step
+        deepTemp    # deep soil temperature (K), set at each time step
+        waterTemp   # ground water temp, set at each time step
+        (and the FIELDS of Forcing at the current time step, read only)
+    """
+
+    FIELDS = ('infra', 'wind', 'uDir', 'hum', 'pres', 'temp', 'rHum', 'prec', 'dif', 'dir')
+    STEP_FIELDS = ('uDir',)     # fields of the next weather record in 'linear' mode too
+    MODES = ("step", "linear")
+    MODE_MSG = "Forcing mode must be one of {}. Got '{}'."
+
+    def __init__(self, forcIP, simTime, windMin, mode="step"):
+        if mode not in self.MODES:
+            raise Exception(self.MODE_MSG.format(self.MODES, mode))
+        self.mode = mode
+        self.deepTemp = None
+        self.waterTemp = None
+
+        # simulation time increment raised to weather time step, minus one to be
+        # consistent with forcIP list index
+        ph = simTime.dt/3600.
+        self.index = [int(math.ceil(it * ph)) - 1 for it in range(simTime.nt)]
+
+        columns = dict((name, getattr(forcIP, name)) for name in self.FIELDS)
+        if mode == "step":
+            columns['wind'] = [max(w, windMin) for w in columns['wind']]
+            self._map = self.index
+        else:
+            # Weather record i is the value at the end of hour i + 1, the first one also
+            # stands for the start of the simulation
+            last = len(forcIP.temp) - 1
+            after = [min(max(i, 0), last) for i in self.index]
+            before = [max(i - 1, 0) for i in after]
+            frac = [it * ph - i for it, i in enumerate(after)]
+            for name in self.FIELDS:
+                col = columns[name]
+                if name in self.STEP_FIELDS:
+                    columns[name] = array('d', [col[i] for i in after])
+                else:
+                    columns[name] = array('d', [col[i0] * (1. - f) + col[i1] * f
+                                                for i0, i1, f in zip(before, after, frac)])
+            columns['wind'] = array('d', [max(w, windMin) for w in columns['wind']])
+            self._map = list(range(simTime.nt))
+
+        self._columns = columns
+        self._pos = 0
+
+    def __repr__(self):
+        return "ForcingStream: {} mode, {} time steps".format(self.mode, len(self.index))
+
+    def seek(self, it):
+        """ Move to time step it, and return its weather record """
+        self._pos = self._map[it]
+        return self.index[it]
+
+
+for _name in ForcingStream.FIELDS:
+    setattr(ForcingStream, _name, _column_property(_name))
@@ -0,0 +1,567 @@
+"""
+Headless building geometry of Dragonfly typologies & cities.
+
+The Dragonfly components compute the geometry parameters of a typology (average height,
+footprint, facade & floor areas) from closed Rhino breps. Footprints computes them from
+extruded footprint polygons & building heights instead (i.e. GeoJSON-like features in
+projected coordinates, in meters), without RhinoCommon, for the thousands of buildings of
+server-side batch runs:
+
+    footprints = Footprints.from_geojson(features, height="height")
+    city = City.from_footprints(footprints, programs, ages, terrain_area)
+    city.set_uwg_input(model)
+
+The areas, perimeters & facades of all the buildings are computed at once, into columns.
+As the boolean union of the buildings does in Dragonfly, the walls shared by adjacent
+footprints are not part of the facade, up to the height of the lower building: the
+overlaps of the collinear edges of different buildings, within tolerance, whether their
+vertices match or not.
+
+FootprintIndex finds the equivalent footprints among many (the floors of a Dragonfly
+building, the duplicated features of GIS data) in about linear time, by hashing them into
+buckets of the tolerance size (see Footprints.unique & Geometry.calculateBldgFootprint).
+"""
+from __future__ import division, print_function
+
+try:
+    range = xrange
+except NameError:
+    pass
+
+import math
+from array import array
+
+DEFAULT_FLOOR_HEIGHT = 3.05         # floor-to-floor height (m)
+DEFAULT_FRACT_HEAT_TO_CANYON = 0.5  # fraction of the waste heat rejected to the canyon
+TOLERANCE = 0.01                    # distance under which two vertices are the same (m)
+DIRECTIONS = 64                     # direction bins of the edges, to find the shared walls
+
+# Dragonfly building programs & ages, in the order of the rows & columns of uwg.bld
+BLDG_PROGRAMS = ('FullServiceRestaurant', 'Hospital', 'LargeHotel', 'LargeOffice',
+                 'MediumOffice', 'MidRiseApartment', 'OutPatient', 'PrimarySchool',
+                 'QuickServiceRestaurant', 'SecondarySchool', 'SmallHotel', 'SmallOffice',
+                 'StandAloneRetail', 'StripMall', 'SuperMarket', 'Warehouse')
+BLDG_AGES = ('Pre1980s', '1980sPresent', 'NewConstruction')
+
+
+def ring_area(ring):
+    """ Signed area of a ring of (x, y) vertices, positive if counterclockwise """
+    return sum([x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1])]) / 2.
+
+
+def ring_perimeter(ring):
+    """ Length of a ring of (x, y) vertices """
+    return sum([math.hypot(x1 - x0, y1 - y0) for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1])])
+
+
+def polygon_area(polygon):
+    """ Area of a polygon (list of rings, the outer ring followed by the holes) """
+    return abs(ring_area(polygon[0])) - sum([abs(ring_area(ring)) for ring in polygon[1:]])
+
+
+def polygon_perimeter(polygon):
+    """ Length of all the rings of a polygon, including its holes (i.e. courtyards) """
+    return sum([ring_perimeter(ring) for ring in polygon])
+
+
+def ring_centroid(ring):
+    """ Centroid (x, y) of the area of a ring of (x, y) vertices """
+    area = 0.
+    cx = cy = 0.
+    for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]):
+        cross = x0 * y1 - x1 * y0
+        area += cross
+        cx += (x0 + x1) * cross
+        cy += (y0 + y1) * cross
+    if area == 0.:
+        return sum(x for x, y in ring) / len(ring), sum(y for x, y in ring) / len(ring)
+    return cx / (3. * area), cy / (3. * area)
+
+
+def polygon_centroid(polygon):
+    """ Centroid (x, y) of the area of a polygon (list of rings, the outer ring followed by the
+    holes) """
+    areas = [abs(ring_area(ring)) for ring in polygon]
+    weights = areas[:1] + [-a for a in areas[1:]]
+    total = sum(weights)
+    if total == 0.:
+        return ring_centroid(polygon[0])
+    centroids = [ring_centroid(ring) for ring in polygon]
+    return (sum(w * c[0] for w, c in zip(weights, centroids)) / total,
+            sum(w * c[1] for w, c in zip(weights, centroids)) / total)
+
+
+class FootprintIndex(object):
+    """
+    Index of footprints (i.e. the floors of a building projected on the ground) that finds
+    the equivalent ones: of the same XY centroid & first vertex within tolerance, and of the
+    same area within tolerance^2, as Dragonfly's Geometry.isGeoEquivalent. The centroid,
+    area & first vertex of each footprint are given once, and the footprints are hashed into
+    buckets of their centroid the size of the tolerance, so that a footprint is only compared
+    to those of the neighbouring buckets rather than to all of them.
+
+    args:
+        tolerance       # distance tolerance (m or model units)
+
+    properties
+        items           # list of the items of the unique footprints, in order
+    """
+
+    def __init__(self, tolerance=TOLERANCE):
+        self.tolerance = tolerance
+        self.area_tolerance = tolerance * tolerance
+        self.items = []
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        return "FootprintIndex: {} unique footprints".format(len(self.items))
+
+    def _bucket(self, centroid):
+        return int(math.floor(centroid[0] / self.tolerance)), int(math.floor(centroid[1] / self.tolerance))
+
+    def find(self, centroid, area, point):
+        """ Item of the footprint equivalent to a footprint of centroid (x, y), area & first
+        vertex point (x, y), None if there is none """
+        tol = self.tolerance
+        bx, by = self._bucket(centroid)
+        for i in (bx - 1, bx, bx + 1):
+            for j in (by - 1, by, by + 1):
+                for c, a, p, item in self._buckets.get((i, j), ()):
+                    if abs(c[0] - centroid[0]) <= tol and abs(c[1] - centroid[1]) <= tol and \
+                            abs(a - area) <= self.area_tolerance and \
+                            abs(p[0] - point[0]) <= tol and abs(p[1] - point[1]) <= tol:
+                        return item
+        return None
+
+    def add(self, centroid, area, point, item):
+        """ Add a footprint unless there is an equivalent one. Return True if it was added """
+        if self.find(centroid, area, point) is not None:
+            return False
+        key = self._bucket(centroid)
+        entry = (centroid, area, point, item)
+        if key in self._buckets:
+            self._buckets[key].append(entry)
+        else:
+            self._buckets[key] = [entry]
+        self.items.append(item)
+        return True
+
+
+def _polygon(coordinates):
+    """ List of the rings of (x, y) vertices of a polygon, a single ring, or GeoJSON coordinates
+    of a polygon, without the closing vertex of the rings """
+    if coordinates and isinstance(coordinates[0][0], (int, float)):
+        coordinates = [coordinates]
+    polygon = []
+    for ring in coordinates:
+        ring = [(float(pt[0]), float(pt[1])) for pt in ring]
+        if len(ring) > 1 and ring[0] == ring[-1]:
+            ring.pop()
+        polygon.append(ring)
+    return polygon
+
+
+class Footprints(object):
+    """
+    Buildings as footprint polygons extruded to their heights, and their geometry parameters
+    as columns (one value per building).
+
+    args:
+        polygons        # list of the footprint of each building, as a list of (x, y) vertices
+                        # or a list of rings (the outer ring followed by the holes), in meters
+        heights         # list of the height of each building (m)
+        floor_to_floor  # floor-to-floor height (m), defaults to 3.05
+        tolerance       # distance under which two vertices are the same (m)
+
+    properties
+        polygons        # list of the footprints, as lists of rings
+        properties      # list of the properties of each building (from_geojson), or None
+        heights         # height of each building (m)
+        areas           # footprint area of each building (m2)
+        perimeters      # length of the footprint of each building (m)
+        facade_areas    # facade area of each building (m2), without the walls shared with
+                        # the adjacent buildings (overlaps of collinear edges)
+        floors          # number of floors of each building (one floor every floor_to_floor
+                        # from the ground, as Dragonfly slices the breps)
+        floor_areas     # floor area of each building (m2)
+    """
+
+    LENGTH_MSG = "Footprints must have one height per polygon. Got {} polygons and {} heights."
+    GEOMETRY_MSG = "Footprints can only be made of Polygon or MultiPolygon geometries. Got '{}'."
+    HEIGHT_MSG = "Feature {} has no '{}' property."
+
+    def __init__(self, polygons, heights, floor_to_floor=None, tolerance=TOLERANCE):
+        if len(polygons) != len(heights):
+            raise Exception(self.LENGTH_MSG.format(len(polygons), len(heights)))
+
+        self.floor_to_floor = floor_to_floor or DEFAULT_FLOOR_HEIGHT
+        self.tolerance = tolerance
+        self.polygons = [_polygon(polygon) for polygon in polygons]
+        self.properties = None
+
+        self.heights = array('d', heights)
+        self.areas = array('d', [polygon_area(polygon) for polygon in self.polygons])
+        self.perimeters = array('d', [polygon_perimeter(polygon) for polygon in self.polygons])
+        self.facade_areas = array('d', self._facade_areas())
+        self.floors = [int(math.floor(h / self.floor_to_floor)) for h in self.heights]
+        self.floor_areas = array('d', [a * n for a, n in zip(self.areas, self.floors)])
+
+    @classmethod
+    def from_geojson(cls, features, height="height", floor_to_floor=None, tolerance=TOLERANCE):
+        """ Footprints of GeoJSON-like features, i.e. a FeatureCollection dictionary or a list of
+        Feature dictionaries with Polygon or MultiPolygon geometries (one building per polygon).
+        The coordinates must be projected, in meters.
+
+        args:
+            features: FeatureCollection or list of features.
+            height: Name of the property of the features that holds the building height (m).
+            floor_to_floor: Floor-to-floor height (m), defaults to 3.05.
+            tolerance: Distance under which two vertices are the same (m).
+        returns:
+            Footprints, with the properties of the feature of each building
+        """
+        if isinstance(features, dict):
+            features = features["features"]
+
+        polygons, heights, properties = [], [], []
+        for i, feature in enumerate(features):
+            geometry = feature["geometry"]
+            props = feature.get("properties") or {}
+            if props.get(height) is None:
+                raise Exception(cls.HEIGHT_MSG.format(i, height))
+
+            if geometry["type"] == "Polygon":
+                parts = [geometry["coordinates"]]
+            elif geometry["type"] == "MultiPolygon":
+                parts = geometry["coordinates"]
+            else:
+                raise Exception(cls.GEOMETRY_MSG.format(geometry["type"]))
+
+            for part in parts:
+                polygons.append(part)
+                heights.append(float(props[height]))
+                properties.append(props)
+
+        footprints = cls(polygons, heights, floor_to_floor, tolerance)
+        footprints.properties = properties
+        return footprints
+
+    def __len__(self):
+        return len(self.polygons)
+
+    def __repr__(self):
+        return "Footprints: {} buildings, {} m2".format(len(self), int(sum(self.areas)))
+
+    def _facade_areas(self):
+        """ Perimeter x height of each building, less the walls shared with the adjacent buildings
+        up to the height of the lower one. Two edges are shared along their overlap when they are
+        collinear within tolerance, whether or not their vertices match (i.e. T-junctions). The
+        overlaps of an edge with several others are merged, so each part of it is only shared
+        once, up to the highest of its neighbours there. A duplicate footprint (see unique) does
+        not share the walls of the others, but has those of the building it duplicates. """
+        heights = self.heights
+        facades = [p * h for p, h in zip(self.perimeters, heights)]
+        originals = self._originals()
+
+        tol = self.tolerance
+        segments = []       # (building, x0, y0, x1, y1, length) of each edge
+        for i, polygon in enumerate(self.polygons):
+            for ring in polygon:
+                for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]):
+                    length = math.hypot(x1 - x0, y1 - y0)
+                    if length > tol:
+                        segments.append((i, x0, y0, x1, y1, length))
+        if not segments:
+            return facades
+
+        # Candidate pairs: the edges of different buildings and of close directions in the same
+        # cell of a grid the size of the average edge, each edge being in the cells of its
+        # bounding box. The grid is offset from the origin, as footprints are often drawn on
+        # round coordinates.
+        size = max(sum(seg[5] for seg in segments) / len(segments), tol)
+        x_origin, y_origin = segments[0][1] - 0.382 * size, segments[0][2] - 0.618 * size
+        cells = {}
+        for k, (i, x0, y0, x1, y1, length) in enumerate(segments):
+            direction = int(math.atan2(y1 - y0, x1 - x0) % math.pi / math.pi * DIRECTIONS) % DIRECTIONS
+            for cx in range(int(math.floor((min(x0, x1) - x_origin - tol) / size)),
+                            int(math.floor((max(x0, x1) - x_origin + tol) / size)) + 1):
+                for cy in range(int(math.floor((min(y0, y1) - y_origin - tol) / size)),
+                                int(math.floor((max(y0, y1) - y_origin + tol) / size)) + 1):
+                    key = (cx, cy, direction)
+                    if key in cells:
+                        cells[key].append(k)
+                    else:
+                        cells[key] = [k]
+
+        pairs = set()
+        for (cx, cy, direction), cell in cells.items():
+            # The edges of the next direction, as the directions of collinear edges may be
+            # on both sides of the boundary of two directions
+            others = cells.get((cx, cy, (direction + 1) % DIRECTIONS), ())
+            for m, a in enumerate(cell):
+                for b in cell[m + 1:]:
+                    pairs.add((a, b) if a < b else (b, a))
+                for b in others:
+                    pairs.add((a, b) if a < b else (b, a))
+
+        # Overlaps of each edge with the edges of the other buildings, as (start, end, height)
+        # along the edge
+        overlaps = {}
+        for a, b in pairs:
+            i, j = segments[a][0], segments[b][0]
+            if i == j or originals[i] == j or originals[j] == i or \
+                    (originals[i] is not None and originals[j] is not None):
+                continue
+
+            # The end points of the shorter edge on the line of the longer one
+            if segments[a][5] < segments[b][5]:
+                a, b = b, a
+                i, j = j, i
+            ax0, ay0, ax1, ay1, length = segments[a][1:]
+            bx0, by0, bx1, by1, other = segments[b][1:]
+            ux, uy = (ax1 - ax0) / length, (ay1 - ay0) / length
+            if abs((bx0 - ax0) * uy - (by0 - ay0) * ux) > tol or \
+                    abs((bx1 - ax0) * uy - (by1 - ay0) * ux) > tol:
+                continue
+            t0 = (bx0 - ax0) * ux + (by0 - ay0) * uy
+            t1 = (bx1 - ax0) * ux + (by1 - ay0) * uy
+            start, end = max(0., min(t0, t1)), min(length, max(t0, t1))
+            if end - start <= tol:
+                continue
+
+            # The same overlap along the shorter edge
+            vx, vy = (bx1 - bx0) / other, (by1 - by0) / other
+            s0 = (ax0 + ux * start - bx0) * vx + (ay0 + uy * start - by0) * vy
+            s1 = (ax0 + ux * end - bx0) * vx + (ay0 + uy * end - by0) * vy
+
+            # A duplicate only takes the walls of the others, as its original does
+            if originals[j] is None:
+                overlaps.setdefault(a, []).append((start, end, heights[j]))
+            if originals[i] is None:
+                overlaps.setdefault(b, []).append((max(0., min(s0, s1)), min(other, max(s0, s1)),
+                                                   heights[i]))
+
+        for k, intervals in overlaps.items():
+            i = segments[k][0]
+            bounds = sorted(set([t for start, end, h in intervals for t in (start, end)]))
+            for t0, t1 in zip(bounds[:-1], bounds[1:]):
+                cover = max([h for start, end, h in intervals if start <= t0 and end >= t1] or [0.])
+                facades[i] -= (t1 - t0) * min(heights[i], cover)
+        return facades
+
+    def _originals(self):
+        """ Index of the building each footprint duplicates (i.e. the duplicated features of
+        GIS data), found with a FootprintIndex, None for the unique ones """
+        index = FootprintIndex(self.tolerance)
+        originals = []
+        for i, polygon in enumerate(self.polygons):
+            centroid = polygon_centroid(polygon)
+            original = index.find(centroid, self.areas[i], polygon[0][0])
+            if original is None:
+                index.add(centroid, self.areas[i], polygon[0][0], i)
+            originals.append(original)
+        return originals
+
+    def unique(self):
+        """ Indices of the buildings whose footprint is not equivalent to the footprint of a
+        previous one (i.e. the duplicated features of GIS data), found with a FootprintIndex """
+        return [i for i, original in enumerate(self._originals()) if original is None]
+
+    def typology_params(self, indices=None):
+        """ Geometry parameters of the buildings of a typology, as Dragonfly computes them
+        from their breps (Geometry.calculateTypologyGeoParams).
+
+        args:
+            indices: Indices of the buildings of the typology, defaults to all the buildings.
+        returns:
+            average_height: Footprint area weighted average height of the buildings (m).
+            footprint_area: Footprint area of the buildings (m2).
+            floor_area: Floor area of the buildings (m2).
+            facade_area: Facade area of the buildings (m2).
+        """
+        if indices is None:
+            indices = range(len(self))
+        footprint_area = sum([self.areas[i] for i in indices])
+        average_height = sum([self.heights[i] * self.areas[i] for i in indices]) / footprint_area
+        floor_area = sum([self.floor_areas[i] for i in indices])
+        facade_area = sum([self.facade_areas[i] for i in indices])
+        return average_height, footprint_area, floor_area, facade_area
+
+
+class Typology(object):
+    """
+    Headless Dragonfly typology: a group of buildings of the same DOE building program & age.
+
+    args:
+        average_height          # average height of the buildings (m)
+        footprint_area          # footprint area of the buildings (m2)
+        facade_area             # facade area of the buildings (m2)
+        bldg_program            # one of BLDG_PROGRAMS
+        bldg_age                # one of BLDG_AGES
+        floor_to_floor          # floor-to-floor height (m), defaults to 3.05
+        fract_heat_to_canyon    # fraction of the waste heat rejected to the canyon, defaults to 0.5
+        floor_area              # floor area of the buildings (m2), defaults to the footprint
+                                # area x number_of_stories
+
+    properties
+        number_of_stories       # average number of stories of the buildings
+    """
+
+    PROGRAM_MSG = "Building program must be one of {}. Got '{}'."
+    AGE_MSG = "Building age must be one of {}. Got '{}'."
+
+    def __init__(self, average_height, footprint_area, facade_area, bldg_program, bldg_age,
+                 floor_to_floor=None, fract_heat_to_canyon=None, floor_area=None):
+        if bldg_program not in BLDG_PROGRAMS:
+            raise Exception(self.PROGRAM_MSG.format(BLDG_PROGRAMS, bldg_program))
+        if bldg_age not in BLDG_AGES:
+            raise Exception(self.AGE_MSG.format(BLDG_AGES, bldg_age))
+
+        self.average_height = average_height
+        self.footprint_area = footprint_area
+        self.facade_area = facade_area
+        self.bldg_program = bldg_program
+        self.bldg_age = bldg_age
+        self.floor_to_floor = floor_to_floor or DEFAULT_FLOOR_HEIGHT
+        self.fract_heat_to_canyon = DEFAULT_FRACT_HEAT_TO_CANYON if fract_heat_to_canyon is None \
+            else fract_heat_to_canyon
+        self.floor_area = footprint_area * self.number_of_stories if floor_area is None else floor_area
+
+    @classmethod
+    def from_footprints(cls, footprints, bldg_program, bldg_age, indices=None,
+                        fract_heat_to_canyon=None):
+        """ Typology of some of the buildings of a Footprints (all of them by default) """
+        average_height, footprint_area, floor_area, facade_area = footprints.typology_params(indices)
+        return cls(average_height, footprint_area, facade_area, bldg_program, bldg_age,
+                   footprints.floor_to_floor, fract_heat_to_canyon, floor_area)
+
+    @classmethod
+    def merge(cls, typology_one, typology_two):
+        """ Typology of two typologies of the same program & age, as Dragonfly merges them """
+        footprint_area = typology_one.footprint_area + typology_two.footprint_area
+        floor_area = typology_one.floor_area + typology_two.floor_area
+
+        def by_footprint(name):
+            return (getattr(typology_one, name) * typology_one.footprint_area +
+                    getattr(typology_two, name) * typology_two.footprint_area) / footprint_area
+
+        def by_floor(name):
+            return (getattr(typology_one, name) * typology_one.floor_area +
+                    getattr(typology_two, name) * typology_two.floor_area) / floor_area
+
+        return cls(by_footprint('average_height'), footprint_area,
+                   typology_one.facade_area + typology_two.facade_area,
+                   typology_one.bldg_program, typology_one.bldg_age, by_floor('floor_to_floor'),
+                   by_floor('fract_heat_to_canyon'), floor_area)
+
+    @property
+    def name(self):
+        """ Program & age, i.e. 'MidRiseApartment,Pre1980s' """
+        return self.bldg_program + ',' + self.bldg_age
+
+    @property
+    def number_of_stories(self):
+        return int(round(self.average_height / self.floor_to_floor))
+
+    def __repr__(self):
+        return "Typology: {}, {} m high, {} m2 of floor".format(
+            self.name, round(self.average_height, 1), int(self.floor_area))
+
+
+class City(object):
+    """
+    Headless Dragonfly city: the urban geometry parameters of the uwg from building typologies.
+
+    args:
+        building_typologies     # list of Typology objects, one per program & age
+        terrain_area            # area of the urban terrain (m2)
+        characteristic_length   # side of the square of the urban area (m), defaults to
+                                # sqrt(terrain_area) as for a Dragonfly terrain
+
+    properties
+        average_bldg_height     # footprint area weighted average height of the buildings (m)
+        site_coverage_ratio     # fraction of the terrain covered by the footprints
+        facade_to_site_ratio    # facade area / terrain area
+        bldg_type_ratios        # dictionary of typology name & fraction of the floor area
+        floor_height            # floor area weighted floor-to-floor height (m)
+        fract_heat_to_canyon    # floor area weighted fraction of waste heat to the canyon
+    """
+
+    def __init__(self, building_typologies, terrain_area, characteristic_length=None):
+        self.building_typologies = building_typologies
+        self.terrain_area = terrain_area
+        self.characteristic_length = characteristic_length or math.sqrt(terrain_area)
+
+        footprint_area = sum(t.footprint_area for t in building_typologies)
+        floor_area = sum(t.floor_area for t in building_typologies)
+        self.average_bldg_height = sum(
+            t.average_height * t.footprint_area for t in building_typologies) / footprint_area
+        self.site_coverage_ratio = footprint_area / terrain_area
+        self.facade_to_site_ratio = sum(t.facade_area for t in building_typologies) / terrain_area
+        self.bldg_type_ratios = dict((t.name, t.floor_area / floor_area) for t in building_typologies)
+        self.floor_height = sum(t.floor_to_floor * t.floor_area for t in building_typologies) / floor_area
+        self.fract_heat_to_canyon = sum(
+            t.fract_heat_to_canyon * t.floor_area for t in building_typologies) / floor_area
+
+    @classmethod
+    def from_typologies(cls, typologies, terrain_area, characteristic_length=None):
+        """ City of typologies, those of the same program & age being merged """
+        merged = []
+        index = {}
+        for typology in typologies:
+            if typology.name in index:
+                i = index[typology.name]
+                merged[i] = Typology.merge(merged[i], typology)
+            else:
+                index[typology.name] = len(merged)
+                merged.append(typology)
+        return cls(merged, terrain_area, characteristic_length)
+
+    @classmethod
+    def from_footprints(cls, footprints, programs, ages, terrain_area, characteristic_length=None):
+        """ City of the buildings of a Footprints, grouped into typologies by program & age.
+
+        args:
+            footprints: Footprints of the buildings.
+            programs: Building program of each building (one of BLDG_PROGRAMS).
+            ages: Building age of each building (one of BLDG_AGES).
+            terrain_area: Area of the urban terrain (m2).
+            characteristic_length: Side of the square of the urban area (m).
+        """
+        groups = {}
+        names = []
+        for i, key in enumerate(zip(programs, ages)):
+            if key not in groups:
+                groups[key] = []
+                names.append(key)
+            groups[key].append(i)
+
+        typologies = [Typology.from_footprints(footprints, program, age, groups[(program, age)])
+                      for program, age in names]
+        return cls(typologies, terrain_area, characteristic_length)
+
+    def __repr__(self):
+        return "City: {} typologies, {} m high, coverage {}, facade-to-site {}".format(
+            len(self.building_typologies), round(self.average_bldg_height, 1),
+            round(self.site_coverage_ratio, 2), round(self.facade_to_site_ratio, 2))
+
+    def get_uwg_matrix(self):
+        """ 16 x 3 matrix of the fraction of each building program & age, as uwg.bld """
+        bld = [[0 for x in range(3)] for y in range(16)]
+        for name, fraction in self.bldg_type_ratios.items():
+            program, age = name.split(',')
+            bld[BLDG_PROGRAMS.index(program)][BLDG_AGES.index(age)] = round(fraction, 3)
+        return bld
+
+    def set_uwg_input(self, model):
+        """ Set the urban characteristics & building stock of a uwg object from the city """
+        model.bldHeight = float(self.average_bldg_height)
+        model.bldDensity = float(self.site_coverage_ratio)
+        model.verToHor = float(self.facade_to_site_ratio)
+        model.charLength = float(self.characteristic_length)
+        model.h_mix = float(self.fract_heat_to_canyon)
+        model.flr_h = float(self.floor_height)
+        model.bld = self.get_uwg_matrix()
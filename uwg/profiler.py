@@ -0,0 +1,167 @@
+"""
+Profiling of the components of a uwg simulation.
+
+A Profiler replaces the methods of the components of a simulation (i.e. the solar
+calculations, the rural & urban models and the building energy models) by timed wrappers,
+set on the component objects themselves, and removes them at the end of the simulation.
+A simulation that is not profiled (uwg.profile = False) runs its components unchanged, so
+it does not pay for the profiling.
+
+The time of a component excludes the time of the components it calls (i.e. urbflux
+excludes BEMCalc), so the times of all the components add up to the profiled time of the
+simulation. They are reported in total and for each simulated day:
+
+    model.profile = True
+    model.run()
+    model.profiler.report()     # or model.profiler.to_json()
+"""
+from __future__ import division, print_function
+
+import json
+import timeit
+
+try:
+    range = xrange
+except NameError:
+    pass
+
+
+class Profiler(object):
+    """
+    Cumulative wall time (s) & number of calls of each component of a uwg simulation.
+
+    args:
+        model       # uwg object, instrumented from its init_simulation
+
+    properties
+        totals      # dictionary of component name & [time, calls]
+        days        # list of (month, day) of each simulated day, in order (the date of a time
+                    # step, so the last time step of a simulation is on the day after it)
+        daily       # dictionary of (month, day) & dictionary of component name & [time, calls]
+        wall        # wall time of the simulation (s), from start to stop
+    """
+
+    # Component name & (path of the object relative to the uwg object, method name).
+    # The schedules & urbflux are timed by the uwg methods that update them, without the
+    # components they call.
+    COMPONENTS = (
+        ('solarcalcs', ('solar', 'solarcalcs')),
+        ('schedules', ('', 'update_solar_and_schedules')),
+        ('rural.SurfFlux', ('rural', 'SurfFlux')),
+        ('RSM.VDM', ('RSM', 'VDM')),
+        ('urbflux', ('', 'update_urban')),
+        ('BEMCalc', ('BEM[*].building', 'BEMCalc')),
+        ('UCModel', ('UCM', 'UCModel')),
+        ('UBLModel', ('UBL', 'UBLModel')),
+        ('record_output', ('', 'record_output')),
+        )
+
+    def __init__(self, model):
+        self.model = model
+        self.totals = dict((name, [0., 0]) for name, method in self.COMPONENTS)
+        self.days = []
+        self.daily = {}
+        self.wall = 0.
+
+        self._stack = []        # time of the components called by the running ones
+        self._wrapped = []      # (object, method name) of the wrappers
+        self._start = None
+
+    def __repr__(self):
+        return "Profiler: {} components, {} days".format(len(self.totals), len(self.days))
+
+    def start(self):
+        """ Wrap the methods of the components of the model & start the wall clock """
+        for name, (path, method) in self.COMPONENTS:
+            for obj in self._objects(path):
+                self._wrap(obj, method, name)
+
+        # The building energy model of all building types at once (see BuildingBatch)
+        if getattr(self.model, 'bemBatch', None) is not None:
+            self._wrap(self.model.bemBatch, 'BEMCalc', 'BEMCalc')
+
+        self._start = timeit.default_timer()
+
+    def stop(self):
+        """ Remove the wrappers & stop the wall clock """
+        if self._start is not None:
+            self.wall += timeit.default_timer() - self._start
+            self._start = None
+        for obj, method in self._wrapped:
+            obj.__dict__.pop(method, None)
+        self._wrapped = []
+
+    def report(self):
+        """
+        Dictionary of the profile, i.e.
+            {'wall': 12.3, 'other': 0.4,
+             'totals': {'RSM.VDM': {'time': 2.1, 'calls': 8640}, ...},
+             'days': [{'month': 7, 'day': 1, 'components': {'RSM.VDM': {...}, ...}}, ...]}
+        where other is the wall time that is not spent in a profiled component.
+        """
+        def components(table):
+            return dict((name, {'time': t, 'calls': n}) for name, (t, n) in table.items())
+
+        return {
+            'wall': self.wall,
+            'other': self.wall - sum(t for t, n in self.totals.values()),
+            'totals': components(self.totals),
+            'days': [{'month': month, 'day': day, 'components': components(self.daily[(month, day)])}
+                     for month, day in self.days],
+            }
+
+    def to_json(self, path=None, **kwargs):
+        """ The report as a JSON string, also written to path if given """
+        text = json.dumps(self.report(), **kwargs)
+        if path is not None:
+            f = open(path, 'w')
+            f.write(text)
+            f.close()
+        return text
+
+    def _objects(self, path):
+        """ Objects of a path relative to the model ('' for the model itself) """
+        objects = [self.model]
+        for attr in path.split('.') if path else []:
+            if attr.endswith('[*]'):
+                objects = [item for obj in objects for item in getattr(obj, attr[:-3])]
+            else:
+                objects = [getattr(obj, attr) for obj in objects]
+        return objects
+
+    def _wrap(self, obj, method, name):
+        """ Set a timed wrapper of a method of obj on obj """
+        if method in obj.__dict__:
+            return      # i.e. a rural model shared by the cases of a uwgBatch
+        func = getattr(obj, method)
+        simTime = self.model.simTime
+        stack = self._stack
+        totals = self.totals[name]
+        daily = self.daily
+        days = self.days
+        timer = timeit.default_timer
+
+        def timed(*args, **kwargs):
+            start = timer()
+            stack.append(0.)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = timer() - start
+                own = elapsed - stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+
+                totals[0] += own
+                totals[1] += 1
+
+                key = (int(simTime.month), int(simTime.day))
+                if key not in daily:
+                    days.append(key)
+                    daily[key] = dict((c, [0., 0]) for c, m in self.COMPONENTS)
+                day = daily[key][name]
+                day[0] += own
+                day[1] += 1
+
+        obj.__dict__[method] = timed
+        self._wrapped.append((obj, method))
@@ -2,6 +2,11 @@ from __future__ import division
 
 from math import log, pow, exp
 
+try:
+    range = xrange
+except NameError:
+    pass
+
 
 def psychrometrics (Tdb_in, w_in, P):
     """
@@ -86,6 +91,95 @@ def HumFromRHumTemp(RH,T,P):
     W = 0.62198*PW/(P-PW)    # 4. Specific humidity
     return W
 
+# Array versions of the functions above, for whole series of values (i.e. the hours of a
+# weather file). They take sequences (lists or arrays) of equal length, where a pressure
+# can also be a single value, and return lists. Each value is computed with the same
+# expressions as the scalar function, so the results are identical to calling it once
+# per value, without the overhead of the function calls.
+
+def _series(x, n):
+    # Sequence of n values of x, x being a sequence or a single value
+    if isinstance(x, (int, float)):
+        return [x] * n
+    return x
+
+def psychrometrics_array(Tdb_in, w_in, P):
+    """
+    psychrometrics of series of values
+    Input: Tdb_in, w_in, P as sequences ([K], [kgv/kgda], [Pa]), P may be a single value
+    Output: lists of Tdb, w, phi, h, Tdp, v (see psychrometrics)
+    """
+    c_air = 1006.   # [J/kg] air heat capacity, value from ASHRAE Fundamentals
+    hlg = 2501000.  # [J/kg] latent heat, value from ASHRAE Fundamentals
+    cw  = 1860.     # [J/kg] value from ASHRAE Fundamentals
+    _log, _pow, _exp = log, pow, exp
+
+    n = len(Tdb_in)
+    P_in = _series(P, n)
+    Tdb_out, w_out, phi_out, h_out, Tdp_out, v_out = [], [], [], [], [], []
+
+    for i in range(n):
+        P = P_in[i]/1000.
+        Tdb = Tdb_in[i] - 273.15
+        w = w_in[i]
+
+        Pw = (w*P)/(0.621945 + w)
+        T = Tdb + 273.15
+        Pws = _exp(-1*(5.8002206e3) / T+1.3914993 + (4.8640239e-2)*T*(-1.) + (4.1764768e-5)*_pow(T,2) - (1.4452093e-8)*_pow(T,3) + 6.5459673*_log(T))/1000.
+        alpha = _log(Pw)
+
+        Tdb_out.append(Tdb)
+        w_out.append(w)
+        phi_out.append(Pw/Pws*100.0)
+        h_out.append(c_air*Tdb + w*(hlg+cw*Tdb))
+        Tdp_out.append(6.54 + 14.526*alpha + _pow(alpha,2)*0.7389 + _pow(alpha,3)*0.09486 + _pow(Pw,0.1984)*0.4569)
+        v_out.append(0.287042 * (Tdb+273.15)*(1+1.607858*w)/P)
+
+    return Tdb_out, w_out, phi_out, h_out, Tdp_out, v_out
+
+def relative_humidity_array(Tdb_in, w_in, P):
+    # phi [Pw/Pws*100] of psychrometrics only, for sequences of Tdb_in [K], w_in [kgv/kgda]
+    # & P [Pa] (or a single P)
+    _log, _pow, _exp = log, pow, exp
+    P = _series(P, len(Tdb_in))
+    phi = []
+    for T, w, p in zip(Tdb_in, w_in, P):
+        p = p/1000.
+        T = (T - 273.15) + 273.15
+        Pws = _exp(-1*(5.8002206e3) / T+1.3914993 + (4.8640239e-2)*T*(-1.) + (4.1764768e-5)*_pow(T,2) - (1.4452093e-8)*_pow(T,3) + 6.5459673*_log(T))/1000.
+        phi.append((w*p)/(0.621945 + w)/Pws*100.0)
+    return phi
+
+def saturation_pressure_array(Tdb_):
+    # saturation_pressure [kPa] of a sequence of dry bulb temperatures [C]
+    _log, _pow, _exp = log, pow, exp
+    return [_exp(-1*(5.8002206e3) / T+1.3914993 + (4.8640239e-2)*T*(-1.) + (4.1764768e-5)*_pow(T,2) - (1.4452093e-8)*_pow(T,3) + 6.5459673*_log(T))/1000.
+            for T in [t + 273.15 for t in Tdb_]]
+
+def moist_air_density_array(P,Tdb,H):
+    # moist_air_density [kgv/ m-3] of sequences of dry bulb temperature [K] & humidity ratio,
+    # P being a sequence or a single value [Pa]
+    P = _series(P, len(Tdb))
+    return [p/(1000*0.287042*t*(1.+1.607858*h)) for p, t, h in zip(P, Tdb, H)]
+
+def HumFromRHumTemp_array(RH,T,P):
+    # HumFromRHumTemp [kgh20/kgn202] of sequences of RH [%], T [C] & P [Pa] (or a single P)
+    C8 = -5.8002206e3
+    C9 = 1.3914993
+    C10 = -4.8640239e-2
+    C11 = 4.1764768e-5
+    C12 = -1.4452093e-8
+    C13 = 6.5459673
+    _log, _pow, _exp = log, pow, exp
+
+    P = _series(P, len(T))
+    W = []
+    for rh, t, p in zip(RH, T, P):
+        t += 273.15
+        PW = rh*_exp(C8/t + C9 + C10*t + C11 * _pow(t,2) + C12 * _pow(t,3) + C13 * _log(t))/100.0
+        W.append(0.62198*PW/(p-PW))
+    return W
+
 """
 function psat = psat(temp,parameter)
     gamw  = (parameter.cl - parameter.cpv) / parameter.rv;
@@ -76,6 +76,77 @@ ZONETYPE = [
     ]
 
 
+class DOELibrary(object):
+    """
+    DOE reference building library read from a readDOE.pkl file, once per process.
+
+    The reference objects are kept serialized, one per building type, built era and
+    climate zone, and are only deserialized when requested. Each call returns a new
+    instance, so runs can modify their objects without affecting each other.
+
+    args:
+        readDOE_file_path   # path of the readDOE.pkl file
+
+    properties:
+        readDOE_file_path
+    """
+
+    # Loaded libraries, by absolute path of the readDOE.pkl file
+    _cache = {}
+
+    def __init__(self, readDOE_file_path):
+
+        if not os.path.exists(readDOE_file_path):
+            raise Exception("readDOE.pkl file: '{}' does not exist.".format(readDOE_file_path))
+
+        readDOE_file = open(readDOE_file_path, 'rb')  # open pickle file in binary form
+        refDOE = pickle.load(readDOE_file)
+        refBEM = pickle.load(readDOE_file)
+        refSchedule = pickle.load(readDOE_file)
+        readDOE_file.close()
+
+        self.readDOE_file_path = readDOE_file_path
+        self._refDOE = self._serialize(refDOE)
+        self._refBEM = self._serialize(refBEM)
+        self._refSchedule = self._serialize(refSchedule)
+
+    def __repr__(self):
+        return "DOELibrary: {}".format(self.readDOE_file_path)
+
+    @classmethod
+    def load(cls, readDOE_file_path):
+        """ Library of a readDOE.pkl file, read the first time it is requested """
+        path = os.path.abspath(readDOE_file_path)
+        if path not in cls._cache:
+            cls._cache[path] = cls(path)
+        return cls._cache[path]
+
+    @classmethod
+    def register(cls, library):
+        """ Use a library read in another process (i.e. passed to a worker process) for its
+        readDOE.pkl file, instead of reading the file again """
+        cls._cache[os.path.abspath(library.readDOE_file_path)] = library
+
+    @staticmethod
+    def _serialize(ref):
+        return [[[pickle.dumps(ref[i][j][k], pickle.HIGHEST_PROTOCOL)
+                  for k in range(len(ref[i][j]))]
+                 for j in range(len(ref[i]))]
+                for i in range(len(ref))]
+
+    def building(self, bldType, builtEra, zone):
+        """ New Building object of a DOE building type, built era and climate zone index """
+        return pickle.loads(self._refDOE[bldType][builtEra][zone])
+
+    def bem(self, bldType, builtEra, zone):
+        """ New BEMDef object of a DOE building type, built era and climate zone index """
+        return pickle.loads(self._refBEM[bldType][builtEra][zone])
+
+    def schedule(self, bldType, builtEra, zone):
+        """ New SchDef object of a DOE building type, built era and climate zone index """
+        return pickle.loads(self._refSchedule[bldType][builtEra][zone])
+
+
 def readDOE(serialize_output=True):
     """
     Read csv files of DOE buildings
@@ -0,0 +1,191 @@
+from array import array
+from operator import attrgetter
+import re
+
+try:
+    range = xrange
+except NameError:
+    pass
+
+
+class Recorder(object):
+    """
+    Recorder
+    Records output variables of a simulation into preallocated arrays of floats,
+    one array per variable.
+
+    Variables are paths of attributes relative to the recorded object, i.e. 'UCM.canTemp'
+    or 'forc.wind' for a uwg object. A list can be indexed with [i] or with [*] for all
+    of its items, i.e. 'BEM[*].building.coolConsump' records the cooling consumption of
+    every building type. A variable that is a list, i.e. 'RSM.tempProf', records each
+    of its items. The paths are expanded into one column per recorded value, named
+    by its index (i.e. 'BEM[0].building.coolConsump' or 'RSM.tempProf[3]').
+
+    args:
+        variables   # list of variable paths
+        length      # number of records (i.e. weather time steps of the simulation)
+        obj         # object whose variables are recorded, used to expand the paths
+        derived     # variable paths of the list whose columns are not recorded by record,
+                    # but filled once all records are made (i.e. from other columns)
+
+    properties:
+        requests    # list of variable paths as requested
+        variables   # list of column names, the expanded variable paths
+        length      # number of records
+    """
+
+    PATH_MSG = "Output variable '{}' is not a valid variable path."
+    MISSING_MSG = "Output variable '{}' does not exist ({} has no attribute '{}')."
+    SEGMENT = re.compile(r"^(\w+)(?:\[(\d+|\*)\])?$")
+
+    def __init__(self, variables, length, obj, derived=()):
+        self.requests = list(variables)
+        self.length = length
+        self.variables = []
+        self._columns = {}      # requested variable path: list of column names
+        self._segments = []     # segments of each column, None for derived columns
+
+        for request in self.requests:
+            self._columns[request] = []
+            for name, segments in self._expand(request, obj):
+                if name in self.variables:
+                    continue
+                self.variables.append(name)
+                self._columns[request].append(name)
+                self._segments.append(None if request in derived else segments)
+
+        self._arrays = [array('d', [0.]) * length for variable in self.variables]
+        self._set_getters()
+
+    def __repr__(self):
+        return "Recorder: {} variables x {} records".format(len(self.variables), self.length)
+
+    def __getstate__(self):
+        # The getters are not pickled, __setstate__ makes them again
+        state = self.__dict__.copy()
+        state.pop('_recorded', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._set_getters()
+
+    def _set_getters(self):
+        # (array, getter) of each column recorded by record
+        self._recorded = [(self._arrays[i], self._getter(self.variables[i], self._segments[i]))
+                          for i in range(len(self.variables)) if self._segments[i] is not None]
+
+    def __getitem__(self, variable):
+        """ Array of the recorded values of a column """
+        try:
+            return self._arrays[self.variables.index(variable)]
+        except ValueError:
+            raise KeyError("Output variable '{}' is not recorded.".format(variable))
+
+    def __contains__(self, variable):
+        return variable in self.variables
+
+    def series(self, request):
+        """ Dictionary of column name and array of recorded values of a requested variable """
+        return dict((name, self[name]) for name in self._columns[request])
+
+    def record(self, obj, n):
+        """ Record the current value of every variable of obj as record n """
+        for values, getter in self._recorded:
+            values[n] = getter(obj)
+
+    def columns(self, requests):
+        """ List of the column names of some requested variable paths """
+        return [name for request in requests for name in self._columns[request]]
+
+    def write_csv(self, csv_file, index=None, nrec=None, variables=None):
+        """ Write the recorded values as a csv file with one column per variable.
+
+        args:
+            csv_file: Path of the csv file, or a file object to write it to.
+            index: Optional list of (name, values) columns written before the variables,
+                i.e. the date of each record.
+            nrec: Number of records to write, defaults to all of them.
+            variables: Column names to write, defaults to all of them.
+        """
+        index = index or []
+        nrec = self.length if nrec is None else nrec
+        variables = self.variables if variables is None else variables
+        names = [name for name, values in index] + list(variables)
+        columns = [values for name, values in index] + [self[name] for name in variables]
+
+        if hasattr(csv_file, "write"):
+            out = csv_file
+        else:
+            out = open(csv_file, "w")
+
+        try:
+            out.write(",".join(names) + "\n")
+            chunk = 4096
+            for i in range(0, nrec, chunk):
+                rows = zip(*[column[i:min(i + chunk, nrec)] for column in columns])
+                out.write("".join([",".join(map(repr, row)) + "\n" for row in rows]))
+        finally:
+            if out is not csv_file:
+                out.close()
+
+    def _expand(self, request, obj):
+        """ List of (column name, [(attribute, index), ...]) of a requested variable path """
+        segments = []
+        for segment in request.split('.'):
+            match = self.SEGMENT.match(segment)
+            if match is None:
+                raise Exception(self.PATH_MSG.format(request))
+            name, index = match.groups()
+            segments.append((name, index if index in (None, '*') else int(index)))
+
+        columns = []
+
+        def _walk(value, i, path, resolved):
+            if i == len(segments):
+                # Record each item of a variable that is a list
+                if isinstance(value, (list, tuple, array)) and resolved[-1][1] is None:
+                    for k in range(len(value)):
+                        columns.append(("{}[{}]".format(path, k),
+                                        resolved[:-1] + [(resolved[-1][0], k)]))
+                else:
+                    columns.append((path, resolved))
+                return
+
+            name, index = segments[i]
+            parent = path or type(obj).__name__
+            path = path + "." + name if path else name
+
+            if not hasattr(value, name):
+                # Attributes set during the simulation (i.e. UBL.sensHeat) can only be
+                # checked when they are recorded
+                if i == len(segments) - 1 and index is None:
+                    columns.append((path, resolved + [(name, None)]))
+                    return
+                raise Exception(self.MISSING_MSG.format(request, parent, name))
+
+            value = getattr(value, name)
+            if index == '*':
+                for k in range(len(value)):
+                    _walk(value[k], i + 1, "{}[{}]".format(path, k), resolved + [(name, k)])
+            elif index is not None:
+                _walk(value[index], i + 1, "{}[{}]".format(path, index), resolved + [(name, index)])
+            else:
+                _walk(value, i + 1, path, resolved + [(name, None)])
+
+        _walk(obj, 0, "", [])
+        return columns
+
+    @staticmethod
+    def _getter(name, segments):
+        """ Function that returns the value of a column from the recorded object """
+        if all(index is None for attr, index in segments):
+            return attrgetter(name)
+
+        def _get(obj):
+            for attr, index in segments:
+                obj = getattr(obj, attr)
+                if index is not None:
+                    obj = obj[index]
+            return obj
+        return _get
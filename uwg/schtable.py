@@ -0,0 +1,152 @@
+from __future__ import division, print_function
+
+try:
+    range = xrange
+except NameError:
+    pass
+
+import copy
+
+
+class SchTable(object):
+    """
+    Building & traffic schedules expanded into the values of every hour of a simulation.
+
+    The weekly DOE schedules (SchDef) and the traffic schedule are looked up once for each
+    hour of the simulation by day type (1 = weekday, 2 = sat, 3 = sun/holiday) and hour of
+    the day, together with the internal heat loads derived from them. Holidays follow the
+    Sunday schedules. Any schedule of a building can be replaced by a profile of hourly
+    values for the whole year (8760 or 8784 values, from January 1st 0:00). The simulation
+    calendar has no February 29th, which is skipped in the 8784 values of a leap year.
+
+    args:
+        Sch         # list of SchDef objects, one per building type (BEM)
+        SchTraffic  # traffic schedule (3 day types x 24 hours)
+        sensAnth    # non-building sensible heat at 100% traffic (W m-2)
+        sensOcc     # sensible heat from occupant (W)
+        LatFOcc     # latent heat fraction from occupant
+        RadFEquip   # radiant heat fraction from equipment
+        RadFLight   # radiant heat fraction from light
+        simTime     # SimParam of the simulation, at its initial time step
+        holidays    # list of (month, day) of holidays
+        overrides   # dictionary of building (BEM) index and dictionary of schedule name
+                    # ('Elec', 'Gas', 'Light', 'Occ', 'Cool', 'Heat' or 'SWH') & hourly profile
+
+    properties
+        hours       # dictionary of (julian, hourDay) & index of the hour in the lists below
+        dayType     # day type of each hour
+        sensAnthrop # non-building sensible heat of each hour (W m-2)
+        loads       # hours x buildings tuples of the LOADS of each building
+    """
+
+    LOADS = ('coolSetpoint',    # cooling setpoint (K)
+             'heatSetpoint',    # heating setpoint (K)
+             'Elec',            # electricity (W m-2)
+             'Light',           # light (W m-2)
+             'Nocc',            # number of occupants (# m-2)
+             'Qocc',            # sensible heat from occupants (W m-2)
+             'SWH',             # hot water (litres per hour)
+             'Gas',             # gas (W m-2)
+             'intHeat',         # internal heat (W m-2)
+             'intHeatFRad',     # radiant fraction of internal heat
+             'intHeatFLat')     # latent fraction of internal heat
+
+    SCHEDULES = ('Elec', 'Gas', 'Light', 'Occ', 'Cool', 'Heat', 'SWH')
+    PROFILE_LENGTHS = (8760, 8784)  # hours of a year, of a leap year
+    OVERRIDE_MSG = "Schedule override '{}' of building {} is not one of {}."
+    LENGTH_MSG = "Schedule override '{}' of building {} must have {} or {} hourly values. Got {}."
+
+    def __init__(self, Sch, SchTraffic, sensAnth, sensOcc, LatFOcc, RadFEquip, RadFLight,
+                 simTime, holidays=None, overrides=None):
+
+        self.Sch = Sch
+        self.SchTraffic = SchTraffic
+        self.sensAnth = sensAnth
+        self.sensOcc = sensOcc
+        self.LatFOcc = LatFOcc
+        self.RadFEquip = RadFEquip
+        self.RadFLight = RadFLight
+        self.overrides = overrides or {}
+
+        for i in self.overrides:
+            for name in self.overrides[i]:
+                if name not in self.SCHEDULES:
+                    raise Exception(self.OVERRIDE_MSG.format(name, i, self.SCHEDULES))
+                if len(self.overrides[i][name]) not in self.PROFILE_LENGTHS:
+                    raise Exception(self.LENGTH_MSG.format(
+                        name, i, self.PROFILE_LENGTHS[0], self.PROFILE_LENGTHS[1],
+                        len(self.overrides[i][name])))
+
+        self.holidays = set(simTime.inobis[month-1] + day - 1 for month, day in holidays or [])
+
+        self.hours = {}
+        self.dayType = []
+        self.sensAnthrop = []
+        self.loads = []
+
+        # Step through a copy of the simulation calendar, as simulate() does
+        simTime = copy.copy(simTime)
+        for it in range(1, simTime.nt, 1):
+            simTime.UpdateDate()
+            key = (simTime.julian, simTime.hourDay)
+            if key not in self.hours:
+                self.hours[key] = len(self.dayType)
+                self.add_hour(simTime.julian, simTime.hourDay)
+
+    def __repr__(self):
+        return "SchTable: {} buildings x {} hours".format(len(self.Sch), len(self.dayType))
+
+    def day_type(self, julian):
+        """ Day type (1 = weekday, 2 = sat, 3 = sun/holiday) of a julian day """
+        if julian in self.holidays or abs(julian % 7) < 1e-10:
+            return 3                                            # Sunday
+        elif abs(julian % 7 - 6.) < 1e-10:
+            return 2                                            # Saturday
+        return 1                                                # Weekday
+
+    def add_hour(self, julian, hourDay):
+        """ Append the schedules & loads of an hour to the table """
+
+        dayType = self.day_type(julian)
+        hourYear = int(julian) * 24 + hourDay
+
+        # The calendar has no February 29th, skip it in the profiles of a leap year
+        hourLeapYear = hourYear + 24 if julian >= 59 else hourYear
+
+        self.dayType.append(dayType)
+        self.sensAnthrop.append(self.sensAnth * (self.SchTraffic[dayType-1][hourDay]))
+
+        loads = []
+        for i in range(len(self.Sch)):
+            sch = self.Sch[i]
+            override = self.overrides.get(i, {})
+
+            def schedule(name):
+                if name in override:
+                    profile = override[name]
+                    if len(profile) == 8784:
+                        return profile[hourLeapYear % 8784]
+                    return profile[hourYear % 8760]
+                return getattr(sch, name)[dayType-1][hourDay]
+
+            coolSetpoint = schedule('Cool') + 273.15            # temperature schedule for cooling
+            heatSetpoint = schedule('Heat') + 273.15            # temperature schedule for heating
+            Elec = sch.Qelec * schedule('Elec')                 # Qelec x elec fraction for day
+            Light = sch.Qlight * schedule('Light')              # Qlight x light fraction for day
+            Nocc = sch.Nocc * schedule('Occ')                   # Number of occupants x occ fraction for day
+            # Sensible Q occupant * fraction occupant sensible Q * number of occupants
+            Qocc = self.sensOcc * (1 - self.LatFOcc) * Nocc
+            SWH = sch.Vswh * schedule('SWH')                    # litres per hour x SWH fraction for day
+            Gas = sch.Qgas * schedule('Gas')                    # Gas Equip Schedule, per m^2 of floor
+
+            # W/m2 from light, electricity, occupants
+            intHeat = Light + Elec + Qocc
+            # fraction of radiant heat from light and equipment of whole internal heat
+            intHeatFRad = (self.RadFLight * Light + self.RadFEquip * Elec) / intHeat
+            # fraction of latent heat (from occupants) of whole internal heat
+            intHeatFLat = self.LatFOcc * self.sensOcc * Nocc/intHeat
+
+            loads.append((coolSetpoint, heatSetpoint, Elec, Light, Nocc, Qocc, SWH, Gas,
+                          intHeat, intHeatFRad, intHeatFLat))
+
+        self.loads.append(loads)
@@ -5,8 +5,10 @@ try:
 except NameError:
     pass
 
+import copy
 import math
 import logging
+from array import array
 
 
 class SolarCalcs(object):
@@ -37,6 +39,11 @@ class SolarCalcs(object):
         self.parameter = parameter
         self.rural = rural
 
+        # Zenith, tanzen & critOrient of each time step from the start of the calendar
+        # (see precompute_angles), indexed by time step
+        self.start = None
+        self.zeniths = self.tanzens = self.critOrients = None
+
         # Logger will be disabled by default unless explicitly called in tests
         self.logger = logging.getLogger(__name__)
 
@@ -69,7 +76,7 @@ class SolarCalcs(object):
 
         if self.dir + self.dif > 0.:
 
-            self.logger.debug("{} Solar radiation > 0".format(__name__))
+            self.logger.debug("%s Solar radiation > 0", __name__)
 
             # calculate zenith tangent, and critOrient solar angles
             self.solarangles()
@@ -122,7 +129,7 @@ class SolarCalcs(object):
 
         else:    # No Sun
 
-            self.logger.debug("{} Solar radiation = 0".format(__name__))
+            self.logger.debug("%s Solar radiation = 0", __name__)
 
             self.UCM.road.solRec = 0.
             self.rural.solRec = 0.
@@ -157,13 +164,66 @@ class SolarCalcs(object):
             self.zenith     # Angle between normal to earth's surface and sun position
             self.tanzen     # tangente of solar zenithal angle
             self.critOrient # critical canyon angle for which solar radiation reaches the road
+
+        The zenith, tanzen & critOrient of a precomputed time step are looked up, the other
+        properties are only updated when the angles are computed.
         """
 
-        ln = self.RSM.lon
+        step = self.step()
+        if step is not None:
+            self.zenith = self.zeniths[step]
+            self.tanzen = self.tanzens[step]
+            self.critOrient = self.critOrients[step]
+        else:
+            self.ut, self.ad, self.eqtime, self.decsol, self.zenith, self.tanzen, self.critOrient = \
+                self.calc_angles(self.simTime.month, self.simTime.day, self.simTime.secDay)
+
+    def step(self):
+        """ Index of the current time step of simTime in the precomputed angles, None if it
+        is not precomputed """
+        if self.zeniths is None:
+            return None
+        elapsed = (self.simTime.julian - self.start.julian) * 86400. + self.simTime.secDay - self.start.secDay
+        step = int(round(elapsed / self.simTime.dt)) - 1
+        return step if 0 <= step < len(self.zeniths) else None
+
+    def precompute_angles(self, start=None):
+        """
+        Calculate the zenith, tanzen & critOrient of every simulation time step up front, by
+        stepping through a copy of the simulation calendar (simTime) from its start, or from
+        a start calendar. solarangles() then looks them up instead of solving the NOAA
+        equations in each time step.
+
+        The angles are not pickled with a checkpoint (see __getstate__), resume calls
+        precompute_angles again.
+        """
+        if start is None:
+            start = self.start if self.start is not None else self.simTime
+        self.start = copy.copy(start)
+        simTime = copy.copy(start)
+        self.zeniths = array('d')
+        self.tanzens = array('d')
+        self.critOrients = array('d')
+        for it in range(1, simTime.nt, 1):
+            simTime.UpdateDate()
+            angles = self.calc_angles(simTime.month, simTime.day, simTime.secDay)
+            self.zeniths.append(angles[4])
+            self.tanzens.append(angles[5])
+            self.critOrients.append(angles[6])
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['zeniths'] = state['tanzens'] = state['critOrients'] = None
+        return state
+
+    def calc_angles(self, month, day, secDay):
+        """
+        Solar angles for a given month, day and elapsed seconds of the day (secDay).
+
+        returns:
+            (ut, ad, eqtime, decsol, zenith, tanzen, critOrient)
+        """
 
-        month = self.simTime.month
-        day = self.simTime.day
-        secDay = self.simTime.secDay    # Total elapsed seconds in simulation
         inobis = self.simTime.inobis    # total days for first of month
                                         #  i.e [0,31,59,90,120,151,181,212,243,273,304,334]
         canAspect = self.UCM.canAspect
@@ -171,50 +231,48 @@ class SolarCalcs(object):
         lat = self.RSM.lat
         GMT = self.RSM.GMT
 
-        self.ut = (24. + (int(secDay)/3600.%24.)) % 24. # Get elapsed hours on current day
-        ibis = list(range(len(inobis)))
-
-        for JI in range(1, 12):
-             ibis[JI] = inobis[JI]+1
+        ut = (24. + (int(secDay)/3600.%24.)) % 24. # Get elapsed hours on current day
 
         date = day + inobis[month-1]-1 # Julian day of the year
         # divide circle by 365 days, multiply by elapsed days + hours
-        self.ad = 2.0 * math.pi/365. * (date-1 + (self.ut-(12/24.)))     # Fractional year (radians)
+        ad = 2.0 * math.pi/365. * (date-1 + (ut-(12/24.)))     # Fractional year (radians)
 
-        self.eqtime = 229.18 * (0.000075+0.001868*math.cos(self.ad)-0.032077*math.sin(self.ad) - \
-            0.01461*math.cos(2*self.ad)-0.040849*math.sin(2*self.ad))
+        eqtime = 229.18 * (0.000075+0.001868*math.cos(ad)-0.032077*math.sin(ad) - \
+            0.01461*math.cos(2*ad)-0.040849*math.sin(2*ad))
 
         # Declination angle (angle of sun with equatorial plane)
-        self.decsol = 0.006918-0.399912*math.cos(self.ad)+0.070257*math.sin(self.ad) \
-            -0.006758*math.cos(2.*self.ad)+0.000907*math.sin(2.*self.ad) \
-            -0.002697*math.cos(3.*self.ad)+0.00148 *math.sin(3.*self.ad)
+        decsol = 0.006918-0.399912*math.cos(ad)+0.070257*math.sin(ad) \
+            -0.006758*math.cos(2.*ad)+0.000907*math.sin(2.*ad) \
+            -0.002697*math.cos(3.*ad)+0.00148 *math.sin(3.*ad)
 
-        time_offset = self.eqtime - 4. * lon + 60 * GMT
+        time_offset = eqtime - 4. * lon + 60 * GMT
         tst = secDay + time_offset * 60
 
         ha = (tst/4./60.-180.) * math.pi/180.
         zlat = lat * (math.pi/180.)   # change angle units to radians
 
         # Calculate zenith solar angle
-        self.zenith = math.acos(math.sin(zlat)*math.sin(self.decsol) + math.cos(zlat)*math.cos(self.decsol)*math.cos(ha))
+        zenith = math.acos(math.sin(zlat)*math.sin(decsol) + math.cos(zlat)*math.cos(decsol)*math.cos(ha))
 
         # tangente of solar zenithal angle
-        if abs(0.5*math.pi - self.zenith) < 1e-6:
-            if 0.5*math.pi - self.zenith > 0.:
-                self.tanzen = math.tan(0.5*math.pi-1e-6)
+        if abs(0.5*math.pi - zenith) < 1e-6:
+            if 0.5*math.pi - zenith > 0.:
+                tanzen = math.tan(0.5*math.pi-1e-6)
 
-            elif 0.5*math.pi - self.zenith <= 0.:
-                self.tanzen = math.tan(0.5*math.pi+1e-6)
+            elif 0.5*math.pi - zenith <= 0.:
+                tanzen = math.tan(0.5*math.pi+1e-6)
 
-        elif abs(self.zenith) < 1e-6:
+        elif abs(zenith) < 1e-6:
             # lim x->0 tan(x) -> 0 which results in division by zero error
             # when calculating the critical canyon angle
             # so set tanzen to 1e-6 which will result in critical canyon angle = 90
-            self.tanzen = 1e-6
+            tanzen = 1e-6
 
         else:
-            self.tanzen = math.tan(self.zenith)
+            tanzen = math.tan(zenith)
 
         # critical canyon angle for which solar radiation reaches the road
         # has to do with street canyon orientation for given solar angle
-        self.critOrient = math.asin(min(abs( 1./self.tanzen)/canAspect, 1. ))
+        critOrient = math.asin(min(abs( 1./tanzen)/canAspect, 1. ))
+
+        return ut, ad, eqtime, decsol, zenith, tanzen, critOrient
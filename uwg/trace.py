@@ -0,0 +1,50 @@
+"""
+Tracing of the uwg model core.
+
+Each module of the model core logs to its own logger, named after the module (i.e.
+uwg.uwg, uwg.building, uwg.UBLDef or uwg.solarcalcs). Messages are passed with their
+arguments and only formatted if they are emitted, and the time step traces that log
+several values are guarded by a level check. Tracing is off by default (the uwg loggers
+have no handler and only warnings are emitted), so a simulation does not pay for it.
+
+It can be turned on at runtime for the whole model or for some of its modules, i.e.
+
+    set_trace_level(logging.DEBUG, "building", "UBLDef")
+"""
+from __future__ import division, print_function
+
+import logging
+
+TRACE_LOGGER = "uwg"
+TRACE_FORMAT = "%(name)s %(levelname)s: %(message)s"
+
+
+def set_trace_level(level, *modules, **kwargs):
+    """Set the level of the uwg logger, or of the loggers of some of its modules.
+
+    args:
+        level: Logging level (i.e. logging.DEBUG or "INFO"), logging.NOTSET to make a
+            module follow the level of the uwg logger again.
+        modules: Names of uwg modules (i.e. "building"). Defaults to the whole model.
+        handler: Handler of the traces, added to the uwg logger. Defaults to a stream
+            handler to stderr if the uwg logger has no handler. Use False to keep the
+            handlers of the uwg logger as they are.
+    returns:
+        list of the loggers whose level was set
+    """
+    handler = kwargs.pop("handler", None)
+    if kwargs:
+        raise TypeError("Unexpected arguments: {}".format(", ".join(sorted(kwargs))))
+
+    root = logging.getLogger(TRACE_LOGGER)
+    if handler is None and not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(TRACE_FORMAT))
+    if handler:
+        root.addHandler(handler)
+
+    names = ["{}.{}".format(TRACE_LOGGER, module) for module in modules] or [TRACE_LOGGER]
+    loggers = [logging.getLogger(name) for name in names]
+    for logger in loggers:
+        logger.setLevel(level)
+    return loggers
@@ -6,12 +6,15 @@ except NameError:
     pass
 
 from .infracalcs import infracalcs
+from .element import conduction_batch
 from math import log
 
 
-def urbflux(UCM, UBL, BEM, forc, parameter, simTime, RSM):
+def urbflux(UCM, UBL, BEM, forc, parameter, simTime, RSM, bemBatch=None):
     """
     Calculate the surface heat fluxes
+    bemBatch: optional BuildingBatch of BEM, to run the building energy model of all
+        building types at once
     Output: [UCM,UBL,BEM]
     """
     T_can = UCM.canTemp
@@ -21,9 +24,13 @@ def urbflux(UCM, UBL, BEM, forc, parameter, simTime, RSM):
     UCM.roofTemp = 0.       # Average urban roof temperature
     UCM.wallTemp = 0.       # Average urban wall temperature
 
+    if bemBatch is not None:
+        bemBatch.BEMCalc(UCM, forc, parameter, simTime)
+
     for j in range(len(BEM)):
         # Building energy model
-        BEM[j].building.BEMCalc(UCM, BEM[j], forc, parameter, simTime)
+        if bemBatch is None:
+            BEM[j].building.BEMCalc(UCM, BEM[j], forc, parameter, simTime)
         BEM[j].ElecTotal = BEM[j].building.ElecTotal * BEM[j].fl_area # W m-2
 
         # Update roof infra calc
@@ -37,10 +44,26 @@ def urbflux(UCM, UBL, BEM, forc, parameter, simTime, RSM):
         # calculates the infrared radiation for wall, taking into account radiation exchange from road
         _infra_road_, BEM[j].wall.infra = infracalcs(UCM, forc, UCM.road.emissivity, e_wall, UCM.roadTemp, T_wall)
 
-        # Update element temperatures
-        BEM[j].mass.layerTemp = BEM[j].mass.Conduction(simTime.dt, BEM[j].building.fluxMass,1.,0.,BEM[j].building.fluxMass)
-        BEM[j].roof.SurfFlux(forc,parameter,simTime,UCM.canHum,T_can,max(forc.wind,UCM.canWind),1.,BEM[j].building.fluxRoof)
-        BEM[j].wall.SurfFlux(forc,parameter,simTime,UCM.canHum,T_can,UCM.canWind,1.,BEM[j].building.fluxWall)
+        # Update roof & wall surface heat flux
+        BEM[j].roof.SurfHeatBalance(forc,parameter,simTime,UCM.canHum,T_can,max(forc.wind,UCM.canWind))
+        BEM[j].wall.SurfHeatBalance(forc,parameter,simTime,UCM.canHum,T_can,UCM.canWind)
+
+    # Update element temperatures of all buildings in one solve
+    elements = []
+    flx1 = []
+    flx2 = []
+    for j in range(len(BEM)):
+        elements.extend((BEM[j].mass, BEM[j].roof, BEM[j].wall))
+        flx1.extend((BEM[j].building.fluxMass, BEM[j].roof.flux, BEM[j].wall.flux))
+        flx2.extend((BEM[j].building.fluxMass, BEM[j].building.fluxRoof, BEM[j].building.fluxWall))
+    layerTemps = conduction_batch(elements, simTime.dt, flx1, 1., forc.deepTemp, flx2)
+
+    for j in range(len(BEM)):
+        BEM[j].mass.layerTemp = layerTemps[3*j]
+        for k, element in ((1, BEM[j].roof), (2, BEM[j].wall)):
+            element.layerTemp = layerTemps[3*j+k]
+            element.T_ext = element.layerTemp[0]
+            element.T_int = element.layerTemp[-1]
 
         # Note the average wall & roof temperature
         UCM.wallTemp = UCM.wallTemp + BEM[j].frac*BEM[j].wall.layerTemp[0]
@@ -128,9 +151,11 @@ def urbflux(UCM, UBL, BEM, forc, parameter, simTime, RSM):
     UCM.turbV = 1.9*UCM.ustarMod
     UCM.turbW = 1.3*UCM.ustarMod
 
-    # Urban wind profile
+    # Urban wind profile of the current time step, one value per RSM level
+    if len(UCM.windProf) != RSM.nzref:
+        UCM.windProf = [0.] * RSM.nzref
     for iz in range(RSM.nzref):
-        UCM.windProf.append(UCM.ustar/parameter.vk*\
-            log((RSM.z[iz]+UCM.bldHeight-UCM.l_disp)/UCM.z0u))
+        UCM.windProf[iz] = UCM.ustar/parameter.vk*\
+            log((RSM.z[iz]+UCM.bldHeight-UCM.l_disp)/UCM.z0u)
 
     return UCM,UBL,BEM
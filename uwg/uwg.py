@@ -27,6 +27,7 @@ import os
 import math
 import copy
 import logging
+from array import array
 
 try:
     import cPickle as pickle
@@ -35,20 +36,25 @@ except ImportError:
 
 from .simparam import SimParam
 from .weather import Weather
-from .building import Building
+from .epw import EPW
+from .building import Building, BuildingBatch
 from .material import Material
 from .element import Element
 from .BEMDef import BEMDef
 from .schdef import SchDef
+from .schtable import SchTable
 from .param import Param
 from .UCMDef import UCMDef
-from .forcing import Forcing
+from .forcing import Forcing, ForcingStream
 from .UBLDef import UBLDef
 from .RSMDef import RSMDef
 from .solarcalcs import SolarCalcs
-from .psychrometrics import psychrometrics
-from .readDOE import readDOE
+from .psychrometrics import psychrometrics, psychrometrics_array
+from .readDOE import readDOE, DOELibrary
 from .urbflux import urbflux
+from .recorder import Recorder
+from .profiler import Profiler
+from .checkpoint import write_checkpoint, read_checkpoint, STATE, state_key, write_state, read_state
 from . import utilities
 
 # For debugging only
@@ -108,6 +114,11 @@ class uwg(object):
     # Site-specific parameters
     WGMAX = 0.005  # maximum film water depth on horizontal surfaces (m)
 
+    # Output variables written to the morphed EPW file, always recorded
+    EPW_OUTPUTS = ('UCM.canTemp', 'UCM.Tdp', 'UCM.canRHum', 'forc.wind')
+    # Variables also recorded to derive UCM.canRHum & UCM.Tdp after the simulation
+    PSYCHROMETRIC_INPUTS = ('UCM.canHum', 'forc.pres')
+
     # File path parameter
     RESOURCE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "resources"))
     CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
@@ -135,10 +146,52 @@ class uwg(object):
         # refdata: Serialized DOE reference data, z_meso height data
         self.readDOE_file_path = os.path.join(self.CURRENT_PATH, "refdata", "readDOE.pkl")
         self.z_meso_dir_path = os.path.join(self.CURRENT_PATH, "refdata")
+        # Vertical grid of the RSM & USM (VerticalGrid), read from z_meso_dir_path if None
+        self.vertical_grid = None
+        # EPW object shared between runs, read from epwFileName if None
+        self.epw = None
 
         # EPW precision
         self.epw_precision = 1
 
+        # Vertical diffusion model implementation of the rural & urban site models,
+        # 'loop' or 'array' (faster for tall vertical grids, see RSMDef.VDM_array)
+        self.vdm_kernel = "loop"
+        # Building energy model implementation, 'loop' (Building.BEMCalc of each building
+        # type) or 'array' (all building types at once, see BuildingBatch)
+        self.bem_kernel = "loop"
+        # Urban boundary layer model implementation, 'loop' or 'array' (faster for a large
+        # charLength, see UBLDef.UBLModel_array)
+        self.ubl_kernel = "loop"
+        # Forcing of the time steps between two weather records, 'step' (the next weather
+        # record) or 'linear' (interpolated, for a dtSim shorter than dtWeather)
+        self.forcing_mode = "step"
+
+        # Output variables recorded for each weather time step, in addition to EPW_OUTPUTS.
+        # i.e. ['UBL.ublTemp', 'BEM[*].building.coolConsump', 'UCM.windProf'] (see Recorder)
+        self.outputs = []
+        # Keep copies of the forc, UBL, UCM and RSM objects for each weather time step (debugging)
+        self.snapshots = False
+        # Time the components of the simulation, reported by self.profiler (see Profiler)
+        self.profile = False
+        self.profiler = None
+        # Write the simulation state every checkpoint_days simulated days (0 for never) to
+        # checkpoint_path (defaults to the morphed EPW path with a .uwgchk extension), to
+        # continue an interrupted simulation with uwg.resume
+        self.checkpoint_days = 0
+        self.checkpoint_path = None
+        # Days simulated before Month/Day to spin up the road, soil, building & canyon
+        # models from their initial temperatures, and directory of the state files that
+        # warm start the later runs of the same site from the same date (see warm_start)
+        self.spinup_days = 0
+        self.warm_start_dir = None
+
+        # Holidays (list of (month, day)), that follow the Sunday building & traffic schedules
+        self.holidays = []
+        # Hourly profiles of the year that replace DOE schedules, by BEM index & schedule name
+        # i.e. {0: {'Occ': [8760 fractions], 'Cool': [8760 setpoints (C)]}} (see SchTable)
+        self.schedule_overrides = {}
+
         # init uwg variables
         self._init_param_dict = None
 
@@ -245,11 +298,13 @@ class uwg(object):
 
     def read_epw(self):
         """Section 2 - Read EPW file
+        The file is only read if self.epw is None, so an EPW object can be shared between runs.
+
         properties:
             self.climateDataPath
             self.newPathName
+            self.epw        # EPW object
             self._header    # header data
-            self.epwinput   # timestep data for weather
             self.lat        # latitude
             self.lon        # longitude
             self.GMT        # GMT
@@ -261,37 +316,21 @@ class uwg(object):
         # Make dir path to epw file
         self.climateDataPath = os.path.join(self.epwDir, self.epwFileName)
 
-        # Open epw file and feed csv data to climate_data
-        try:
-            climate_data = utilities.read_csv(self.climateDataPath)
-        except Exception as e:
-            raise Exception("Failed to read epw file! {}".format(e.message))
-
-        # Read header lines (1 to 8) from EPW and ensure TMY2 format.
-        self._header = climate_data[0:8]
+        if self.epw is None:
+            self.epw = EPW(self.climateDataPath)
 
-        # Read weather data from EPW for each time step in weather file. (lines 8 - end)
-        self.epwinput = climate_data[8:]
+        # Header lines (1 to 8)
+        self._header = self.epw.header
 
-        # Read Lat, Long (line 1 of EPW)
-        self.lat = float(self._header[0][6])
-        self.lon = float(self._header[0][7])
-        self.GMT = float(self._header[0][8])
+        # Lat, Long (line 1 of EPW)
+        self.lat = self.epw.lat
+        self.lon = self.epw.lon
+        self.GMT = self.epw.GMT
 
-        # Read in soil temperature data (assumes this is always there)
-        # ref: http://bigladdersoftware.com/epx/docs/8-2/auxiliary-programs/epw-csv-format-inout.html
-        soilData = self._header[3]
-        self.nSoil = int(soilData[1])           # Number of ground temperature depths
-        self.Tsoil = utilities.zeros(self.nSoil, 12)  # nSoil x 12 matrix for soil temperture (K)
-        self.depth_soil = utilities.zeros(self.nSoil, 1)   # nSoil x 1 matrix for soil depth (m)
-
-        # Read monthly data for each layer of soil from EPW file
-        for i in range(self.nSoil):
-            self.depth_soil[i][0] = float(soilData[2 + (i*16)])  # get soil depth for each nSoil
-            # Monthly data
-            for j in range(12):
-                # 12 months of soil T for specific depth
-                self.Tsoil[i][j] = float(soilData[6 + (i*16) + j]) + 273.15
+        # Soil temperature data
+        self.nSoil = self.epw.nSoil
+        self.Tsoil = self.epw.Tsoil
+        self.depth_soil = self.epw.depth_soil
 
         # Set new directory path for the moprhed EPW file
         self.newPathName = os.path.join(self.destinationDir, self.destinationFileName)
@@ -556,14 +595,8 @@ class uwg(object):
         self.alb_wall           # albedo wall addition for total building stock
         """
 
-        if not os.path.exists(self.readDOE_file_path):
-            raise Exception("readDOE.pkl file: '{}' does not exist.".format(readDOE_file_path))
-
-        readDOE_file = open(self.readDOE_file_path, 'rb')  # open pickle file in binary form
-        refDOE = pickle.load(readDOE_file)
-        refBEM = pickle.load(readDOE_file)
-        refSchedule = pickle.load(readDOE_file)
-        readDOE_file.close()
+        # DOE reference library, read once per process
+        refLibrary = DOELibrary.load(self.readDOE_file_path)
 
         # Define building energy models
         k = 0
@@ -583,7 +616,7 @@ class uwg(object):
             for j in range(3):  # 3 built eras
                 if self.bld[i][j] > 0.:
                     # Add to BEM list
-                    self.BEM.append(refBEM[i][j][self.zone])
+                    self.BEM.append(refLibrary.bem(i, j, self.zone))
                     self.BEM[k].frac = self.bld[i][j]
                     self.BEM[k].fl_area = self.bld[i][j] * total_urban_bld_area
 
@@ -606,7 +639,7 @@ class uwg(object):
                     self.SHGC_total += self.BEM[k].frac * self.BEM[k].building.shgc
                     self.alb_wall_total += self.BEM[k].frac * self.BEM[k].wall.albedo
                     # Add to schedule list
-                    self.Sch.append(refSchedule[i][j][self.zone])
+                    self.Sch.append(refLibrary.schedule(i, j, self.zone))
                     k += 1
 
     def init_input_obj(self):
@@ -615,7 +648,7 @@ class uwg(object):
             self.simTime            # simulation time parameter obj
             self.weather            # weather obj for simulation time period
             self.forcIP             # Forcing obj
-            self.forc               # Empty forcing obj
+            self.forc               # Forcing of the current time step (ForcingStream)
             self.geoParam           # geographic parameters obj
             self.RSM                # Rural site & vertical diffusion model obj
             self.USM                # Urban site & vertical diffusion model obj
@@ -630,14 +663,12 @@ class uwg(object):
             self.Sch                # list of Schedule objects
         """
 
-        climate_file_path = os.path.join(self.epwDir, self.epwFileName)
-
         self.simTime = SimParam(self.dtSim, self.dtWeather, self.Month,
                                 self.Day, self.nDay)  # simulation time parametrs
         # weather file data for simulation time period
-        self.weather = Weather(climate_file_path, self.simTime.timeInitial, self.simTime.timeFinal)
+        self.weather = Weather(self.epw, self.simTime.timeInitial, self.simTime.timeFinal)
         self.forcIP = Forcing(self.weather.staTemp, self.weather)  # initialized Forcing class
-        self.forc = Forcing()  # empty forcing class
+        self.forc = ForcingStream(self.forcIP, self.simTime, self.windMin, self.forcing_mode)
 
         # Initialize geographic Param and Urban Boundary Layer Objects
         nightStart = 18.        # arbitrary values for begin/end hour for night setpoint
@@ -651,7 +682,8 @@ class uwg(object):
                               self.CPV, self.B, self.CM, self.COLBURN)
 
         self.UBL = UBLDef(
-            'C', self.charLength, self.weather.staTemp[0], maxdx, self.geoParam.dayBLHeight, self.geoParam.nightBLHeight)
+            'C', self.charLength, self.weather.staTemp[0], maxdx, self.geoParam.dayBLHeight, self.geoParam.nightBLHeight,
+            self.ubl_kernel)
 
         # Defining road
         emis = 0.93
@@ -675,10 +707,13 @@ class uwg(object):
         self.rural._name = "rural_road"
 
         # Reference site class (also include VDM)
+        grid = self.vertical_grid if self.vertical_grid is not None else self.z_meso_dir_path
         self.RSM = RSMDef(self.lat, self.lon, self.GMT, self.h_obs,
-                          self.weather.staTemp[0], self.weather.staPres[0], self.geoParam, self.z_meso_dir_path)
+                          self.weather.staTemp[0], self.weather.staPres[0], self.geoParam, grid,
+                          self.vdm_kernel)
         self.USM = RSMDef(self.lat, self.lon, self.GMT, self.bldHeight/10.,
-                          self.weather.staTemp[0], self.weather.staPres[0], self.geoParam, self.z_meso_dir_path)
+                          self.weather.staTemp[0], self.weather.staPres[0], self.geoParam, grid,
+                          self.vdm_kernel)
 
         T_init = self.weather.staTemp[0]
         H_init = self.weather.staHum[0]
@@ -686,6 +721,7 @@ class uwg(object):
         self.UCM = UCMDef(self.bldHeight, self.bldDensity, self.verToHor, self.treeCoverage, self.sensAnth, self.latAnth, T_init, H_init,
                           self.weather.staUmod[0], self.geoParam, self.r_glaze_total, self.SHGC_total, self.alb_wall_total, self.road)
         self.UCM.h_mix = self.h_mix
+        self.UCM.windProf = [0.] * self.RSM.nzref  # overwritten by urbflux at each time step
 
         # Define Road Element & buffer to match ground temperature depth
         roadMat, newthickness = procMat(self.road, self.MAXTHICKNESS, self.MINTHICKNESS)
@@ -742,225 +778,404 @@ class uwg(object):
             self.dayType            # 3=Sun, 2=Sat, 1=Weekday
             self.ceil_time_step     # simulation timestep (dt) fitted to weather file timestep
 
-            # Output of object instance vector
+            # Output variables
+            self.results            # Recorder of the EPW_OUTPUTS, outputs and PSYCHROMETRIC_INPUTS variables
+
+            # Output of object instance vector (None unless self.snapshots is True)
             self.WeatherData        # Nx1 vector of forc instance
             self.UCMData            # Nx1 vector of UCM instance
             self.UBLData            # Nx1 vector of UBL instance
             self.RSMData            # Nx1 vector of RSM instance
             self.USMData            # Nx1 vector of USM instance
+
+            # Time of each component (None unless self.profile is True)
+            self.profiler           # Profiler of the simulation
         """
 
+        self.warm_start()
+        self.init_simulation()
+        self.simulate_steps(1)
+
+    def simulate_steps(self, start):
+        """ Simulate the time steps from start to the end of the simulation, writing a
+        checkpoint every checkpoint_days simulated days. """
+
+        nt = self.simTime.nt
+        checkpoint_steps = int(round(self.checkpoint_days * 86400. / self.simTime.dt))
+
+        for it in range(start, nt, 1):  # for every simulation time-step (i.e 5 min) defined by uwg
+            self.update_ground_temperature()
+
+            # There's probably a better way to update the weather...
+            self.simTime.UpdateDate()
+
+            self.logger.info("\n%s m=%s, d=%s, h=%s, s=%s", __name__, self.simTime.month,
+                             self.simTime.day, self.simTime.secDay/3600., self.simTime.secDay)
+
+            self.update_forcing(it)
+            self.update_solar_and_schedules()
+            self.update_rural()
+            self.update_urban()
+            self.record_output()
+
+            if checkpoint_steps > 0 and it % checkpoint_steps == 0 and it < nt - 1:
+                self.write_checkpoint(it + 1)
+
+        self.end_simulation()
+
+    def warm_start(self):
+        """ Spin up the state of the physical models (see checkpoint.STATE) over the
+        spinup_days days before Month/Day, or read it from the state file of the same spin-up
+        in warm_start_dir, and write that state file if there is none. The spin-up starts on
+        January 1st at the latest, and its outputs are not recorded.
+        """
+
+        days = min(int(self.spinup_days), self.simTime.julian)
+        if days <= 0:
+            return
+
+        path = None
+        if self.warm_start_dir:
+            path = os.path.join(self.warm_start_dir,
+                                state_key(self, self.Month, self.Day, days) + ".uwgstate")
+
+        if path is not None and os.path.exists(path):
+            print('\nWarm start from {}.'.format(path))
+            state = read_state(path)
+        else:
+            # Start date of the spin-up, from its julian day
+            julian = self.simTime.julian - days
+            month = max(m for m in range(12) if self.simTime.inobis[m] <= julian)
+
+            spinup = copy.copy(self)
+            spinup.Month, spinup.Day, spinup.nDay = month + 1, julian - self.simTime.inobis[month] + 1, days
+            spinup.outputs = []
+            spinup.snapshots = False
+            spinup.profile = False
+            spinup.checkpoint_days = 0
+            spinup.init_BEM_obj()
+            spinup.init_input_obj()
+            spinup.hvac_autosize()
+            spinup.init_simulation()
+            spinup.simulate_steps(1)
+            state = dict((name, getattr(spinup, name)) for name in STATE)
+
+            if path is not None:
+                if not os.path.isdir(self.warm_start_dir):
+                    os.makedirs(self.warm_start_dir)
+                write_state(spinup, path)
+                self.logger.info("Spin-up state written to %s", path)
+
+        for name in STATE:
+            setattr(self, name, state[name])
+
+    def init_simulation(self):
+        """ Set the simulation counters and empty output vectors used by simulate. """
+
         self.N = int(self.simTime.days * 24)       # total number of hours in simulation
-        n = 0                                      # weather time step counter
+        self.n = 0                                 # weather time step counter
         self.ph = self.simTime.dt/3600.            # dt (simulation time step) in hours
 
+        # Output variables
+        variables = list(self.EPW_OUTPUTS)
+        variables += [v for v in self.outputs if v not in variables]
+        variables += [v for v in self.PSYCHROMETRIC_INPUTS if v not in variables]
+        self.results = Recorder(variables, self.N, self, derived=('UCM.canRHum', 'UCM.Tdp'))
+
         # Data dump variables
-        time = range(self.N)
+        if self.snapshots:
+            self.WeatherData = [None for x in range(self.N)]
+            self.UCMData = [None for x in range(self.N)]
+            self.UBLData = [None for x in range(self.N)]
+            self.RSMData = [None for x in range(self.N)]
+            self.USMData = [None for x in range(self.N)]
+        else:
+            self.WeatherData = self.UCMData = self.UBLData = self.RSMData = self.USMData = None
 
-        self.WeatherData = [None for x in range(self.N)]
-        self.UCMData = [None for x in range(self.N)]
-        self.UBLData = [None for x in range(self.N)]
-        self.RSMData = [None for x in range(self.N)]
-        self.USMData = [None for x in range(self.N)]
+        # Building energy model of all building types at once (see BuildingBatch)
+        if self.bem_kernel not in BuildingBatch.KERNELS:
+            raise Exception(BuildingBatch.KERNEL_MSG.format(BuildingBatch.KERNELS, self.bem_kernel))
+        self.bemBatch = BuildingBatch(self.BEM) if self.bem_kernel == "array" else None
+
+        # Solar calculations, with the solar angles of every time step computed up front
+        self.solar = SolarCalcs(self.UCM, self.BEM, self.simTime,
+                                self.RSM, self.forc, self.geoParam, self.rural)
+        self.solar.precompute_angles()
+
+        # Building & traffic schedules of every hour of the simulation
+        self.schedules = SchTable(self.Sch, self.SchTraffic, self.sensAnth, self.sensOcc,
+                                  self.LatFOcc, self.RadFEquip, self.RadFLight, self.simTime,
+                                  self.holidays, self.schedule_overrides)
 
         print('\nSimulating new temperature and humidity values for {} days from {}/{}.\n'.format(
             int(self.nDay), int(self.Month), int(self.Day)))
         self.logger.info("Start simulation")
 
-        for it in range(1, self.simTime.nt, 1):  # for every simulation time-step (i.e 5 min) defined by uwg
-            # Update water temperature (estimated)
-            if self.nSoil < 3: # correction to original matlab code
-                # for BUBBLE/CAPITOUL/Singapore only
-                self.forc.deepTemp = sum(self.forcIP.temp)/float(len(self.forcIP.temp))
-                self.forc.waterTemp = sum(
-                    self.forcIP.temp)/float(len(self.forcIP.temp)) - 10.      # for BUBBLE/CAPITOUL/Singapore only
-            else:
-                # soil temperature by depth, by month
-                self.forc.deepTemp = self.Tsoil[self.soilindex1][self.simTime.month-1]
-                self.forc.waterTemp = self.Tsoil[2][self.simTime.month-1]
+        # Profile of the components, from here to end_simulation
+        if self.profile:
+            self.profiler = Profiler(self)
+            self.profiler.start()
+        else:
+            self.profiler = None
 
-            # There's probably a better way to update the weather...
-            self.simTime.UpdateDate()
+    def write_checkpoint(self, next_step, checkpoint_path=None):
+        """ Write the simulation state, to continue it from time step next_step (see resume).
 
-            self.logger.info("\n{0} m={1}, d={2}, h={3}, s={4}".format(
-                __name__, self.simTime.month, self.simTime.day, self.simTime.secDay/3600., self.simTime.secDay))
-
-            # simulation time increment raised to weather time step
-            self.ceil_time_step = int(math.ceil(it * self.ph))-1
-            # minus one to be consistent with forcIP list index
-            # Updating forcing instance
-            # horizontal Infrared Radiation Intensity (W m-2)
-            self.forc.infra = self.forcIP.infra[self.ceil_time_step]
-            # wind speed (m s-1)
-            self.forc.wind = max(self.forcIP.wind[self.ceil_time_step], self.geoParam.windMin)
-            self.forc.uDir = self.forcIP.uDir[self.ceil_time_step]          # wind direction
-            # specific humidty (kg kg-1)
-            self.forc.hum = self.forcIP.hum[self.ceil_time_step]
-            self.forc.pres = self.forcIP.pres[self.ceil_time_step]          # Pressure (Pa)
-            self.forc.temp = self.forcIP.temp[self.ceil_time_step]          # air temperature (C)
-            self.forc.rHum = self.forcIP.rHum[self.ceil_time_step]          # Relative humidity (%)
-            self.forc.prec = self.forcIP.prec[self.ceil_time_step]          # Precipitation (mm h-1)
-            # horizontal solar diffuse radiation (W m-2)
-            self.forc.dif = self.forcIP.dif[self.ceil_time_step]
-            # normal solar direct radiation (W m-2)
-            self.forc.dir = self.forcIP.dir[self.ceil_time_step]
-            # Canyon humidity (absolute) same as rural
-            self.UCM.canHum = copy.copy(self.forc.hum)
-
-            # Update solar flux
-            self.solar = SolarCalcs(self.UCM, self.BEM, self.simTime,
-                                    self.RSM, self.forc, self.geoParam, self.rural)
-            self.rural, self.UCM, self.BEM = self.solar.solarcalcs()
-
-            # Update building & traffic schedule
-            # Assign day type (1 = weekday, 2 = sat, 3 = sun/other)
-            if self.is_near_zero(self.simTime.julian % 7):
-                self.dayType = 3                                        # Sunday
-            elif self.is_near_zero(self.simTime.julian % 7 - 6.):
-                self.dayType = 2                                        # Saturday
-            else:
-                self.dayType = 1                                        # Weekday
-
-            # Update anthropogenic heat load for each hour (building & UCM)
-            self.UCM.sensAnthrop = self.sensAnth * (self.SchTraffic[self.dayType-1][self.simTime.hourDay])
-
-            # Update the energy components for building types defined in initialize.uwg
-            for i in range(len(self.BEM)):
-                # Set temperature
-                self.BEM[i].building.coolSetpointDay = self.Sch[i].Cool[self.dayType -
-                                                                        1][self.simTime.hourDay] + 273.15  # add from temperature schedule for cooling
-                self.BEM[i].building.coolSetpointNight = self.BEM[i].building.coolSetpointDay
-                self.BEM[i].building.heatSetpointDay = self.Sch[i].Heat[self.dayType -
-                                                                        1][self.simTime.hourDay] + 273.15  # add from temperature schedule for heating
-                self.BEM[i].building.heatSetpointNight = self.BEM[i].building.heatSetpointDay
-
-                # Internal Heat Load Schedule (W/m^2 of floor area for Q)
-                self.BEM[i].Elec = self.Sch[i].Qelec * self.Sch[i].Elec[self.dayType -
-                                                                        1][self.simTime.hourDay]      # Qelec x elec fraction for day
-                self.BEM[i].Light = self.Sch[i].Qlight * self.Sch[i].Light[self.dayType -
-                                                                           1][self.simTime.hourDay]    # Qlight x light fraction for day
-                self.BEM[i].Nocc = self.Sch[i].Nocc * self.Sch[i].Occ[self.dayType -
-                                                                      1][self.simTime.hourDay]        # Number of occupants x occ fraction for day
-                # Sensible Q occupant * fraction occupant sensible Q * number of occupants
-                self.BEM[i].Qocc = self.sensOcc * (1 - self.LatFOcc) * self.BEM[i].Nocc
-
-                # SWH and ventilation schedule
-                self.BEM[i].SWH = self.Sch[i].Vswh * self.Sch[i].SWH[self.dayType -
-                                                                     1][self.simTime.hourDay]          # litres per hour x SWH fraction for day
-                # m^3/s/m^2 of floor
-                self.BEM[i].building.vent = self.Sch[i].Vent
-                self.BEM[i].Gas = self.Sch[i].Qgas * self.Sch[i].Gas[self.dayType -
-                                                                     1][self.simTime.hourDay]          # Gas Equip Schedule, per m^2 of floor
-
-                # This is quite messy, should update
-                # Update internal heat and corresponding fractional loads
-                intHeat = self.BEM[i].Light + self.BEM[i].Elec + self.BEM[i].Qocc
-                # W/m2 from light, electricity, occupants
-                self.BEM[i].building.intHeatDay = intHeat
-                self.BEM[i].building.intHeatNight = intHeat
-                # fraction of radiant heat from light and equipment of whole internal heat
-                self.BEM[i].building.intHeatFRad = (
-                    self.RadFLight * self.BEM[i].Light + self.RadFEquip * self.BEM[i].Elec) / intHeat
-                # fraction of latent heat (from occupants) of whole internal heat
-                self.BEM[i].building.intHeatFLat = self.LatFOcc * \
-                    self.sensOcc * self.BEM[i].Nocc/intHeat
-
-                # Update envelope temperature layers
-                self.BEM[i].T_wallex = self.BEM[i].wall.layerTemp[0]
-                self.BEM[i].T_wallin = self.BEM[i].wall.layerTemp[-1]
-                self.BEM[i].T_roofex = self.BEM[i].roof.layerTemp[0]
-                self.BEM[i].T_roofin = self.BEM[i].roof.layerTemp[-1]
-
-            # Update rural heat fluxes & update vertical diffusion model (VDM)
-            self.rural.infra = self.forc.infra - self.rural.emissivity * self.SIGMA * \
-                self.rural.layerTemp[0]**4.    # Infrared radiation from rural road
-
-            self.rural.SurfFlux(self.forc, self.geoParam, self.simTime,
-                                self.forc.hum, self.forc.temp, self.forc.wind, 2., 0.)
-            self.RSM.VDM(self.forc, self.rural, self.geoParam, self.simTime)
-
-            # Calculate urban heat fluxes, update UCM & UBL
-            self.UCM, self.UBL, self.BEM = urbflux(
-                self.UCM, self.UBL, self.BEM, self.forc, self.geoParam, self.simTime, self.RSM)
-            self.UCM.UCModel(self.BEM, self.UBL.ublTemp, self.forc, self.geoParam)
-            self.UBL.UBLModel(self.UCM, self.RSM, self.rural,
-                              self.forc, self.geoParam, self.simTime)
-
-            """
-            # Experimental code to run diffusion model in the urban area
-            # N.B Commented out in python uwg because computed wind speed in
-            # urban VDM: y = =0.84*ln((2-x/20)/0.51) results in negative log
-            # for building heights >= 40m.
-
-            Uroad = copy.copy(self.UCM.road)
-            Uroad.sens = copy.copy(self.UCM.sensHeat)
-            Uforc = copy.copy(self.forc)
-            Uforc.wind = copy.copy(self.UCM.canWind)
-            Uforc.temp = copy.copy(self.UCM.canTemp)
-            self.USM.VDM(Uforc,Uroad,self.geoParam,self.simTime)
-            """
-
-            self.logger.info("dbT = {}".format(self.UCM.canTemp-273.15))
+        args:
+            next_step: Next time step to simulate (the time steps before it are simulated).
+            checkpoint_path: Optional path of the checkpoint file, defaults to
+                self.checkpoint_path.
+        """
+
+        if checkpoint_path is None:
+            checkpoint_path = self.checkpoint_path or \
+                os.path.splitext(self.newPathName)[0] + ".uwgchk"
+
+        # The profiler wraps methods of the simulation objects, that are not pickled
+        if self.profiler is not None:
+            self.profiler.stop()
+
+        self.next_step = next_step
+        try:
+            write_checkpoint(self, checkpoint_path)
+        finally:
+            if self.profiler is not None:
+                self.profiler.start()
+
+        self.logger.info("Checkpoint at %s/%s written to %s",
+                         self.simTime.month, self.simTime.day, checkpoint_path)
+
+    @classmethod
+    def resume(cls, checkpoint_path):
+        """ Continue the simulation of a checkpoint file (see checkpoint_days) to its end and
+        write the morphed EPW file, as run() would have.
+
+        args:
+            checkpoint_path: Path of the checkpoint file.
+        returns:
+            uwg object of the completed simulation
+        """
+
+        model = read_checkpoint(checkpoint_path)
+
+        # The solar angles are not stored in the checkpoint
+        model.solar.precompute_angles()
+
+        print('\nResuming the simulation of {} days from {}/{} at {}/{}.\n'.format(
+            int(model.nDay), int(model.Month), int(model.Day),
+            int(model.simTime.month), int(model.simTime.day)))
+
+        # Profile of the rest of the simulation
+        if model.profile:
+            model.profiler = Profiler(model)
+            model.profiler.start()
+
+        model.simulate_steps(model.next_step)
+        model.write_epw()
+        return model
+
+    def end_simulation(self):
+        """ Complete the outputs once all time steps are simulated. """
+
+        self.update_psychrometrics()
+
+        if self.profiler is not None:
+            self.profiler.stop()
+
+    def update_ground_temperature(self):
+        """ Update deep soil and water temperature for the month of the current time step. """
+
+        # Update water temperature (estimated)
+        if self.nSoil < 3: # correction to original matlab code
+            # for BUBBLE/CAPITOUL/Singapore only
+            self.forc.deepTemp = sum(self.forcIP.temp)/float(len(self.forcIP.temp))
+            self.forc.waterTemp = sum(
+                self.forcIP.temp)/float(len(self.forcIP.temp)) - 10.      # for BUBBLE/CAPITOUL/Singapore only
+        else:
+            # soil temperature by depth, by month
+            self.forc.deepTemp = self.Tsoil[self.soilindex1][self.simTime.month-1]
+            self.forc.waterTemp = self.Tsoil[2][self.simTime.month-1]
+
+    def update_forcing(self, it):
+        """ Update the forcing object from the weather data at simulation step it. """
+
+        # simulation time increment raised to weather time step, mapped for every time step
+        # by the forcing stream (see ForcingStream)
+        self.ceil_time_step = self.forc.seek(it)
+
+    def update_solar_and_schedules(self):
+        """ Update the urban solar fluxes, building & traffic schedules for the current time step. """
+
+        # Canyon humidity (absolute) same as rural
+        self.UCM.canHum = self.forc.hum
+
+        # Update solar flux
+        self.rural, self.UCM, self.BEM = self.solar.solarcalcs()
+
+        # Update building & traffic schedule, precomputed for each hour (see SchTable)
+        h = self.schedules.hours[(self.simTime.julian, self.simTime.hourDay)]
+        self.dayType = self.schedules.dayType[h]                    # 3=Sun, 2=Sat, 1=Weekday
+
+        # Update anthropogenic heat load for each hour (building & UCM)
+        self.UCM.sensAnthrop = self.schedules.sensAnthrop[h]
+
+        # Update the energy components for building types defined in initialize.uwg
+        loads = self.schedules.loads[h]
+        for i in range(len(self.BEM)):
+            bem = self.BEM[i]
+            building = bem.building
+            (coolSetpoint, heatSetpoint, bem.Elec, bem.Light, bem.Nocc, bem.Qocc, bem.SWH, bem.Gas,
+             intHeat, building.intHeatFRad, building.intHeatFLat) = loads[i]
+
+            # Set temperature
+            building.coolSetpointDay = coolSetpoint
+            building.coolSetpointNight = coolSetpoint
+            building.heatSetpointDay = heatSetpoint
+            building.heatSetpointNight = heatSetpoint
+
+            # Internal heat load (W/m^2 of floor area) & ventilation (m^3/s/m^2 of floor)
+            building.intHeatDay = intHeat
+            building.intHeatNight = intHeat
+            building.vent = self.Sch[i].Vent
+
+            # Update envelope temperature layers
+            bem.T_wallex = bem.wall.layerTemp[0]
+            bem.T_wallin = bem.wall.layerTemp[-1]
+            bem.T_roofex = bem.roof.layerTemp[0]
+            bem.T_roofin = bem.roof.layerTemp[-1]
+
+    def update_rural(self):
+        """ Update rural heat fluxes & the rural vertical diffusion model (VDM). """
+
+        self.rural.infra = self.forc.infra - self.rural.emissivity * self.SIGMA * \
+            self.rural.layerTemp[0]**4.    # Infrared radiation from rural road
+
+        self.rural.SurfFlux(self.forc, self.geoParam, self.simTime,
+                            self.forc.hum, self.forc.temp, self.forc.wind, 2., 0.)
+        self.RSM.VDM(self.forc, self.rural, self.geoParam, self.simTime)
+
+    def update_urban(self):
+        """ Calculate urban heat fluxes, update UCM & UBL. """
+
+        self.UCM, self.UBL, self.BEM = urbflux(
+            self.UCM, self.UBL, self.BEM, self.forc, self.geoParam, self.simTime, self.RSM,
+            self.bemBatch)
+        self.UCM.UCModel(self.BEM, self.UBL.ublTemp, self.forc, self.geoParam)
+        self.UBL.UBLModel(self.UCM, self.RSM, self.rural,
+                          self.forc, self.geoParam, self.simTime)
+
+        """
+        # Experimental code to run diffusion model in the urban area
+        # N.B Commented out in python uwg because computed wind speed in
+        # urban VDM: y = =0.84*ln((2-x/20)/0.51) results in negative log
+        # for building heights >= 40m.
+
+        Uroad = copy.copy(self.UCM.road)
+        Uroad.sens = copy.copy(self.UCM.sensHeat)
+        Uforc = copy.copy(self.forc)
+        Uforc.wind = copy.copy(self.UCM.canWind)
+        Uforc.temp = copy.copy(self.UCM.canTemp)
+        self.USM.VDM(Uforc,Uroad,self.geoParam,self.simTime)
+        """
+
+    def record_output(self):
+        """ Store the hourly output of the current time step if it falls on a weather time step. """
+
+        n = self.n
+        trace = self.logger.isEnabledFor(logging.INFO)
+        if trace:
+            self.logger.info("dbT = %s", self.UCM.canTemp-273.15)
             if n > 0:
-                logging.info("dpT = {}".format(self.UCM.Tdp))
-                logging.info("RH  = {}".format(self.UCM.canRHum))
+                self.logger.info("dpT = %s", self.UCM.Tdp)
+                self.logger.info("RH  = %s", self.UCM.canRHum)
 
-            if self.is_near_zero(self.simTime.secDay % self.simTime.timePrint) and n < self.N:
+        if self.is_near_zero(self.simTime.secDay % self.simTime.timePrint) and n < self.N:
 
-                self.logger.info("{0} ----sim time step = {1}----\n\n".format(__name__, n))
+            self.logger.info("%s ----sim time step = %s----\n\n", __name__, n)
 
-                self.WeatherData[n] = copy.copy(self.forc)
+            # UCM.canRHum & UCM.Tdp are recorded by update_psychrometrics at the end of
+            # the simulation, and only derived at each time step to be traced
+            if trace:
                 _Tdb, _w, self.UCM.canRHum, _h, self.UCM.Tdp, _v = psychrometrics(
                     self.UCM.canTemp, self.UCM.canHum, self.forc.pres)
 
+            self.results.record(self, n)
+
+            if self.snapshots:
+                self.WeatherData[n] = copy.copy(self.forc)
                 self.UBLData[n] = copy.copy(self.UBL)
                 self.UCMData[n] = copy.copy(self.UCM)
                 self.RSMData[n] = copy.copy(self.RSM)
 
-                self.logger.info("dbT = {}".format(self.UCMData[n].canTemp-273.15))
-                self.logger.info("dpT = {}".format(self.UCMData[n].Tdp))
-                self.logger.info("RH  = {}".format(self.UCMData[n].canRHum))
+            if trace:
+                self.logger.info("dbT = %s", self.UCM.canTemp-273.15)
+                self.logger.info("dpT = %s", self.UCM.Tdp)
+                self.logger.info("RH  = %s", self.UCM.canRHum)
 
-                n += 1
+            self.n = n + 1
 
-    def write_epw(self):
+    def update_psychrometrics(self):
+        """ Derive the canyon relative humidity and dew point temperature of every recorded
+        weather time step from its canyon temperature, humidity & pressure, at once. """
+
+        n = self.n
+        _Tdb, _w, canRHum, _h, Tdp, _v = psychrometrics_array(
+            self.results['UCM.canTemp'][:n], self.results['UCM.canHum'][:n],
+            self.results['forc.pres'][:n])
+
+        self.results['UCM.canRHum'][:n] = array('d', canRHum)
+        self.results['UCM.Tdp'][:n] = array('d', Tdp)
+
+        if n > 0:
+            self.UCM.canRHum, self.UCM.Tdp = canRHum[-1], Tdp[-1]
+        if self.snapshots:
+            for i in range(n):
+                self.UCMData[i].canRHum, self.UCMData[i].Tdp = canRHum[i], Tdp[i]
+
+    def write_epw(self, epw_file=None):
         """ Section 8 - Writing new EPW file
+
+        args:
+            epw_file: Optional file object to stream the new EPW file to, instead of
+                writing it to self.newPathName.
         """
-        epw_prec = self.epw_precision  # precision of epw file input
-
-        for iJ in range(len(self.UCMData)):
-            # [iJ+self.simTime.timeInitial-8] = increments along every weather timestep in epw
-            # [6 to 21]                       = column data of epw
-            self.epwinput[iJ+self.simTime.timeInitial-8][6] = "{0:.{1}f}".format(
-                self.UCMData[iJ].canTemp - 273.15, epw_prec)  # dry bulb temperature  [?C]
-            # dew point temperature [?C]
-            self.epwinput[iJ+self.simTime.timeInitial -
-                          8][7] = "{0:.{1}f}".format(self.UCMData[iJ].Tdp, epw_prec)
-            # relative humidity     [%]
-            self.epwinput[iJ+self.simTime.timeInitial -
-                          8][8] = "{0:.{1}f}".format(self.UCMData[iJ].canRHum, epw_prec)
-            self.epwinput[iJ+self.simTime.timeInitial-8][21] = "{0:.{1}f}".format(
-                self.WeatherData[iJ].wind, epw_prec)        # wind speed [m/s]
-
-        # Writing new EPW file
-        epw_new_id = open(self.newPathName, "w")
-
-        for i in range(8):
-            new_epw_line = '{}\n'.format(reduce(lambda x, y: x+","+y, self._header[i]))
-            epw_new_id.write(new_epw_line)
-
-        for i in range(len(self.epwinput)):
-            printme = ""
-            for ei in range(34):
-                printme += "{}".format(self.epwinput[i][ei]) + ','
-            printme = printme + "{}".format(self.epwinput[i][ei])
-            new_epw_line = "{0}\n".format(printme)
-            epw_new_id.write(new_epw_line)
-
-        epw_new_id.close()
-
-        print("New climate file '{}' is generated at {}.".format(
-            self.destinationFileName, self.destinationDir))
+
+        # dry bulb temperature [C], dew point temperature [C], relative humidity [%]
+        # and wind speed [m/s] replace columns 6, 7, 8 and 21 of the epw, starting at
+        # the weather time step of the beginning of the simulation
+        columns = {
+            6: [canTemp - 273.15 for canTemp in self.results['UCM.canTemp']],
+            7: self.results['UCM.Tdp'],
+            8: self.results['UCM.canRHum'],
+            21: self.results['forc.wind']
+            }
+
+        self.epw.write(epw_file or self.newPathName, columns,
+                       self.simTime.timeInitial-8, self.epw_precision)
+
+        if epw_file is None:
+            print("New climate file '{}' is generated at {}.".format(
+                self.destinationFileName, self.destinationDir))
+
+    def write_outputs(self, csv_file=None):
+        """ Write the recorded output variables (see self.outputs) as a csv file, with
+        one row per weather time step and one column per variable.
+
+        args:
+            csv_file: Optional path or file object of the csv file. Defaults to the path
+                of the morphed EPW file with a "_outputs.csv" suffix.
+        """
+
+        if csv_file is None:
+            csv_file = os.path.splitext(self.newPathName)[0] + "_outputs.csv"
+
+        # Date of each weather time step (columns 1 to 3 of the epw)
+        start = self.simTime.timeInitial-8
+        dates = [(name, [int(x) for x in self.epw.column(i)[start:start+self.n]])
+                 for i, name in ((1, "Month"), (2, "Day"), (3, "Hour"))]
+
+        variables = list(self.EPW_OUTPUTS) + [v for v in self.outputs if v not in self.EPW_OUTPUTS]
+        self.results.write_csv(csv_file, dates, self.n, self.results.columns(variables))
 
     def run(self):
 
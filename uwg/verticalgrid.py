@@ -0,0 +1,104 @@
+from __future__ import division, print_function
+
+try:
+    range = xrange
+except NameError:
+    pass
+
+import os
+from bisect import bisect_left
+
+
+class VerticalGrid(object):
+    """
+    Vertical grid of the rural & urban site models (RSMDef).
+
+    The grid is defined by the heights of the layer boundaries (z_meso), from the ground
+    up. It can be read from a file (one height per line, as refdata/z_meso.txt), built
+    from a stretching function of the boundary index or given as a list. Grids read
+    from a file are cached, so the file is only parsed once per process.
+
+    args:
+        z_meso      # list of the heights of the layer boundaries (m)
+
+    properties
+        z_meso      # heights of the layer boundaries (m)
+        z           # height of the center of each layer (m)
+        dz          # thickness of each layer (m)
+        nz          # number of layers
+    """
+
+    GRID_MSG = "Vertical grid must have increasing heights of at least 2 layer boundaries."
+    HEIGHT_MSG = "Height {}m is above the vertical grid (top layer center at {}m)."
+
+    # Grids read from a file, by absolute path of the file
+    _cache = {}
+
+    def __init__(self, z_meso):
+
+        self.z_meso = [float(h) for h in z_meso]
+        if len(self.z_meso) < 2 or \
+                any(self.z_meso[i+1] <= self.z_meso[i] for i in range(len(self.z_meso)-1)):
+            raise Exception(self.GRID_MSG)
+
+        self.nz = len(self.z_meso) - 1
+        self.z = [0.5 * (self.z_meso[i] + self.z_meso[i+1]) for i in range(self.nz)]
+        self.dz = [self.z_meso[i+1] - self.z_meso[i] for i in range(self.nz)]
+
+        self._layers = {}   # layer numbers found by layer(), by height
+
+    def __repr__(self):
+        return "VerticalGrid: {} layers up to {}m".format(self.nz, self.z_meso[-1])
+
+    @classmethod
+    def from_file(cls, z_meso_file_path):
+        """ Grid of the layer boundary heights of a file, read the first time it is requested """
+
+        path = os.path.abspath(z_meso_file_path)
+        if path not in cls._cache:
+            if not os.path.exists(path):
+                raise Exception("z_meso.txt file: '{}' does not exist.".format(z_meso_file_path))
+
+            z_meso = []
+            f = open(path, 'r')
+            for txtline in f:
+                if txtline.strip():
+                    z_meso.append(float("".join(txtline.split())))  # Strip all white spaces
+            f.close()
+            cls._cache[path] = cls(z_meso)
+
+        return cls._cache[path]
+
+    @classmethod
+    def from_function(cls, height, nz):
+        """ Grid of nz layers, the height of layer boundary i (m) being height(i) """
+        return cls([height(i) for i in range(nz+1)])
+
+    @classmethod
+    def stretched(cls, dz0, ratio, top, dz_max=None):
+        """
+        Grid of layers that are ratio times thicker than the one below (up to dz_max),
+        starting from dz0 (m) at the ground, up to the first boundary at or above top (m).
+        refdata/z_meso.txt is stretched(4., 1.1, 5360., 250.) up to rounding.
+        """
+        z_meso = [0.]
+        dz = float(dz0)
+        while z_meso[-1] < top:
+            z_meso.append(z_meso[-1] + dz)
+            dz = dz * ratio if dz_max is None else min(dz * ratio, dz_max)
+        return cls(z_meso)
+
+    def layer(self, height, eps=1e-16):
+        """
+        Number (index + 1) of the first layer whose center is at or above height (m),
+        found by bisection & cached.
+        """
+        if height not in self._layers:
+            iz = bisect_left(self.z, height)
+            # Include a layer below height within eps, as a linear search with is_near_zero
+            while iz > 0 and abs(self.z[iz-1] - height) < eps:
+                iz -= 1
+            if iz == self.nz:
+                raise Exception(self.HEIGHT_MSG.format(height, self.z[-1]))
+            self._layers[height] = iz + 1
+        return self._layers[height]